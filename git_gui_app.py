@@ -5,6 +5,10 @@ Git GUI 提交工具 - 桌面应用版本
 一个简单的 Git 提交工具，带安全检查功能
 """
 
+import time
+# 启动计时起点 (用于 GITGUI_STARTUP_PROBE 测量首个窗口出现的时间)
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 import subprocess
@@ -12,33 +16,3465 @@ import os
 import sys
 import re
 import threading
+import queue
+import atexit
+import collections
 import datetime
 import json
+import io
+import bisect
+import itertools
+import hashlib
+import heapq
+import math
+import gzip
+import shutil
+import stat
+import select
+import struct
 from pathlib import Path
+# 以下模块只在进程池扫描、inotify、命令行模式中用到, 在使用处导入以缩短启动时间:
+# concurrent.futures, multiprocessing, ctypes, argparse; numpy 为可选依赖, 见 load_numpy
+
+# 敏感信息模式 (类别 -> 正则列表, 匹配时忽略大小写)
+SENSITIVE_PATTERNS = {
+    'API Key': [
+        r'api[_-]?key\s*[=:]\s*["\']?[a-zA-Z0-9_-]{20,}["\']?',
+        r'["\']sk_[a-zA-Z0-9_-]{20,}["\']',  # OpenAI
+        r'["\']AKIA[0-9A-Z]{16}["\']',  # AWS
+    ],
+    '密码': [
+        r'password\s*[=:]\s*["\'][^"\']{4,}["\']',
+        r'passwd\s*[=:]\s*["\'][^"\']{4,}["\']',
+    ],
+    'Token': [
+        r'token\s*[=:]\s*["\'][a-zA-Z0-9_-]{20,}["\']',
+        r'bearer\s+[a-zA-Z0-9_-]{20,}',
+    ],
+    '私钥': [
+        r'-----BEGIN\s+RSA\s+PRIVATE\s+KEY-----',
+        r'-----BEGIN\s+OPENSSH\s+PRIVATE\s+KEY-----',
+    ],
+    '数据库连接': [
+        r'mongodb://[^@]+@',
+        r'mysql://[^:]+:[^@]+@',
+    ],
+}
+
+# 高级选项默认值 (只能通过 user_config.json 修改, 界面上不显示)
+ADVANCED_OPTION_DEFAULTS = {
+    'scan_cache': True,  # 使用磁盘缓存跳过未修改文件的扫描
+    'scan_workers': 0,   # 并行扫描的进程数, 0 表示按 CPU 核数自动选择, 1 表示不使用进程池
+    'respect_gitignore': True,  # 用 git ls-files 确定清理和扫描范围, 跳过被 .gitignore 忽略的文件
+    'max_scan_file_size': 50 * 1024 * 1024,  # 单个文件的扫描上限 (字节), 超过则跳过并报告, 0 表示不限制
+    'fetch_before_push': False,  # 推送前完整执行 git fetch origin; 默认只用 ls-remote 查询目标分支
+    'remote_ref_ttl': 60,  # 远程分支查询结果的缓存时间 (秒), 0 表示不缓存
+    'write_trace': True,  # 每次提交把各步骤耗时写入 logs/trace-*.json (可用 chrome://tracing 打开)
+    'watch_files': False,  # 后台监视代码目录, 空闲时预先扫描被修改的文件
+    'cleanup_untracked_only': True,  # 只清理 git status 报告的未跟踪文件, 不删除已提交的文件
+    'targeted_add': True,  # 只把 git status 报告有改动的路径交给 git add, 关闭时使用 git add .
+    'git_acceleration': False,  # 为仓库开启 untracked cache (Windows/macOS 上还有 fsmonitor), 关闭时撤销
+    'scan_unpushed_history': True,  # 推送前扫描尚未推送的历史提交中新增的行
+    'entropy_scan': False,  # 额外报告引号内或赋值后的高熵随机字符串 (没有固定前缀的密钥)
+    'entropy_threshold': 4.5,  # 高熵判定阈值 (比特/字符, 按完整 base64 字符集的 6 比特计); 短字符串和十六进制按各自最大熵等比折算
+    'log_view_lines': 5000,  # 日志区域最多保留的行数, 超出后成批删除最早的行, 0 表示不限制
+    'log_max_bytes': 10 * 1024 * 1024,  # 单个日志文件的大小上限 (字节), 超过后压缩归档并换新文件, 0 表示只按天切换
+    'log_keep_files': 30,  # 保留的压缩日志和性能跟踪文件各自的数量, 超出后删除最早的, 0 表示不删除
+}
+
+# git_acceleration 开启的仓库配置; 内置 fsmonitor 守护进程只支持 Windows 和 macOS
+GIT_ACCELERATION_CONFIG = [('core.untrackedCache', 'true')]
+if sys.platform in ('win32', 'darwin'):
+    GIT_ACCELERATION_CONFIG.append(('core.fsmonitor', 'true'))
+# 记录由本工具设置的配置项, 关闭选项时只撤销这些项, 不动用户自己的设置
+GIT_ACCELERATION_MARKER = 'gitgui.managedConfig'
+
+# 待扫描文件少于该数量时不启动进程池 (进程启动开销大于收益)
+PARALLEL_SCAN_MIN_FILES = 64
+
+# 大文件分块扫描: 超过阈值的文件按块读取, 内存占用与文件大小无关
+STREAM_SCAN_THRESHOLD = 8 * 1024 * 1024
+STREAM_SCAN_CHUNK_CHARS = 4 * 1024 * 1024
+# 相邻块的重叠字符数, 即跨块边界时能完整识别的最长匹配
+STREAM_SCAN_OVERLAP_CHARS = 64 * 1024
+
+# 扫描时忽略的目录
+SCAN_IGNORE_DIRS = {'node_modules', '.git', 'venv', '__pycache__',
+                    'dist', 'build', '.venv', 'target', 'bin', 'obj'}
+
+# 清理临时文件时跳过的目录
+CLEANUP_SKIP_DIRS = {'.git', 'node_modules', 'venv', '.venv', 'env', '__pycache__', 'dist', 'build'}
+
+# Windows 保留设备名 (会导致 Git 失败)
+WINDOWS_RESERVED_NAMES = frozenset(['nul', 'con', 'prn', 'aux', 'com1', 'com2', 'com3', 'com4',
+                                    'com5', 'com6', 'com7', 'com8', 'com9', 'lpt1', 'lpt2',
+                                    'lpt3', 'lpt4', 'lpt5', 'lpt6', 'lpt7', 'lpt8', 'lpt9'])
+
+# 常见的临时文件后缀 (与小写后的文件名比较)
+TEMP_FILE_SUFFIXES = ('~$', '.tmp', '.temp', '.bak', '.swp', '.DS_Store',
+                      'Thumbs.db', '.log', '.cache')
+
+# 扫描的文本文件扩展名 (另外总是扫描 .env 和 Dockerfile)
+SCAN_TEXT_EXTENSIONS = {'.js', '.ts', '.py', '.java', '.go', '.rs',
+                        '.c', '.cpp', '.h', '.php', '.rb', '.swift',
+                        '.json', '.xml', '.yaml', '.yml', '.toml',
+                        '.env', '.txt', '.md', '.sh', '.bash'}
+
+# 示例和占位符关键字 (命中即视为假阳性)
+PLACEHOLDER_KEYWORDS = ('your_', 'replace_', 'example', 'xxxxx', '*****',
+                        'your_api_key', '<username>', '<password>')
+
+
+# 忽略大小写匹配时与 ASCII 字母等价、但 str.lower() 不会转换成该字母的字符
+# (İ 的小写是两个字符, 先映射掉才能保证转换前后位置一一对应)
+IGNORECASE_FOLD = (('\u0130', 'i'), ('\u0131', 'i'), ('\u017f', 's'))
+
+# 高熵字符串检测: 引号之后或 = / : 之后、至少 20 个 base64/十六进制字符的片段
+ENTROPY_CATEGORY = '高熵字符串'
+ENTROPY_CANDIDATE_RE = re.compile(r"""["'`=:][ \t]*([\w+/-]{20,}={0,2})(?![\w+/=-])""", re.ASCII)
+ENTROPY_HEX_RE = re.compile(r'[0-9a-fA-F]+')
+# entropy_threshold 按完整的 base64 字符集 (log2(64) = 6 比特) 给出; 比较时把熵除以该字符串
+# 可能达到的最大熵 log2(min(长度, 字符集大小)), 阈值同样除以 6, 短字符串和十六进制字符串不再吃亏
+ENTROPY_BASE64_BITS = 6
+ENTROPY_HEX_ALPHABET = 16
+ENTROPY_BASE64_ALPHABET = 64
+# 依赖锁文件中的完整性校验值 (如 "sha512-...") 不是密钥
+ENTROPY_IGNORE_PREFIXES = ('sha1-', 'sha256-', 'sha384-', 'sha512-')
+# 紧跟在这些上下文之后的十六进制字符串是提交号或摘要 (commit = "9fce...", --hash=sha256:e3b0...)
+ENTROPY_HASH_CONTEXT_RE = re.compile(
+    r'(?:sha\d*|md5|commit|hash|digest|checksum|rev(?:ision)?)(?:[_-]?id)?[ \t"\'`=:]*$', re.IGNORECASE)
+ENTROPY_HASH_CONTEXT_CHARS = 24
+ENTROPY_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+# 按驼峰/下划线/数字切分后平均片段不短于该长度的, 视为由单词拼成的标识符 (如 getUserAccountName2)
+ENTROPY_WORD_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+ENTROPY_MIN_WORD_LENGTH = 3.0
+# 候选字符串不少于该数量时用 NumPy 批量计算熵 (实测约 4 个以上时更快), 更少时逐个计算
+ENTROPY_NUMPY_MIN_TOKENS = 4
+ENTROPY_NUMPY_BATCH = 4096
+
+_numpy = None
+
+
+def load_numpy():
+    """导入可选依赖 numpy (首次使用时导入, 不影响启动时间)
+
+    Returns:
+        module: numpy 模块, 没有安装时返回 None
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def shannon_entropies(tokens):
+    """批量计算 ASCII 字符串的 Shannon 熵 (比特/字符)
+
+    字符串较多且安装了 NumPy 时, 把所有字符串拼成一个字节缓冲区, 按 (字符串, 字节) 用
+    bincount 一次统计出现次数再整体计算; 否则逐个字符串用 Counter 统计。
+
+    Args:
+        tokens: 字符串列表 (只含 ASCII 字符)
+
+    Returns:
+        list: 与 tokens 对应的熵值
+    """
+    np = load_numpy() if len(tokens) >= ENTROPY_NUMPY_MIN_TOKENS else None
+    if np is None:
+        entropies = []
+        for token in tokens:
+            length = len(token)
+            entropies.append(sum(count / length * math.log2(length / count)
+                                 for count in collections.Counter(token).values()))
+        return entropies
+
+    entropies = []
+    for batch_start in range(0, len(tokens), ENTROPY_NUMPY_BATCH):
+        batch = tokens[batch_start:batch_start + ENTROPY_NUMPY_BATCH]
+        data = np.frombuffer(''.join(batch).encode('ascii'), dtype=np.uint8)
+        lengths = np.fromiter(map(len, batch), dtype=np.int64, count=len(batch))
+        token_ids = np.repeat(np.arange(len(batch)), lengths)
+        counts = np.bincount(token_ids * 128 + data, minlength=len(batch) * 128).reshape(len(batch), 128)
+        probabilities = counts / lengths[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where(counts > 0, probabilities * np.log2(probabilities), 0.0)
+        entropies.extend((-terms.sum(axis=1)).tolist())
+    return entropies
+
+
+def looks_like_identifier(token):
+    """判断字符串是否像由单词拼成的标识符 (驼峰、下划线分隔), 这类字符串熵也可能较高
+
+    Returns:
+        bool: 平均片段长度不短于 ENTROPY_MIN_WORD_LENGTH 时返回 True
+    """
+    pieces = ENTROPY_WORD_RE.findall(token)
+    return bool(pieces) and sum(map(len, pieces)) / len(pieces) >= ENTROPY_MIN_WORD_LENGTH
+
+
+def literal_anchor(pattern):
+    """提取规则开头的字面量前缀, 作为预筛选用的锚点
+
+    Returns:
+        tuple: (小写锚点, 锚点相对匹配起点的偏移); 无法提取 (少于 2 个字符) 时返回 None
+    """
+    # 规则可以以一个引号字符类 (如 ["\']) 开头, 此时锚点在匹配中的偏移为 1
+    offset = 0
+    quote_class = re.match(r'\[[\\"\']+\]', pattern)
+    if quote_class:
+        pattern = pattern[quote_class.end():]
+        offset = 1
+
+    literal = re.match(r'[A-Za-z0-9_:/-]*', pattern).group()
+    # 后面跟着 ? * {m,n} 时, 最后一个字符不一定出现
+    if pattern[len(literal):len(literal) + 1] in ('?', '*', '{'):
+        literal = literal[:-1]
+    if len(literal) < 2:
+        return None
+    return literal.lower(), offset
+
+
+class SensitiveDataScanner:
+    """敏感信息扫描引擎
+
+    所有规则在首次使用时编译一次, 之后每个文件直接复用编译好的正则,
+    不再在每次调用时查找 re 模块的缓存。
+
+    说明: CPython 的 re 引擎对多分支组合正则 (含命名分组) 无法使用
+    字面量前缀/首字符集加速, 实测比逐条规则扫描慢 2-4 倍, 因此这里
+    保留每条规则一个编译后的正则, 结果顺序与原先逐条扫描完全一致。
+
+    预筛选: 每条规则都以固定的字面量开头 (api、sk_、AKIA、password ...)。
+    先把内容转成小写, 用 str.find 找出各锚点的位置, 只在这些位置上调用
+    regex.match; 不含任何锚点的文件完全不运行正则。由于匹配只可能从
+    锚点位置开始, 按位置顺序逐个尝试的结果与 finditer 完全相同。
+
+    设置 entropy_threshold 时追加一条高熵字符串规则 (排在最后), 报告熵超过阈值、
+    且没有被前面的规则报告过的候选字符串。
+    """
+
+    def __init__(self, patterns=None, entropy_threshold=None):
+        patterns = patterns or SENSITIVE_PATTERNS
+        # [(类别, 编译后的正则)], 顺序即报告顺序
+        self.rules = [(category, re.compile(pattern, re.IGNORECASE))
+                      for category, regex_list in patterns.items()
+                      for pattern in regex_list]
+        # 与 rules 一一对应的 (锚点, 偏移), None 表示该规则需要完整扫描
+        self.anchors = [literal_anchor(pattern)
+                        for regex_list in patterns.values()
+                        for pattern in regex_list]
+        # 规则集版本: 规则或假阳性关键字变化后, 旧的缓存结果自动失效
+        rule_source = [patterns, PLACEHOLDER_KEYWORDS]
+        self.entropy_threshold = entropy_threshold
+        self.entropy_index = None
+        if entropy_threshold:
+            self.entropy_index = len(self.rules)
+            self.rules.append((ENTROPY_CATEGORY, ENTROPY_CANDIDATE_RE))
+            self.anchors.append(None)
+            rule_source += [ENTROPY_CANDIDATE_RE.pattern, ENTROPY_IGNORE_PREFIXES, ENTROPY_HASH_CONTEXT_RE.pattern,
+                            ENTROPY_UUID_RE.pattern, ENTROPY_WORD_RE.pattern, ENTROPY_MIN_WORD_LENGTH,
+                            entropy_threshold]
+        rule_source = json.dumps(rule_source, ensure_ascii=False, sort_keys=True)
+        self.version = hashlib.sha1(rule_source.encode('utf-8')).hexdigest()
+
+    def scan_text(self, content):
+        """扫描一段文本
+
+        Args:
+            content: 文件内容
+
+        Returns:
+            list: [(类别, 起始位置, 匹配文本)], 已排除假阳性
+        """
+        return [(self.rules[index][0], start, matched_text)
+                for index, _, _, (start, matched_text) in self._iter_matches(content) if matched_text]
+
+    def scan_chunks(self, chunks, overlap=STREAM_SCAN_OVERLAP_CHARS):
+        """分块扫描大文件, 长度不超过 overlap 的匹配与整体扫描 (scan_text) 的结果相同
+
+        每次扫描的缓冲区 = 上一块末尾 overlap 个字符 + 新读入的块; 只接受起点
+        落在缓冲区前部的匹配, 起点在末尾重叠区的匹配留给下一个缓冲区处理。
+        每条规则从它在上一个缓冲区中最后一个匹配 (包括假阳性) 的结束位置继续搜索,
+        与 finditer 在整个文件上的搜索顺序一致。
+
+        Args:
+            chunks: 按顺序产出文本块的可迭代对象
+            overlap: 相邻缓冲区的重叠字符数
+
+        Returns:
+            list: [(类别, 起始位置, 匹配文本)], 起始位置为在整个文件中的位置
+        """
+        found = []
+        next_pos = [0] * len(self.rules)  # 每条规则上一次匹配的结束位置 (与 finditer 一样不重叠)
+        spans = []   # 已报告的匹配区间 (文件中的位置), 供高熵规则排除重叠的候选
+        offset = 0   # 缓冲区起点在文件中的位置
+        buffer = ''
+        for chunk in itertools.chain(chunks, [None]):
+            final = chunk is None
+            if not final:
+                buffer += chunk
+                if len(buffer) <= overlap:
+                    continue
+
+            owned_end = len(buffer) if final else len(buffer) - overlap
+            starts = [max(0, pos - offset) for pos in next_pos]
+            carried = [(start - offset, end - offset) for start, end in spans if end > offset]
+            spans = [(start + offset, end + offset) for start, end in carried]
+            for index, start, end, (report_start, matched_text) in self._iter_matches(
+                    buffer, starts, owned_end, carried):
+                next_pos[index] = offset + end
+                if matched_text:
+                    found.append((index, offset + report_start, matched_text))
+                    spans.append((offset + start, offset + end))
+
+            offset += owned_end
+            buffer = buffer[owned_end:]
+
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [(self.rules[index][0], position, matched_text)
+                for index, position, matched_text in found]
+
+    def _iter_matches(self, content, starts=None, owned_end=None, spans=None):
+        """按规则顺序产出 (规则下标, 匹配起点, 匹配终点, (报告位置, 报告文本))
+
+        假阳性等不报告的匹配也会产出 (报告文本为 None), 分块扫描需要据此推进
+        各规则的搜索位置。
+
+        Args:
+            starts: 每条规则开始搜索的位置, 默认从头开始
+            owned_end: 只产出起点在此之前的匹配, 默认不限制
+            spans: 之前已报告的 (起点, 终点), 高熵规则不再重复报告与之重叠的候选
+        """
+        folded = content
+        if not content.isascii():
+            for char, ascii_char in IGNORECASE_FOLD:
+                if char in folded:
+                    folded = folded.replace(char, ascii_char)
+        folded = folded.lower()
+        if len(folded) != len(content):
+            folded = None  # 位置无法一一对应, 退回完整扫描
+        if owned_end is None:
+            owned_end = len(content)
+
+        spans = list(spans or ())  # 前面规则报告过的区间, 高熵规则不再重复报告
+        for index, (_, regex) in enumerate(self.rules):
+            pos = starts[index] if starts else 0
+            if index == self.entropy_index:
+                for item in self._entropy_matches(content, spans, pos):
+                    if item[0] >= owned_end:
+                        break
+                    yield (index,) + item
+                continue
+
+            anchor = self.anchors[index]
+            if anchor is None or folded is None:
+                matches = regex.finditer(content, pos)
+            else:
+                matches = self._anchored_matches(regex, content, folded, *anchor, pos)
+
+            for match in matches:
+                start, end = match.span()
+                if start >= owned_end:
+                    break
+                matched_text = match.group()
+                if self.is_false_positive(content, start, end, matched_text):
+                    yield index, start, end, (start, None)
+                    continue
+                if self.entropy_index is not None:
+                    spans.append((start, end))
+                yield index, start, end, (start, matched_text)
+
+    def _entropy_matches(self, content, spans, pos=0):
+        """按顺序返回高熵规则的所有候选 [(匹配起点, 匹配终点, (字符串起点, 字符串))]
+
+        熵不超过阈值或被排除的候选, 字符串为 None。
+
+        Args:
+            spans: 其他规则已报告的 (起点, 终点), 与之重叠的候选跳过
+            pos: 开始搜索的位置
+        """
+        items = []
+        candidates = []  # [(items 中的下标, 字符串)], 需要计算熵
+        for match in ENTROPY_CANDIDATE_RE.finditer(content, pos):
+            start, end = match.span(1)
+            items.append((match.start(), match.end(), (start, None)))
+            token = match.group(1)
+            # 需要同时含字母和数字, 排除长单词、路径和纯数字
+            if token.startswith(ENTROPY_IGNORE_PREFIXES) or token.isalpha() or not any(c.isalpha() for c in token):
+                continue
+            if ENTROPY_UUID_RE.fullmatch(token) or looks_like_identifier(token):
+                continue
+            if (ENTROPY_HEX_RE.fullmatch(token)
+                    and ENTROPY_HASH_CONTEXT_RE.search(content, max(0, start - ENTROPY_HASH_CONTEXT_CHARS), start)):
+                continue
+            if any(start < span_end and span_start < end for span_start, span_end in spans):
+                continue
+            if self.is_false_positive(content, start, end, token):
+                continue
+            candidates.append((len(items) - 1, token))
+        if not candidates:
+            return items
+
+        threshold = self.entropy_threshold / ENTROPY_BASE64_BITS
+        tokens = [token.rstrip('=') for _, token in candidates]
+        for (item_index, token), stripped, entropy in zip(candidates, tokens, shannon_entropies(tokens)):
+            alphabet = ENTROPY_HEX_ALPHABET if ENTROPY_HEX_RE.fullmatch(stripped) else ENTROPY_BASE64_ALPHABET
+            if entropy / math.log2(min(len(stripped), alphabet)) > threshold:
+                match_start, match_end, (start, _) = items[item_index]
+                items[item_index] = (match_start, match_end, (start, token))
+        return items
+
+    @staticmethod
+    def _anchored_matches(regex, content, folded, anchor, offset, pos=0):
+        """只在锚点出现的位置尝试匹配, 结果与 regex.finditer(content, pos) 相同"""
+        end = pos  # 上一个匹配的结束位置, 与 finditer 一样不产生重叠的匹配
+        position = folded.find(anchor, pos + offset)
+        while position != -1:
+            start = position - offset
+            if start >= end:
+                match = regex.match(content, start)
+                if match is not None:
+                    yield match
+                    end = match.end()
+            position = folded.find(anchor, position + 1)
+
+    @staticmethod
+    def is_false_positive(content, start_pos, end_pos, matched_text):
+        """判断匹配是否为假阳性"""
+        # 1. 示例和占位符
+        lowered = matched_text.lower()
+        if any(keyword in lowered for keyword in PLACEHOLDER_KEYWORDS):
+            return True
+
+        # 2. Python 代码中的正则表达式定义
+        # 特征: 包含 [^ 说明是正则字符类, 且前后 5 个字符内有引号 (含 r 前缀)
+        if '[^' in matched_text:
+            context = content[max(0, start_pos - 5):end_pos + 5]
+            if "'" in context or '"' in context:
+                return True
+
+        return False
+
+
+_sensitive_data_scanners = {}  # 高熵阈值 (None 为不检测) -> 扫描引擎
+
+
+def get_sensitive_data_scanner(entropy_threshold=None):
+    """获取共享的扫描引擎 (首次使用时编译规则)
+
+    Args:
+        entropy_threshold: 高熵字符串检测阈值, None 表示不检测
+    """
+    scanner = _sensitive_data_scanners.get(entropy_threshold)
+    if scanner is None:
+        scanner = _sensitive_data_scanners[entropy_threshold] = SensitiveDataScanner(
+            entropy_threshold=entropy_threshold)
+    return scanner
+
+
+def entropy_threshold_option(options):
+    """从高级选项得到高熵检测阈值, 未开启时返回 None"""
+    if not options.get('entropy_scan', False):
+        return None
+    return float(options.get('entropy_threshold', ADVANCED_OPTION_DEFAULTS['entropy_threshold']))
+
+
+# Windows 下调用 git 时不弹出控制台窗口
+SUBPROCESS_FLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# Git 命令结果
+GitResult = collections.namedtuple('GitResult', 'args returncode stdout stderr elapsed')
+
+# git 进度输出的行结束符: \r 为同一行的刷新
+LINE_END_RE = re.compile(rb'\r\n|\r|\n')
+
+# git --progress 的进度行, 例如
+# "Writing objects:  45% (136/303), 25.12 MiB | 12.50 MiB/s"
+# "remote: Counting objects: 100% (303/303), done."
+GIT_PROGRESS_RE = re.compile(
+    r'^(?P<phase>(?:remote: )?[A-Z][A-Za-z ]+?):\s+(?P<percent>\d+)% \((?P<done>\d+)/(?P<total>\d+)\)'
+    r'(?:, (?P<size>[\d.]+ (?:bytes|[KMGT]iB))(?: \| (?P<rate>[\d.]+ (?:bytes|[KMGT]iB))/s)?)?'
+    r'(?P<finished>, done\.)?')
+
+GIT_SIZE_UNITS = {'bytes': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4}
+
+
+def parse_git_size(text):
+    """把 git 进度中的大小 (如 "25.12 MiB") 转换为字节数"""
+    if not text:
+        return 0
+    number, unit = text.split()
+    return int(float(number) * GIT_SIZE_UNITS[unit])
+
+
+class GitRunner:
+    """以参数列表直接调用 git (git -C <路径> ...), 不经过 shell
+
+    记录每条命令的耗时, 并按原有规则对 stderr 分类。
+    """
+
+    def __init__(self, code_path, log=None, trace=None):
+        self.code_path = code_path
+        self.log = log or (lambda level, message: None)
+        self.trace = trace  # StageTimer, 每条命令记录为一个 'git' 步骤
+        self.timings = []  # [(命令, 耗时秒)]
+
+    def argv(self, args):
+        return ['git', '-C', self.code_path, *args]
+
+    def display(self, args):
+        """用于日志显示的命令行"""
+        return subprocess.list2cmdline(self.argv(args))
+
+    def run(self, *args, text=True, quiet=False, input=None):
+        """执行 git 命令并等待结束
+
+        Args:
+            args: git 子命令及参数
+            text: 是否按 UTF-8 解码输出, False 时返回原始字节
+            quiet: 不在日志中显示命令 (用于内部查询)
+            input: 写入标准输入的字节串 (例如 --pathspec-from-file=- 的路径列表)
+
+        Returns:
+            GitResult
+        """
+        if not quiet:
+            self.log("COMMAND", f"$ {self.display(args)}")
+        start = time.perf_counter()
+        if input is None:
+            options = {'encoding': 'utf-8', 'errors': 'replace'} if text else {}
+            result = subprocess.run(self.argv(args),
+                                    capture_output=True,
+                                    text=text,
+                                    creationflags=SUBPROCESS_FLAGS,
+                                    **options)
+        else:
+            # 路径按原始字节传入, 输出再自行解码
+            result = subprocess.run(self.argv(args),
+                                    input=input,
+                                    capture_output=True,
+                                    creationflags=SUBPROCESS_FLAGS)
+            if text:
+                result.stdout = result.stdout.decode('utf-8', 'replace').replace('\r\n', '\n')
+                result.stderr = result.stderr.decode('utf-8', 'replace').replace('\r\n', '\n')
+        return self._record(args, start, result.returncode, result.stdout, result.stderr)
+
+    def stream(self, *args, on_line=None):
+        """执行 git 命令, 在输出过程中逐行读取 stderr (用于 --progress 的推送/拉取)
+
+        进度在同一行上的刷新以 \r 分隔, 阶段结束时换行。
+
+        Args:
+            args: git 子命令及参数
+            on_line: 回调 on_line(行, 是否以换行结束), 在当前线程中调用
+
+        Returns:
+            GitResult: stderr 中只保留以换行结束的行, 不含中间的进度刷新
+        """
+        self.log("COMMAND", f"$ {self.display(args)}")
+        start = time.perf_counter()
+        proc = subprocess.Popen(self.argv(args),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                creationflags=SUBPROCESS_FLAGS)
+        stdout_chunks = []
+        stdout_reader = threading.Thread(target=lambda: stdout_chunks.append(proc.stdout.read()), daemon=True)
+        stdout_reader.start()
+
+        kept = []
+        pending = b''
+        while True:
+            chunk = proc.stderr.read1(65536)
+            if not chunk:
+                break
+            pending += chunk
+            line_start = 0
+            for match in LINE_END_RE.finditer(pending):
+                line = pending[line_start:match.start()].decode('utf-8', 'replace').rstrip()
+                line_start = match.end()
+                final = match.group() != b'\r'
+                if final and line:
+                    kept.append(line)
+                if on_line is not None and line:
+                    on_line(line, final)
+            pending = pending[line_start:]
+        if pending.strip():
+            line = pending.decode('utf-8', 'replace').rstrip()
+            kept.append(line)
+            if on_line is not None:
+                on_line(line, True)
+        returncode = proc.wait()
+        stdout_reader.join()
+        stdout = b''.join(stdout_chunks).decode('utf-8', 'replace').replace('\r\n', '\n')
+        stderr = ''.join(line + '\n' for line in kept)
+        return self._record(args, start, returncode, stdout, stderr)
+
+    def _record(self, args, start, returncode, stdout, stderr):
+        """记录命令耗时并生成 GitResult"""
+        elapsed = time.perf_counter() - start
+        self.timings.append((f"git {args[0]}", elapsed))
+        if self.trace is not None:
+            self.trace.add_span(f"git {args[0]}", 'git', start, start + elapsed,
+                                argv=subprocess.list2cmdline(args), returncode=returncode)
+        self.log("DEBUG", f"git {args[0]} 用时 {elapsed * 1000:.0f} ms (退出码 {returncode})")
+        return GitResult(args, returncode, stdout, stderr, elapsed)
+
+    def popen(self, *args):
+        """启动 git 命令, 以文本流方式读取 stdout (用于大量输出)"""
+        self.log("COMMAND", f"$ {self.display(args)}")
+        return subprocess.Popen(self.argv(args),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True,
+                                encoding='utf-8',
+                                errors='replace',
+                                creationflags=SUBPROCESS_FLAGS)
+
+    @staticmethod
+    def classify(stderr, allow_short_read=False):
+        """按原有规则给 stderr 分类
+
+        Args:
+            stderr: 命令的错误输出
+            allow_short_read: 推送时 "short read" 类的 error 不视为失败
+
+        Returns:
+            str: 'nothing_to_commit'、'warning'、'error' 或 None (普通信息)
+        """
+        lowered = stderr.lower()
+        if "nothing to commit" in lowered:
+            return 'nothing_to_commit'
+        if "warning:" in lowered:
+            return 'warning'
+        if "fatal:" in stderr:
+            return 'error'
+        if "error:" in lowered and not (allow_short_read and "short read" in lowered):
+            return 'error'
+        return None
+
+    def summary(self):
+        """各命令耗时汇总"""
+        total = sum(elapsed for _, elapsed in self.timings)
+        parts = ', '.join(f"{name} {elapsed * 1000:.0f}ms" for name, elapsed in self.timings)
+        return f"Git 命令共 {len(self.timings)} 个, 用时 {total:.2f} 秒 ({parts})"
+
+
+class RemoteRefCache:
+    """远程分支是否存在的短期缓存, 键为 (远程地址, 分支名)"""
+
+    def __init__(self):
+        self._entries = {}  # (远程地址, 分支名) -> (是否存在, 查询时间)
+        self._lock = threading.Lock()
+
+    def get(self, remote, branch, ttl):
+        """
+        Returns:
+            bool: 分支是否存在; 没有缓存或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get((remote, branch))
+        if entry is None or time.monotonic() - entry[1] >= ttl:
+            return None
+        return entry[0]
+
+    def put(self, remote, branch, exists):
+        with self._lock:
+            self._entries[(remote, branch)] = (exists, time.monotonic())
+
+
+def has_git_acceleration_marker(code_path):
+    """不启动 git 进程, 直接读取 .git/config 判断是否记录过本工具设置的配置项
+
+    只做文本查找, 误判为存在时调用方会再用 git config 确认。
+
+    Returns:
+        bool: 是否可能有记录; .git 不是普通目录 (如工作树、子模块) 或无法读取时返回 None
+    """
+    try:
+        with open(os.path.join(code_path, '.git', 'config'), 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read().lower()
+    except OSError:
+        return None
+    return GIT_ACCELERATION_MARKER.rpartition('.')[2].lower() in content
+
+
+def classify_cleanup_name(file_name):
+    """判断文件是否需要清理
+
+    Returns:
+        str: 'reserved' (Windows 保留设备名)、'temp' (临时文件) 或 None
+    """
+    file_lower = file_name.lower()
+    if file_lower in WINDOWS_RESERVED_NAMES:
+        return 'reserved'
+    if file_lower.endswith(TEMP_FILE_SUFFIXES):
+        return 'temp'
+    return None
+
+
+def parse_status_entries(output):
+    """解析 git status --porcelain -z 的输出
+
+    Args:
+        output: 命令的原始输出 (字节串)
+
+    Returns:
+        list: [(状态码 XY, 路径)], 均为字节串; 重命名/复制只保留新路径
+    """
+    entries = []
+    fields = output.split(b'\0')
+    index = 0
+    while index < len(fields):
+        field = fields[index]
+        index += 1
+        if len(field) < 4:
+            continue
+        if field[0:1] in (b'R', b'C') or field[1:2] in (b'R', b'C'):
+            index += 1  # 重命名/复制后面跟着原路径
+        entries.append((field[:2], field[3:]))
+    return entries
+
+
+class WorktreeStatus:
+    """一次 git status 的结果, 供清理和暂存共用
+
+    提交流程中清理阶段读取一次, 暂存阶段直接使用其中有改动的路径,
+    整个流程只让 git 检查一次工作区。根目录 .gitignore 被修改后视为过期。
+    """
+
+    def __init__(self, code_path, entries):
+        self.code_path = code_path
+        self.entries = entries  # [(状态码 XY, 路径)], 字节串
+        self._gitignore_stat = self._stat_gitignore()
+
+    @classmethod
+    def read(cls, code_path, runner=None):
+        """执行 git status --porcelain -z
+
+        Args:
+            runner: 用于记录命令的 GitRunner, 为空时不记录
+
+        Returns:
+            WorktreeStatus: 不是 Git 仓库时返回 None
+        """
+        quiet = runner is None
+        runner = runner or GitRunner(code_path)
+        try:
+            result = runner.run('status', '--porcelain', '-z', '--untracked-files=all', text=False, quiet=quiet)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+        return cls(code_path, parse_status_entries(result.stdout))
+
+    def _stat_gitignore(self):
+        try:
+            st = os.stat(os.path.join(self.code_path, '.gitignore'))
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def is_current(self):
+        """读取之后 .gitignore 没有变化 (未跟踪文件的范围不变)"""
+        return self._gitignore_stat == self._stat_gitignore()
+
+    def untracked_files(self):
+        """未跟踪 (且未被忽略) 的文件
+
+        Returns:
+            list: [(相对路径, 绝对路径, 各级路径名列表)]
+        """
+        files = []
+        for code, path in self.entries:
+            # 嵌套仓库以 "目录/" 的形式列出, 不属于当前仓库
+            if code != b'??' or path.endswith(b'/'):
+                continue
+            parts = os.fsdecode(path).split('/')
+            rel_path = os.path.join(*parts)
+            files.append((rel_path, os.path.join(self.code_path, rel_path), parts))
+        return files
+
+    def unstaged_paths(self, existing_only=False):
+        """需要 git add 的路径: 工作区一列 (Y) 不为空格的条目, 包括 "??" 未跟踪文件
+
+        Args:
+            existing_only: 跳过读取之后已被删除的未跟踪文件 (否则 git add 会报 "pathspec did not match")
+        """
+        paths = []
+        for code, path in self.entries:
+            if code[1:2] == b' ':
+                continue
+            if existing_only and code == b'??' and not os.path.lexists(
+                    os.path.join(self.code_path, os.fsdecode(path))):
+                continue
+            paths.append(path)
+        return paths
+
+    def has_staged(self):
+        """暂存区一列 (X) 有改动的条目存在时返回 True (这些改动不需要 git add 也会被提交)"""
+        return any(code[:1] not in (b' ', b'?', b'!') for code, _ in self.entries)
+
+    def discard(self, file_paths):
+        """移除已删除的未跟踪文件 (绝对路径)"""
+        removed = set(file_paths)
+        if not removed:
+            return
+        self.entries = [(code, path) for code, path in self.entries
+                        if code != b'??'
+                        or os.path.join(self.code_path, *os.fsdecode(path).split('/')) not in removed]
+
+
+def is_scannable_file(filename):
+    """判断文件是否属于安全扫描范围 (文本文件)"""
+    ext = os.path.splitext(filename)[1].lower()
+    return ext in SCAN_TEXT_EXTENSIONS or filename in ('.env', 'Dockerfile')
+
+
+# diff hunk 头, 例如 "@@ -12,3 +14,5 @@"
+DIFF_HUNK_RE = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+
+def _parse_diff_path(raw_path):
+    """解析 diff 中 "+++ " 之后的路径, 删除的文件返回 None"""
+    raw_path = raw_path.rstrip('\t')
+    if raw_path == '/dev/null':
+        return None
+    if raw_path.startswith('"') and raw_path.endswith('"'):
+        # git 对特殊字符使用 C 风格转义 (\t, \", 八进制字节)
+        raw_path = (raw_path[1:-1].encode('utf-8')
+                    .decode('unicode_escape')
+                    .encode('latin-1')
+                    .decode('utf-8', errors='replace'))
+    if raw_path.startswith('b/'):
+        raw_path = raw_path[2:]
+    return raw_path
+
+
+def iter_added_lines(diff_lines):
+    """解析统一 diff 格式, 逐行产出新增的内容
+
+    Args:
+        diff_lines: diff 文本行的可迭代对象 (可以直接是子进程的输出流)
+
+    Yields:
+        tuple: (文件路径, 行号, 行内容)
+    """
+    path = None
+    line_no = 0
+    remaining = 0  # 当前 hunk 中尚未读取的新文件行数
+
+    for raw in diff_lines:
+        line = raw.rstrip('\n').rstrip('\r')
+
+        if remaining > 0:
+            if line.startswith('+'):
+                if path is not None:
+                    yield path, line_no, line[1:]
+                line_no += 1
+                remaining -= 1
+            elif line.startswith(' '):
+                line_no += 1
+                remaining -= 1
+            # '-' 开头的删除行和 "\ No newline" 不占用新文件行号
+            continue
+
+        if line.startswith('@@'):
+            match = DIFF_HUNK_RE.match(line)
+            if match:
+                line_no = int(match.group(1))
+                remaining = int(match.group(2)) if match.group(2) is not None else 1
+        elif line.startswith('+++ '):
+            path = _parse_diff_path(line[4:])
+        elif line.startswith('diff --git '):
+            path = None
+
+
+# git log --format 中标记每个提交开始的行: NUL + 短哈希
+HISTORY_COMMIT_MARKER = '\0'
+
+
+def iter_commit_added_lines(log_lines):
+    """解析 git log -p --format=%x00%h 的输出, 逐行产出各提交新增的内容
+
+    Args:
+        log_lines: 输出行的可迭代对象 (可以直接是子进程的输出流)
+
+    Yields:
+        tuple: (提交短哈希, 文件路径, 行号, 行内容)
+    """
+    current = [None]
+
+    def diff_lines():
+        for raw in log_lines:
+            if raw.startswith(HISTORY_COMMIT_MARKER):
+                current[0] = raw[1:].strip()
+                continue
+            yield raw
+
+    for path, line_no, text in iter_added_lines(diff_lines()):
+        yield current[0], path, line_no, text
+
+
+def scan_added_lines(added_lines, scanner=None):
+    """对新增行执行敏感信息扫描
+
+    连续的新增行合并成一个文本块扫描, 结果映射回文件和行号。
+
+    Args:
+        added_lines: iter_added_lines 产出的 (文件路径, 行号, 行内容)
+        scanner: 扫描引擎, 默认使用共享引擎
+
+    Returns:
+        list: 问题列表, 每项包含 category, file, line, match
+    """
+    scanner = scanner or get_sensitive_data_scanner()
+    issues = []
+
+    for path, file_lines in itertools.groupby(added_lines, key=lambda item: item[0]):
+        parts = path.split('/')
+        if not is_scannable_file(parts[-1]) or SCAN_IGNORE_DIRS.intersection(parts[:-1]):
+            continue
+        display_path = os.path.normpath(path)
+
+        # 按连续行号切分成块, 避免跨越未改动内容拼出不存在的匹配
+        block = []
+        for item in itertools.chain(file_lines, [None]):
+            if block and (item is None or item[1] != block[-1][1] + 1):
+                line_numbers = [line_no for _, line_no, _ in block]
+                offsets = []
+                offset = 0
+                for _, _, text in block:
+                    offsets.append(offset)
+                    offset += len(text) + 1
+                content = '\n'.join(text for _, _, text in block)
+
+                for category, start, matched_text in scanner.scan_text(content):
+                    index = bisect.bisect_right(offsets, start) - 1
+                    issues.append({
+                        'category': category,
+                        'file': display_path,
+                        'line': line_numbers[index],
+                        'match': matched_text[:100]
+                    })
+                block = []
+            if item is not None:
+                block.append(item)
+
+    return issues
+
+
+# 已接受问题的基线文件, 放在代码目录下, 可以随代码一起提交共享
+BASELINE_FILE_NAME = '.gitgui-baseline.json'
+
+
+def finding_fingerprint(category, file_path, matched_text):
+    """问题指纹: 类别 + 相对路径 + 规范化后的匹配文本的 SHA-1
+
+    不包含行号, 代码移动位置后指纹不变; 路径统一为 / 分隔,
+    全量扫描与仅扫描改动两种模式得到相同的指纹。
+    """
+    normalized = ' '.join(matched_text[:100].split())
+    key = f"{category}\0{file_path.replace(os.sep, '/')}\0{normalized}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class FindingBaseline:
+    """已接受问题的指纹集合
+
+    文件中只保存指纹、类别和路径, 不保存匹配内容本身。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.fingerprints = set()
+        self.entries = []  # [{'fingerprint', 'category', 'file'[, 'history']}]
+
+    @classmethod
+    def for_path(cls, code_path):
+        return cls(Path(code_path) / BASELINE_FILE_NAME)
+
+    def load(self):
+        """读取基线文件, 文件不存在时为空
+
+        Returns:
+            bool: 是否存在基线文件
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.entries = data.get('findings', [])
+        self.fingerprints = {entry['fingerprint'] for entry in self.entries}
+        return True
+
+    def add(self, issue, history=False):
+        """记为已接受的问题
+
+        Args:
+            history: 问题只出现在尚未推送的历史提交中 (记录 'history' 标记, 不带 --history 重新生成时保留)
+        """
+        fingerprint = finding_fingerprint(issue['category'], issue['file'], issue['match'])
+        if fingerprint not in self.fingerprints:
+            self.fingerprints.add(fingerprint)
+            entry = {'fingerprint': fingerprint,
+                     'category': issue['category'],
+                     'file': issue['file'].replace(os.sep, '/')}
+            if history:
+                entry['history'] = True
+            self.entries.append(entry)
+
+    def history_entries(self):
+        """来自历史提交扫描的条目"""
+        return [entry for entry in self.entries if entry.get('history')]
+
+    def filter(self, issues):
+        """去掉基线中已接受的问题
+
+        Returns:
+            list: 剩余的问题
+        """
+        fingerprints = self.fingerprints
+        return [issue for issue in issues
+                if finding_fingerprint(issue['category'], issue['file'], issue['match']) not in fingerprints]
+
+    def save(self):
+        """写回磁盘 (按路径排序, 便于在版本库中比较差异)"""
+        self.entries.sort(key=lambda entry: (entry['file'], entry['category'], entry['fingerprint']))
+        data = {
+            'version': self.VERSION,
+            'generated': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'findings': self.entries,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, self.path)
+
+
+def read_scan_content(file_path):
+    """读取待扫描文件
+
+    Returns:
+        tuple: (git blob SHA-1, 文本内容)
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+    # 与 read_text() 一致: 忽略无法解码的字节, 统一换行符
+    content = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    return digest, content
+
+
+def scan_content_findings(scanner, content):
+    """扫描文件内容, 返回 [[类别, 匹配文本(前100字符)]]"""
+    return [[category, matched_text[:100]]
+            for category, _, matched_text in scanner.scan_text(content)]
+
+
+class _HashingReader(io.RawIOBase):
+    """读取时同步计算 git blob SHA-1 的文件流"""
+
+    def __init__(self, raw, size):
+        self.raw = raw
+        self.hash = hashlib.sha1(b'blob %d\0' % size)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.hash.update(memoryview(buffer)[:count])
+        return count
+
+
+def scan_large_file(scanner, file_path):
+    """分块读取并扫描大文件, 内存占用只取决于块大小
+
+    Returns:
+        tuple: (git blob SHA-1, [[类别, 匹配文本(前100字符)]])
+    """
+    with open(file_path, 'rb', buffering=0) as raw:
+        reader = _HashingReader(raw, os.fstat(raw.fileno()).st_size)
+        # 与 read_text() 一致: 忽略无法解码的字节, 统一换行符 (跨块的多字节字符和 \r\n 由 TextIOWrapper 处理)
+        text = io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8', errors='ignore')
+        chunks = iter(lambda: text.read(STREAM_SCAN_CHUNK_CHARS), '')
+        findings = [[category, matched_text[:100]]
+                    for category, _, matched_text in scanner.scan_chunks(chunks)]
+        return reader.hash.hexdigest(), findings
+
+
+def scan_file(scanner, file_path, size, known_digests=()):
+    """扫描单个文件, 小文件整体读取, 大文件分块读取
+
+    Args:
+        scanner: 扫描引擎
+        file_path: 文件路径
+        size: 文件大小
+        known_digests: 已有扫描结果的内容摘要, 命中时不再扫描
+
+    Returns:
+        tuple: (内容摘要, 发现列表); 内容摘要在 known_digests 中时发现列表为 None
+    """
+    if size >= STREAM_SCAN_THRESHOLD:
+        return scan_large_file(scanner, file_path)
+
+    digest, content = read_scan_content(file_path)
+    if digest in known_digests:
+        return digest, None
+    return digest, scan_content_findings(scanner, content)
+
+
+def split_balanced_chunks(sizes, chunk_count):
+    """按文件大小把任务均衡地分成若干批 (大文件优先的贪心分配)
+
+    Args:
+        sizes: 每个任务的大小
+        chunk_count: 批次数
+
+    Returns:
+        list: 每批包含的任务下标列表
+    """
+    chunk_count = max(1, min(chunk_count, len(sizes)))
+    chunks = [[] for _ in range(chunk_count)]
+    heap = [(0, i) for i in range(chunk_count)]
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True):
+        total, chunk_index = heapq.heappop(heap)
+        chunks[chunk_index].append(index)
+        heapq.heappush(heap, (total + sizes[index], chunk_index))
+    return [chunk for chunk in chunks if chunk]
+
+
+# 扫描子进程中已有缓存结果的内容摘要和高熵检测阈值 (由进程池初始化函数设置)
+_worker_known_digests = frozenset()
+_worker_entropy_threshold = None
+
+
+def _init_scan_worker(known_digests, entropy_threshold=None):
+    """进程池初始化: 记录缓存中已有的内容摘要 (这些内容无需重复扫描) 和扫描引擎配置"""
+    global _worker_known_digests, _worker_entropy_threshold
+    _worker_known_digests = known_digests
+    _worker_entropy_threshold = entropy_threshold
+
+
+def _scan_files_worker(files):
+    """进程池任务: 扫描一批文件
+
+    Args:
+        files: [(文件路径, 文件大小)]
+
+    Returns:
+        list: 每个文件对应 (内容摘要, 发现列表, 错误信息);
+              内容已在缓存中时发现列表为 None
+    """
+    scanner = get_sensitive_data_scanner(_worker_entropy_threshold)
+    results = []
+    for file_path, size in files:
+        try:
+            digest, findings = scan_file(scanner, file_path, size, _worker_known_digests)
+        except Exception as e:
+            results.append((None, None, str(e)))
+            continue
+        results.append((digest, findings, None))
+    return results
+
+
+# Windows 上 os.scandir 的 DirEntry.stat() 不提供 inode (st_ino 总为 0), os.stat 则提供;
+# 为了让遍历目录和 git ls-files 两种清单得到相同的 stat 信息, Windows 上 inode 一律记为 0
+STAT_USES_INODE = os.name != 'nt'
+
+
+def stat_inode(st):
+    """缓存比较用的 inode (Windows 上为 0, 见 STAT_USES_INODE)"""
+    return st.st_ino if STAT_USES_INODE else 0
+
+
+class FileInventory:
+    """工作区文件清单
+
+    每次提交只用 os.scandir 遍历一次目录树, 清理、扫描等步骤共用这份清单。
+    目录只保存一次相对路径, 文件记录为紧凑的元组
+    (目录下标, 文件名, 大小, mtime_ns, inode), 无法 stat 的文件三项为 None。
+    """
+
+    # 所有步骤都会跳过的目录 (各步骤自己的跳过集合的交集)
+    WALK_SKIP_DIRS = SCAN_IGNORE_DIRS & CLEANUP_SKIP_DIRS
+
+    def __init__(self, root):
+        self.root = root
+        self.dirs = []   # [(相对路径, 各级目录名元组)], 根目录的相对路径为 ''
+        self.files = []  # [(目录下标, 文件名, size, mtime_ns, inode)]
+
+    @classmethod
+    def scan(cls, root):
+        """遍历目录树建立清单, 遍历顺序与 os.walk 自上而下的顺序一致"""
+        inventory = cls(root)
+        stack = [('', ())]
+        while stack:
+            rel_dir, parts = stack.pop()
+            dir_index = len(inventory.dirs)
+            inventory.dirs.append((rel_dir, parts))
+            subdirs = []
+            try:
+                with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            # 与 os.walk 一致: 不进入指向目录的符号链接
+                            if entry.name not in cls.WALK_SKIP_DIRS and not entry.is_symlink():
+                                subdirs.append(entry.name)
+                            continue
+                        try:
+                            st = entry.stat()
+                            inventory.files.append((dir_index, entry.name, st.st_size,
+                                                    st.st_mtime_ns, stat_inode(st)))
+                        except OSError:
+                            inventory.files.append((dir_index, entry.name, None, None, None))
+            except OSError:
+                continue
+            for name in reversed(subdirs):
+                stack.append((os.path.join(rel_dir, name) if rel_dir else name, parts + (name,)))
+        return inventory
+
+    @classmethod
+    def from_git(cls, root):
+        """用 git ls-files 建立清单 (已跟踪 + 未被忽略的未跟踪文件)
+
+        被 .gitignore 忽略的目录不会被读取。
+
+        Returns:
+            FileInventory: 清单; 路径不是 Git 仓库或 git 不可用时返回 None
+        """
+        try:
+            result = GitRunner(root).run('ls-files', '-z', '--cached', '--others',
+                                         '--exclude-standard', text=False, quiet=True)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+
+        inventory = cls(root)
+        dir_indexes = {}
+        seen = set()
+        for raw_path in result.stdout.split(b'\0'):
+            # 嵌套仓库以 "目录/" 的形式列出, 不属于当前仓库的文件
+            if not raw_path or raw_path.endswith(b'/'):
+                continue
+            rel_path = os.fsdecode(raw_path)
+            # 有合并冲突的文件会在 --cached 中出现多次
+            if rel_path in seen:
+                continue
+            seen.add(rel_path)
+
+            rel_dir, _, name = rel_path.rpartition('/')
+            try:
+                st = os.stat(os.path.join(root, rel_path))
+            except OSError:
+                # 已跟踪但在工作区中被删除的文件
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+
+            dir_index = dir_indexes.get(rel_dir)
+            if dir_index is None:
+                dir_index = dir_indexes[rel_dir] = len(inventory.dirs)
+                parts = tuple(rel_dir.split('/')) if rel_dir else ()
+                inventory.dirs.append((os.path.join(*parts) if parts else '', parts))
+            inventory.files.append((dir_index, name, st.st_size, st.st_mtime_ns, stat_inode(st)))
+        return inventory
+
+    def iter_files(self, skip_dirs=()):
+        """遍历清单中的文件
+
+        Args:
+            skip_dirs: 额外跳过的目录名 (任意一级目录名命中即跳过)
+
+        Yields:
+            tuple: (相对路径, 绝对路径, 文件名, size, mtime_ns, inode)
+        """
+        skipped = [bool(skip_dirs) and not set(parts).isdisjoint(skip_dirs)
+                   for _, parts in self.dirs]
+        root = self.root
+        for dir_index, name, size, mtime_ns, inode in self.files:
+            if skipped[dir_index]:
+                continue
+            rel_dir = self.dirs[dir_index][0]
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            yield rel_path, os.path.join(root, rel_path), name, size, mtime_ns, inode
+
+    def discard(self, file_paths):
+        """从清单中移除已删除的文件 (绝对路径)"""
+        removed = set(file_paths)
+        if not removed:
+            return
+        self.files = [entry for entry in self.files
+                      if os.path.join(self.root, self.dirs[entry[0]][0], entry[1]) not in removed]
+
+    def __len__(self):
+        return len(self.files)
+
+
+class ScanCache:
+    """安全扫描结果缓存 (持久化到磁盘)
+
+    文件条目以 (大小, mtime_ns, inode) 作为快速判断依据, 不一致时再按
+    内容的 git blob SHA-1 查找, 内容相同的文件 (如拷贝进来的第三方代码)
+    只扫描一次。缓存记录规则集版本, 规则变化后整体失效。
+    """
+
+    CACHE_FILE_NAME = 'gitgui-scan-cache.json'
+    # 条目数上限只用于淘汰较早批次的条目; 最近 RECENT_GENERATIONS 次完整扫描用到的条目
+    # 总是保留, 因此超过上限的大仓库也不会在每次保存时丢掉本次扫描的结果
+    MAX_FILE_ENTRIES = 50000
+    MAX_CONTENT_ENTRIES = 50000
+    RECENT_GENERATIONS = 3
+    # mtime 距扫描时间太近的文件不信任 stat 结果 (同一时间粒度内可能再次被修改)
+    RACY_WINDOW_NS = 2 * 10**9
+
+    def __init__(self, cache_path, rules_version):
+        self.cache_path = Path(cache_path)
+        self.rules_version = rules_version
+        self.files = {}     # 相对路径 -> [size, mtime_ns, inode, 内容摘要, 最后使用批次]
+        self.contents = {}  # 内容摘要 -> [发现列表, 最后使用批次]
+        self.generation = 0
+        self.stat_hits = 0
+        self.content_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_path(cls, code_path, fallback_dir, rules_version):
+        """选择缓存文件位置: 优先放在仓库的 .git 目录下, 否则放在应用的日志目录"""
+        git_dir = Path(code_path) / '.git'
+        if git_dir.is_dir():
+            cache_path = git_dir / cls.CACHE_FILE_NAME
+        else:
+            key = hashlib.sha1(os.path.abspath(code_path).encode('utf-8')).hexdigest()[:16]
+            cache_path = Path(fallback_dir) / 'scan-cache' / f'{key}.json'
+        cache = cls(cache_path, rules_version)
+        cache.load()
+        return cache
+
+    def load(self):
+        """从磁盘加载缓存, 文件损坏或规则集版本不一致时从空缓存开始"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('rules_version') != self.rules_version:
+            return
+
+        self.files = data.get('files', {})
+        self.contents = data.get('contents', {})
+        self.generation = data.get('generation', 0)
+
+    def begin(self, full=True):
+        """开始一次新的扫描
+
+        Args:
+            full: 是否检查整个目录; 只检查部分文件 (如后台预扫描改动的文件) 时不开始
+                  新的批次, 以免频繁的小批次把完整扫描的条目挤出 RECENT_GENERATIONS
+        """
+        if full:
+            self.generation += 1
+        self.stat_hits = self.content_hits = self.misses = 0
+
+    def lookup_stat(self, rel_path, stat_key):
+        """按文件 stat 信息查找, 命中返回发现列表, 否则返回 None"""
+        entry = self.files.get(rel_path)
+        if entry is None or entry[0:3] != list(stat_key):
+            return None
+        content_entry = self.contents.get(entry[3])
+        if content_entry is None:
+            return None
+        entry[4] = content_entry[1] = self.generation
+        self.stat_hits += 1
+        return content_entry[0]
+
+    def lookup_content(self, digest):
+        """按内容摘要查找, 命中返回发现列表, 否则返回 None"""
+        content_entry = self.contents.get(digest)
+        if content_entry is None:
+            return None
+        content_entry[1] = self.generation
+        self.content_hits += 1
+        return content_entry[0]
+
+    def store(self, rel_path, stat_key, digest, findings):
+        """记录文件的扫描结果
+
+        Args:
+            rel_path: 相对路径
+            stat_key: (size, mtime_ns, inode)
+            digest: 内容摘要
+            findings: [[类别, 匹配文本]]
+        """
+        size, mtime_ns, inode = stat_key
+        if time.time_ns() - mtime_ns < self.RACY_WINDOW_NS:
+            # 刚修改过的文件只记录内容摘要, 下次按内容重新确认
+            size = mtime_ns = inode = None
+        self.files[rel_path] = [size, mtime_ns, inode, digest, self.generation]
+        if digest not in self.contents:
+            self.contents[digest] = [findings, self.generation]
+
+    def evict(self):
+        """淘汰最久未使用的条目, 防止缓存无限增长"""
+        self.files = self._evict_entries(self.files, 4, self.MAX_FILE_ENTRIES)
+
+        referenced = {entry[3] for entry in self.files.values()}
+        contents = {digest: entry for digest, entry in self.contents.items()
+                    if digest in referenced or entry[1] == self.generation}
+        self.contents = self._evict_entries(contents, 1, self.MAX_CONTENT_ENTRIES)
+
+    def _evict_entries(self, entries, generation_index, limit):
+        """按最后使用批次保留最新的条目: 至少保留 limit 个, 且最近几个批次用到的全部保留"""
+        if len(entries) <= limit:
+            return entries
+        recent = self.generation - self.RECENT_GENERATIONS
+        keep = max(limit, sum(1 for entry in entries.values() if entry[generation_index] > recent))
+        if keep >= len(entries):
+            return entries
+        ordered = sorted(entries.items(), key=lambda item: item[1][generation_index])
+        return dict(ordered[-keep:])
+
+    def save(self):
+        """写回磁盘 (先写临时文件再替换, 避免中途失败损坏缓存)"""
+        self.evict()
+        data = {
+            'rules_version': self.rules_version,
+            'generation': self.generation,
+            'files': self.files,
+            'contents': self.contents,
+        }
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.cache_path)
+
+    def summary(self):
+        """命中/未命中统计"""
+        return (f"命中 {self.stat_hits + self.content_hits} "
+                f"(stat {self.stat_hits}, 内容 {self.content_hits}), 未命中 {self.misses}")
+
+
+# 轮询方式监视文件时两次检查的间隔 (秒)
+WATCH_POLL_INTERVAL = 5.0
+
+# 文件停止变化多久之后开始后台预扫描 (秒); 大于 ScanCache.RACY_WINDOW_NS,
+# 这样预扫描的结果可以按 stat 信息命中
+WATCH_IDLE_SECONDS = 2.5
+
+
+class FileWatcher:
+    """监视代码目录, 维护自上次取出以来被修改过的文件集合
+
+    Linux 上通过 ctypes 使用 inotify; 其他平台或 inotify 不可用
+    (如监视数量达到上限) 时, 定期遍历目录比较 stat 信息。
+    """
+
+    # inotify 常量 (见 <sys/inotify.h>)
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+                  IN_MOVED_TO | IN_CREATE | IN_DELETE)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, root, skip_dirs=SCAN_IGNORE_DIRS, poll_interval=WATCH_POLL_INTERVAL, backend=None):
+        """
+        Args:
+            root: 监视的目录
+            skip_dirs: 不监视的目录名
+            poll_interval: 轮询间隔 (秒)
+            backend: 'inotify' 或 'polling', 默认自动选择
+        """
+        self.root = root
+        self.skip_dirs = skip_dirs
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.needs_full_pass = False  # 事件丢失 (队列溢出) 时需要整体重新检查
+        self.ready = threading.Event()  # 后端已选定并开始监视
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self._watches = {}  # inotify 监视描述符 -> 目录绝对路径
+
+    def start(self):
+        """在后台线程中开始监视 (注册监视需要遍历目录树, 不阻塞调用者)"""
+        self._thread = threading.Thread(target=self._run, name='FileWatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        if self.backend in (None, 'inotify') and sys.platform.startswith('linux'):
+            try:
+                self._start_inotify()
+                self.backend = 'inotify'
+            except OSError:
+                self._close_inotify()
+                self.backend = 'polling'
+        else:
+            self.backend = 'polling'
+        self.ready.set()
+
+        if self.backend == 'inotify':
+            self._run_inotify()
+        else:
+            self._run_polling()
+
+    def stop(self):
+        self._stop.set()
+        self._changed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._close_inotify()
+
+    def wait(self, timeout=None):
+        """等待文件变化, 有变化时返回 True"""
+        return self._changed.wait(timeout)
+
+    def drain(self):
+        """取出并清空被修改的文件集合 (绝对路径)"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._changed.clear()
+        return dirty
+
+    def pending(self):
+        with self._lock:
+            return len(self._dirty)
+
+    def request_full_pass(self):
+        """要求使用者整体重新检查 (启动时或事件丢失后)"""
+        self.needs_full_pass = True
+        self._changed.set()
+
+    def _mark(self, paths):
+        with self._lock:
+            self._dirty.update(paths)
+        self._changed.set()
+
+    def _skipped(self, name):
+        return name in self.skip_dirs
+
+    # ---- inotify ----
+
+    def _start_inotify(self):
+        import ctypes
+        # CDLL(None) 直接使用进程中已加载的 libc, 不需要 find_library 启动 ldconfig
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._get_errno = ctypes.get_errno
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1 失败")
+        self._add_tree(self.root)
+
+    def _close_inotify(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            # ENOSPC: 达到 fs.inotify.max_user_watches 上限
+            raise OSError(self._get_errno(), f"无法监视目录 {directory}")
+        self._watches[wd] = directory
+
+    def _add_tree(self, top, mark_files=False):
+        """监视 top 及其所有子目录; mark_files 为 True 时把其中的文件标记为已修改"""
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            self._add_watch(directory)
+            files = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if not self._skipped(entry.name):
+                                stack.append(entry.path)
+                        elif mark_files:
+                            files.append(entry.path)
+            except OSError:
+                continue
+            if files:
+                self._mark(files)
+
+    def _run_inotify(self):
+        buffer_size = 64 * 1024
+        header_size = self.EVENT_HEADER.size
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 0.5)
+                if not readable:
+                    continue
+                data = os.read(self._fd, buffer_size)
+            except (OSError, ValueError):
+                if self._stop.is_set():
+                    return
+                continue
+
+            changed = []
+            offset = 0
+            while offset + header_size <= len(data):
+                wd, mask, _, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+                raw_name = data[offset + header_size:offset + header_size + name_length].rstrip(b'\0')
+                offset += header_size + name_length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.request_full_pass()
+                    continue
+                if mask & self.IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None or not raw_name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(raw_name))
+
+                if mask & self.IN_ISDIR:
+                    # 新建或移入的目录: 加入监视, 其中已有的文件视为已修改
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not self._skipped(os.path.basename(path)):
+                        try:
+                            self._add_tree(path, mark_files=True)
+                        except OSError:
+                            self.request_full_pass()
+                    continue
+                changed.append(path)
+
+            if changed:
+                self._mark(changed)
+
+    # ---- 轮询 ----
+
+    def _snapshot(self):
+        inventory = FileInventory.scan(self.root)
+        return {file_path: (size, mtime_ns, inode)
+                for _, file_path, _, size, mtime_ns, inode in inventory.iter_files(self.skip_dirs)}
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = [path for path, key in current.items() if previous.get(path) != key]
+            changed.extend(path for path in previous if path not in current)
+            previous = current
+            if changed:
+                self._mark(changed)
+
+
+class BackgroundScanner:
+    """后台预扫描: 文件停止变化一段时间后扫描被修改的文件, 结果写入扫描缓存
+
+    提交时 scan_for_sensitive_data 对这些文件直接命中缓存, 只需要处理
+    尚未来得及预扫描的少数文件。提交期间暂停, 避免与提交同时写缓存。
+    """
+
+    def __init__(self, root, options, log_dir, log, idle_seconds=WATCH_IDLE_SECONDS, backend=None):
+        self.root = root
+        self.options = options
+        self.log_dir = log_dir
+        self.log = log
+        self.idle_seconds = idle_seconds
+        self.watcher = FileWatcher(root, backend=backend)
+        self.scanned_total = 0
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._idle = threading.Event()  # 当前没有正在进行的预扫描
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.watcher.start()
+        # 启动后先整体检查一遍, 让第一次提交也能命中缓存
+        self.watcher.request_full_pass()
+        self._thread = threading.Thread(target=self._run, name='BackgroundScanner', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._resumed.set()
+        self.watcher.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def pause(self):
+        """暂停预扫描并等待正在进行的一批结束"""
+        self._resumed.clear()
+        self._idle.wait()
+
+    def resume(self):
+        self._resumed.set()
+
+    def pending(self):
+        """尚未预扫描的已修改文件数"""
+        return self.watcher.pending()
+
+    def _run(self):
+        self.watcher.ready.wait()
+        self.log("INFO", f"后台预扫描已启动 ({self.watcher.backend}): {self.root}")
+        while not self._stop.is_set():
+            if not self.watcher.wait(1.0):
+                continue
+            # 等待文件停止变化
+            while not self._stop.is_set():
+                pending = self.watcher.pending()
+                time.sleep(self.idle_seconds)
+                if self.watcher.pending() == pending:
+                    break
+            self._resumed.wait()
+            if self._stop.is_set():
+                return
+
+            self._idle.clear()
+            try:
+                if not self._resumed.is_set():
+                    continue
+                full_pass = self.watcher.needs_full_pass
+                self.watcher.needs_full_pass = False
+                paths = self.watcher.drain()
+                self.prescan(None if full_pass else paths)
+            except Exception as e:
+                self.log("DEBUG", f"后台预扫描失败: {e}")
+            finally:
+                self._idle.set()
+
+    def prescan(self, paths=None):
+        """扫描指定的文件 (绝对路径), paths 为 None 时检查整个目录
+
+        Returns:
+            int: 实际读取并扫描的文件数
+        """
+        start = time.perf_counter()
+        scanner = get_sensitive_data_scanner(entropy_threshold_option(self.options))
+        cache = ScanCache.for_path(self.root, self.log_dir, scanner.version)
+        cache.begin(full=paths is None)
+        max_size = self.options.get('max_scan_file_size', 0)
+
+        if paths is None:
+            # 与提交时的 build_file_inventory 使用相同的清单来源, 缓存中的 stat 信息才能对上
+            inventory = None
+            if self.options.get('respect_gitignore', True):
+                inventory = FileInventory.from_git(self.root)
+            if inventory is None:
+                inventory = FileInventory.scan(self.root)
+            entries = [(rel_path, file_path, size, mtime_ns, inode)
+                       for rel_path, file_path, name, size, mtime_ns, inode
+                       in inventory.iter_files(SCAN_IGNORE_DIRS)
+                       if is_scannable_file(name) and size is not None]
+        else:
+            entries = []
+            for file_path in sorted(paths):
+                rel_path = os.path.relpath(file_path, self.root)
+                parts = rel_path.split(os.sep)
+                if not is_scannable_file(parts[-1]) or not SCAN_IGNORE_DIRS.isdisjoint(parts[:-1]):
+                    continue
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue  # 已被删除
+                if stat.S_ISREG(st.st_mode):
+                    entries.append((rel_path, file_path, st.st_size, st.st_mtime_ns, stat_inode(st)))
+
+        scanned = 0
+        for rel_path, file_path, size, mtime_ns, inode in entries:
+            if not self._resumed.is_set() or self._stop.is_set():
+                break  # 有提交开始了, 剩下的留给提交时处理
+            if max_size and size > max_size:
+                continue
+            stat_key = (size, mtime_ns, inode)
+            if cache.lookup_stat(rel_path, stat_key) is not None:
+                continue
+            try:
+                digest, findings = scan_file(scanner, file_path, size, cache.contents)
+            except Exception:
+                continue
+            if findings is None:
+                findings = cache.lookup_content(digest)
+            else:
+                cache.misses += 1
+            cache.store(rel_path, stat_key, digest, findings)
+            scanned += 1
+
+        if scanned:
+            cache.save()
+        self.scanned_total += scanned
+        self.log("DEBUG", f"后台预扫描: 检查 {len(entries)} 个文件, 扫描 {scanned} 个 "
+                          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        return scanned
+
+
+# 日志界面刷新间隔 (毫秒): 工作线程产生的日志在 Tk 主线程中按批插入
+LOG_DRAIN_INTERVAL_MS = 100
+# 日志区域超过 log_view_lines 行时一次删到该比例, 避免每插入一批都删除一次
+LOG_VIEW_TRIM_RATIO = 0.8
+
+# 界面事件处理间隔 (毫秒): 工作线程发来的状态/进度/对话框事件在 Tk 主线程中按批处理
+UI_PUMP_INTERVAL_MS = 50
+
+
+class ProgressTracker:
+    """阶段进度统计 (文件数、字节数、速度), 并限制上报频率
+
+    report 回调在调用 advance 的线程中执行, 收到的是进度快照 dict。
+    """
+
+    REPORT_INTERVAL = 0.1  # 秒
+
+    def __init__(self, stage, report=None):
+        self.stage = stage
+        self.report = report
+        self.files_total = 0
+        self.bytes_total = 0
+        self.files_done = 0
+        self.bytes_done = 0
+        self.started = time.monotonic()
+        self._last_report = 0.0
+
+    def start(self, files_total, bytes_total=0):
+        """确定本阶段的工作量"""
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.started = time.monotonic()
+        self._emit(force=True)
+
+    def advance(self, files=1, nbytes=0):
+        """记录完成的文件数和读取的字节数"""
+        self.files_done += files
+        self.bytes_done += nbytes
+        self._emit()
+
+    def finish(self):
+        """阶段结束, 上报最终结果"""
+        self._emit(force=True)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def snapshot(self):
+        elapsed = max(self.elapsed(), 1e-6)
+        return {
+            'stage': self.stage,
+            'files_done': self.files_done,
+            'files_total': self.files_total,
+            'bytes_done': self.bytes_done,
+            'bytes_total': self.bytes_total,
+            'files_per_sec': self.files_done / elapsed,
+            'elapsed': elapsed,
+        }
+
+    def summary(self):
+        """一行文字总结"""
+        snap = self.snapshot()
+        return (f"{self.stage}: {snap['files_done']} 个文件, "
+                f"读取 {snap['bytes_done'] / 1024 / 1024:.1f} MB, "
+                f"用时 {snap['elapsed']:.2f} 秒, {snap['files_per_sec']:.0f} 文件/秒")
+
+    def _emit(self, force=False):
+        if self.report is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= self.REPORT_INTERVAL:
+            self._last_report = now
+            self.report(self.snapshot())
+
+
+class TransferProgress(ProgressTracker):
+    """解析 git push/fetch --progress 的输出并上报进度
+
+    files_done/files_total 为当前阶段的对象数, bytes_done 为已传输的字节数。
+    每个阶段结束时写一行日志, 传输阶段中每隔 LOG_INTERVAL 秒再写一行, 便于区分网络慢和进程卡住。
+    """
+
+    LOG_INTERVAL = 5.0  # 秒
+
+    def __init__(self, stage, report=None, log=None):
+        super().__init__(stage, report)
+        self.log = log or (lambda level, message: None)
+        self.phase = None
+        self.percent = 0
+        self.rate = 0  # git 报告的当前速度 (字节/秒)
+        self.transfer = None  # 有字节数的阶段: (阶段, 对象数, 字节数, 用时)
+        self._phase_started = self.started
+        self._last_log = 0.0
+
+    def feed(self, line, final):
+        """处理 git stderr 中的一行, 作为 GitRunner.stream 的回调"""
+        match = GIT_PROGRESS_RE.match(line)
+        if match is None:
+            return
+        now = time.monotonic()
+        if match['phase'] != self.phase:
+            self.phase = match['phase']
+            self._phase_started = now
+            self.bytes_done = 0
+            self.rate = 0
+        self.percent = int(match['percent'])
+        self.files_done = int(match['done'])
+        self.files_total = int(match['total'])
+        if match['size']:
+            self.bytes_done = parse_git_size(match['size'])
+            self.rate = parse_git_size(match['rate'])
+
+        if match['finished']:
+            if self.bytes_done:
+                self.transfer = (self.phase, self.files_done, self.bytes_done, now - self._phase_started)
+            self.log("INFO", f"{self.stage}: {line}")
+        elif match['size'] and now - self._last_log >= self.LOG_INTERVAL:
+            self._last_log = now
+            self.log("DEBUG", f"{self.stage}: {line}")
+        self._emit(force=bool(match['finished']))
+
+    def snapshot(self):
+        snap = super().snapshot()
+        text = f"{self.stage}"
+        if self.phase:
+            text += f" · {self.phase}: {self.percent}% ({self.files_done}/{self.files_total})"
+        if self.bytes_done:
+            text += f" | {self.format_size(self.bytes_done)} | {self.format_size(self.rate)}/s"
+        snap['text'] = text
+        return snap
+
+    @staticmethod
+    def format_size(nbytes):
+        if nbytes >= 1024 * 1024:
+            return f"{nbytes / 1024 / 1024:.1f} MB"
+        return f"{nbytes / 1024:.1f} KB"
+
+    def totals(self):
+        """传输总量, 用于阶段耗时汇总"""
+        if self.transfer is None:
+            return "没有传输对象"
+        _, objects, nbytes, elapsed = self.transfer
+        return f"{objects} 个对象, {self.format_size(nbytes)}, {self.format_size(nbytes / max(elapsed, 1e-3))}/s"
+
+    def summary(self):
+        return f"{self.stage}: {self.totals()}, 用时 {self.elapsed():.2f} 秒"
+
+
+class LogSink:
+    """日志文件写入器
+
+    各线程只把日志行放入队列, 由一个后台线程批量写入长期打开的日志文件,
+    并定期 flush, 不再每行日志都打开/关闭一次文件。
+    日志文件超过 max_bytes 或跨天时, 旧文件在后台线程中压缩为 .log.gz,
+    压缩文件只保留最新的 keep_files 个。
+    """
+
+    FLUSH_INTERVAL = 0.5  # 秒
+    BATCH_SIZE = 1000
+
+    def __init__(self, log_dir, max_bytes=0, keep_files=0):
+        """
+        Args:
+            log_dir: 日志目录
+            max_bytes: 单个日志文件的大小上限 (字节), 0 表示只按天切换
+            keep_files: 保留的压缩日志数量, 0 表示不删除
+        """
+        self.log_dir = Path(log_dir)
+        self.max_bytes = max_bytes
+        self.keep_files = keep_files
+        self._queue = queue.Queue()
+        self._handle = None
+        self._handle_date = None
+        self._handle_path = None
+        self._rotation_blocked = None  # 归档失败的日期, 当天不再按大小轮转
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        # 即使没有正常关闭窗口, 退出前也把缓冲的日志写完
+        atexit.register(self.close)
+
+    @property
+    def log_file(self):
+        """当天的日志文件路径"""
+        return self.log_dir / f"app-{datetime.date.today().isoformat()}.log"
+
+    def configure(self, max_bytes=None, keep_files=None):
+        """修改轮转设置 (加载配置后调用, 从下一批日志开始生效)"""
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if keep_files is not None:
+            self.keep_files = keep_files
+
+    def write(self, line):
+        """写入一行日志 (线程安全, 不阻塞调用方)"""
+        self._queue.put(line)
+
+    def close(self):
+        """写完队列中剩余的日志并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.FLUSH_INTERVAL)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [line for line in batch if line is not None]
+            if lines:
+                self._write_lines(lines)
+
+            now = time.monotonic()
+            if stop or (self._handle is not None and now - last_flush >= self.FLUSH_INTERVAL):
+                self._flush()
+                last_flush = now
+            if stop:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+                return
+
+    def _write_lines(self, lines):
+        try:
+            today = datetime.date.today()
+            if self._handle is not None and self._handle_date != today:
+                # 跨天时归档前一天的日志, 切换到新的日志文件
+                self._rotate()
+            if self._handle is None:
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+                if self._handle_date is None:
+                    # 首次写入: 归档以前遗留的未压缩日志
+                    self._archive_stale_logs(today)
+                self._handle_path = self.log_file
+                self._handle = open(self._handle_path, 'a', encoding='utf-8')
+                self._handle_date = today
+            self._handle.write('\n'.join(lines) + '\n')
+            if (self.max_bytes and self._rotation_blocked != today
+                    and self._handle.tell() >= self.max_bytes):
+                if not self._rotate():
+                    self._rotation_blocked = today
+        except Exception as e:
+            print(f"无法写入日志文件: {e}")
+
+    def _flush(self):
+        try:
+            if self._handle is not None:
+                self._handle.flush()
+        except Exception as e:
+            print(f"无法写入日志文件: {e}")
+
+    def _rotate(self):
+        """关闭当前日志文件并压缩归档
+
+        Returns:
+            bool: 是否归档成功 (失败时下一批日志继续追加到原文件)
+        """
+        self._handle.close()
+        self._handle = None
+        archived = self._archive(self._handle_path)
+        self._prune()
+        return archived
+
+    def _archive_stale_logs(self, today):
+        """压缩日志目录中不是当天的未压缩日志 (上次运行跨天或异常退出时遗留)"""
+        current = f"app-{today.isoformat()}.log"
+        stale = [path for path in self.log_dir.glob('app-*.log') if path.name != current]
+        for path in stale:
+            self._archive(path)
+        if stale:
+            self._prune()
+
+    def _archive(self, path):
+        """把日志文件压缩为 app-日期.序号.log.gz, 并删除原文件
+
+        Returns:
+            bool: 是否归档成功
+        """
+        # 序号接在已有归档之后 (较早的归档可能已被删除, 不能重用空出的序号)
+        indexes = [int(match.group(1)) for match in
+                   (re.fullmatch(re.escape(path.stem) + r'\.(\d+)\.log\.gz', other.name)
+                    for other in path.parent.glob(f"{path.stem}.*.log.gz")) if match]
+        target = path.with_name(f"{path.stem}.{max(indexes, default=0) + 1}.log.gz")
+        try:
+            mtime = path.stat().st_mtime
+            with open(path, 'rb') as src, gzip.open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            # 保留原文件的修改时间, 清理时按它判断新旧
+            os.utime(target, (mtime, mtime))
+            os.remove(path)
+            return True
+        except OSError as e:
+            # 文件可能正被另一个进程 (如同时运行的批量模式) 打开, 删除不完整的压缩文件, 下次再归档
+            print(f"无法归档日志文件 {path}: {e}")
+            try:
+                target.unlink()
+            except OSError:
+                pass
+            return False
+
+    def _prune(self):
+        prune_log_files(self.log_dir, 'app-*.log.gz', self.keep_files)
+
+
+def prune_log_files(log_dir, pattern, keep):
+    """只保留日志目录中最新的 keep 个匹配 pattern 的文件 (按修改时间)
+
+    Returns:
+        int: 删除的文件数
+    """
+    if not keep:
+        return 0
+    try:
+        files = sorted(Path(log_dir).glob(pattern), key=lambda path: path.stat().st_mtime, reverse=True)
+    except OSError:
+        return 0
+    removed = 0
+    for path in files[keep:]:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def log_sink_options(options):
+    """从高级选项中取出 LogSink 的轮转设置"""
+    return {'max_bytes': options.get('log_max_bytes', 0), 'keep_files': options.get('log_keep_files', 0)}
+
+
+def get_app_base_dir():
+    """配置文件和日志所在目录 - 正确处理PyInstaller打包后的路径"""
+    if getattr(sys, 'frozen', False):
+        # PyInstaller打包后的情况,使用EXE所在目录
+        return os.path.dirname(sys.executable)
+    # 正常Python脚本运行
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+class StageTimer:
+    """按顺序记录提交流程各阶段的耗时
+
+    同时记录阶段内部的细分步骤 (遍历、扫描、每个 git 子进程等),
+    可以导出为 Chrome trace-event 格式, 用 chrome://tracing 或 Perfetto 打开。
+    """
+
+    def __init__(self):
+        self.timings = []  # [(阶段, 耗时秒)]
+        self.events = []   # trace-event 列表
+        self.notes = {}    # 阶段 -> 附加说明 (如推送的传输量)
+        self._current = None
+        self._start = 0.0
+        self._lock = threading.Lock()
+
+    def mark(self, stage):
+        """结束当前阶段并开始新的阶段, stage 为 None 时只结束当前阶段"""
+        now = time.perf_counter()
+        if self._current is not None:
+            self.timings.append((self._current, now - self._start))
+            note = self.notes.get(self._current)
+            if note:
+                self.add_span(self._current, 'stage', self._start, now, note=note)
+            else:
+                self.add_span(self._current, 'stage', self._start, now)
+        self._current = stage
+        self._start = now
+
+    def add_span(self, name, category, start, end=None, **args):
+        """记录一个已经结束的步骤 (可在任意线程调用)
+
+        Args:
+            name: 步骤名
+            category: 分类, 如 'stage'、'fs'、'scan'、'git'
+            start: 开始时间 (time.perf_counter)
+            end: 结束时间, 默认为现在
+            args: 附加信息, 显示在 trace 查看器中
+        """
+        if end is None:
+            end = time.perf_counter()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round(start * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def annotate(self, note):
+        """给当前阶段附加说明, 显示在 summary 和 trace 中"""
+        if self._current is not None:
+            self.notes[self._current] = note
+
+    def finish(self):
+        self.mark(None)
+
+    def total(self):
+        return sum(elapsed for _, elapsed in self.timings)
+
+    def summary(self):
+        parts = ', '.join(f"{stage} {elapsed:.2f}s" + (f" [{self.notes[stage]}]" if stage in self.notes else "")
+                          for stage, elapsed in self.timings)
+        return f"阶段耗时 {self.total():.2f} 秒 ({parts})"
+
+    def export(self, trace_path, metadata=None):
+        """写出 Chrome trace-event JSON 文件"""
+        with self._lock:
+            events = list(self.events)
+        # 线程名, 让查看器中的每一行有可读的名字
+        for tid in sorted({event['tid'] for event in events}):
+            name = next((thread.name for thread in threading.enumerate() if thread.native_id == tid), str(tid))
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                           'args': {'name': name}})
+        trace_path = Path(trace_path)
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': metadata or {}},
+                      f, ensure_ascii=False)
+
+
+class GitPipeline:
+    """清理 → .gitignore → 安全检查 → 提交 → 推送 的完整流程
+
+    不依赖界面, 可以直接用于批量模式; GitGuiApp 在此基础上重写
+    log / update_status / show_dialog 等方法, 把结果显示到窗口中。
+    """
+
+    def __init__(self, options, log_dir, log_sink, name=None, echo_levels=(), assume_yes=True):
+        """
+        Args:
+            options: 高级选项, 参见 ADVANCED_OPTION_DEFAULTS
+            log_dir: 日志目录
+            log_sink: LogSink, 可由多个流程共用
+            name: 日志行中的前缀 (批量模式下为仓库名)
+            echo_levels: 同时打印到控制台的日志级别
+            assume_yes: 无界面时询问类对话框的回答
+        """
+        self.options = options
+        self.log_dir = log_dir
+        self.log_sink = log_sink
+        self.name = name
+        self.echo_levels = set(echo_levels)
+        self.assume_yes = assume_yes
+        self.stage_timer = StageTimer()
+        self.last_error = None
+        self.remote_refs = RemoteRefCache()
+        self.background_scanner = None  # BackgroundScanner, 仅界面模式下按选项启动
+        self.git_acceleration_state = {}  # 代码路径 -> 已应用的 git_acceleration 选项值
+
+    def log(self, level, message, data=None):
+        """记录日志 (可在任意线程调用)"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        prefix = f"[{self.name}] " if self.name else ""
+        log_message = f"[{timestamp}] [{level}] {prefix}{message}"
+
+        if data:
+            log_message += f" | {data}"
+
+        self.log_sink.write(log_message)
+        if level in self.echo_levels:
+            print(log_message, flush=True)
+
+    def update_status(self, message, color='#555'):
+        pass
+
+    def set_loading(self, loading):
+        pass
+
+    def create_progress_tracker(self, stage, tracker_class=ProgressTracker, **options):
+        return tracker_class(stage, **options)
+
+    def show_dialog(self, kind, title, message, **options):
+        """无界面时对话框内容写入日志, 询问类对话框返回 assume_yes"""
+        if kind.startswith('ask'):
+            self.log("INFO", f"[{title}] {message} -> {'是' if self.assume_yes else '否'}")
+            return self.assume_yes
+        # 错误已经单独记录过, 这里只需要保留安全警告的详情
+        self.log("WARN" if kind == 'showwarning' else "DEBUG", f"[{title}] {message}")
+        return None
+
+    def build_file_inventory(self, code_path, respect_gitignore=None):
+        """建立文件清单
+
+        Args:
+            code_path: 代码路径
+            respect_gitignore: 是否按 git ls-files 跳过被忽略的文件, 默认取高级选项;
+                               路径还不是 Git 仓库时回退为遍历目录
+
+        Returns:
+            FileInventory: 文件清单
+        """
+        if respect_gitignore is None:
+            respect_gitignore = self.options.get('respect_gitignore', True)
+
+        start = time.perf_counter()
+        if respect_gitignore:
+            inventory = FileInventory.from_git(code_path)
+            if inventory is not None:
+                self.stage_timer.add_span('文件清单 (git ls-files)', 'fs', start, files=len(inventory))
+                self.log("INFO", f"文件清单: git ls-files 共 {len(inventory)} 个文件 (已排除被忽略的文件)")
+                return inventory
+            self.log("DEBUG", "不是 Git 仓库, 改为遍历目录建立文件清单")
+
+        inventory = FileInventory.scan(code_path)
+        self.stage_timer.add_span('文件清单 (遍历目录)', 'fs', start, files=len(inventory))
+        self.log("INFO", f"文件清单: 遍历目录共 {len(inventory)} 个文件")
+        return inventory
+
+    def cleanup_temp_files(self, code_path, inventory=None, respect_gitignore=None, untracked_only=None,
+                           dry_run=False, worktree=None):
+        """清理可能导致 Git 操作失败的临时文件
+
+        Args:
+            code_path: 代码路径
+            inventory: 文件清单, 为空时重新建立 (只清理未跟踪文件时不需要)
+            respect_gitignore: 是否跳过被 .gitignore 忽略的文件, 默认取高级选项
+            untracked_only: 只检查 git status 报告的未跟踪文件, 默认取高级选项
+                            cleanup_untracked_only; 路径还不是 Git 仓库时检查全部文件
+            dry_run: 只报告将被删除的文件, 不实际删除
+            worktree: 已读取的 WorktreeStatus; 与 inventory 都为空时按需执行 git status,
+                      只传入 inventory 表示调用方已确认无法读取 (路径不是 Git 仓库) 或不使用
+
+        Returns:
+            list: 被删除 (dry_run 时为将被删除) 的文件列表
+        """
+        deleted_files = []
+
+        try:
+            if untracked_only is None:
+                untracked_only = self.options.get('cleanup_untracked_only', True)
+            candidates = None
+            if untracked_only:
+                if worktree is None and inventory is None:
+                    worktree = WorktreeStatus.read(code_path)
+                untracked = worktree.untracked_files() if worktree is not None else None
+                if untracked is not None:
+                    # 耗时只与未跟踪文件数有关, 与仓库大小无关
+                    candidates = [(file_path, parts[-1]) for _, file_path, parts in untracked
+                                  if CLEANUP_SKIP_DIRS.isdisjoint(parts[:-1])]
+                    self.log("DEBUG", f"清理范围: {len(untracked)} 个未跟踪文件")
+
+            if candidates is None:
+                if inventory is None:
+                    inventory = self.build_file_inventory(code_path, respect_gitignore)
+                # 检查并删除临时文件 (跳过 .git、虚拟环境和依赖目录)
+                candidates = [(file_path, file)
+                              for _, file_path, file, _, _, _ in inventory.iter_files(CLEANUP_SKIP_DIRS)]
+
+            for file_path, file in candidates:
+                kind = classify_cleanup_name(file)
+                if kind is None:
+                    continue
+
+                if dry_run:
+                    deleted_files.append(file_path)
+                    reason = "Windows 保留设备名" if kind == 'reserved' else "临时文件"
+                    self.log("INFO", f"[预览] 将删除{reason}: {file_path}")
+                    continue
+
+                # 1. Windows 保留设备名
+                if kind == 'reserved':
+                    try:
+                        os.remove(file_path)
+                        deleted_files.append(file_path)
+                        self.log("INFO", f"已删除 Windows 保留设备名文件: {file_path}")
+                    except Exception as e:
+                        # 如果无法删除,添加到 .gitignore
+                        self.log("WARN", f"无法删除 {file_path}: {str(e)}")
+                        self._add_to_gitignore(code_path, file)
+                        self.log("INFO", f"已将 {file} 添加到 .gitignore")
+
+                # 2. 常见的临时文件
+                else:
+                    try:
+                        os.remove(file_path)
+                        deleted_files.append(file_path)
+                        self.log("DEBUG", f"已删除临时文件: {file_path}")
+                    except Exception as e:
+                        self.log("DEBUG", f"无法删除临时文件 {file_path}: {str(e)}")
+
+            if not dry_run:
+                if inventory is not None:
+                    inventory.discard(deleted_files)
+                if worktree is not None:
+                    worktree.discard(deleted_files)
+
+        except Exception as e:
+            self.log("WARN", f"清理临时文件时出错: {str(e)}")
+
+        return deleted_files
+
+    def _add_to_gitignore(self, code_path, filename):
+        """将文件添加到 .gitignore
+
+        Args:
+            code_path: 代码路径
+            filename: 要忽略的文件名
+        """
+        import os
+        gitignore_path = os.path.join(code_path, '.gitignore')
+
+        try:
+            # 读取现有的 .gitignore 内容
+            existing_entries = set()
+            if os.path.exists(gitignore_path):
+                with open(gitignore_path, 'r', encoding='utf-8') as f:
+                    existing_entries = set(line.strip() for line in f if line.strip())
+
+            # 如果文件名不在 .gitignore 中,添加它
+            if filename not in existing_entries:
+                with open(gitignore_path, 'a', encoding='utf-8') as f:
+                    # 如果文件不为空且最后一行没有换行符,先添加换行
+                    if os.path.getsize(gitignore_path) > 0:
+                        f.write('\n')
+                    f.write(f'{filename}\n')
+        except Exception as e:
+            self.log("DEBUG", f"更新 .gitignore 失败: {str(e)}")
+
+    def ensure_gitignore_exists(self, code_path):
+        """确保项目中存在 .gitignore 文件
+        注意: 如果项目已有 .gitignore,则保持不变,不做任何修改
+
+        Args:
+            code_path: 项目根目录路径
+        """
+        import os
+        gitignore_path = os.path.join(code_path, '.gitignore')
+
+        try:
+            # 检查 .gitignore 是否存在
+            if os.path.exists(gitignore_path):
+                self.log("INFO", f"✓ .gitignore 已存在,保持不变: {gitignore_path}")
+            else:
+                # 创建 .gitignore 文件
+                self.log("INFO", f"创建 .gitignore 文件: {gitignore_path}")
+
+                default_gitignore_content = """# 忽略可执行文件
+*.exe
+*.app
+*.out
+
+# Python
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+venv/
+env/
+.venv
+
+# Node.js
+node_modules/
+npm-debug.log*
+
+# 日志文件
+*.log
+logs/
+
+# 临时文件
+*.tmp
+*.bak
+*.swp
+*~
+.DS_Store
+Thumbs.db
+
+# IDE
+.vscode/
+.idea/
+*.suo
+*.user
+
+# 构建产物
+dist/
+build/
+*.spec
+"""
+
+                with open(gitignore_path, 'w', encoding='utf-8') as f:
+                    f.write(default_gitignore_content)
+
+                self.log("INFO", "✓ .gitignore 文件创建成功 (包含 *.exe 等常见规则)")
+
+        except Exception as e:
+            self.log("WARN", f"创建/检查 .gitignore 失败: {str(e)}")
+
+    def run_git_step(self, runner, desc, *args, input=None):
+        """执行一个 Git 步骤, 并按 stderr 分类处理结果
+
+        Args:
+            runner: GitRunner
+            desc: 步骤描述
+            args: git 子命令及参数
+            input: 写入标准输入的字节串
+
+        Returns:
+            GitResult: 命令结果; 没有需要提交的更改时返回 None
+        """
+        self.log("INFO", f"执行: {desc}")
+        self.update_status(f"正在{desc}...", "#0066cc")
+
+        result = runner.run(*args, input=input)
+
+        if result.stdout:
+            self.log("DEBUG", result.stdout.strip())
+
+        # git commit 把 "nothing to commit" / "nothing added to commit" 写到 stdout, 退出码为 1
+        lowered_stdout = (result.stdout or '').lower()
+        nothing_to_commit = result.returncode != 0 and ("nothing to commit" in lowered_stdout
+                                                        or "nothing added to commit" in lowered_stdout)
+        kind = runner.classify(result.stderr.strip()) if result.stderr else None
+        if nothing_to_commit or kind == 'nothing_to_commit':
+            self.log("INFO", "没有新的更改需要提交")
+            self.show_dialog("showinfo", "提示", "没有新的更改需要提交")
+            self.set_loading(False)
+            self.update_status("完成", "#009900")
+            return None
+
+        if result.stderr:
+            error_output = result.stderr.strip()
+            # 忽略某些警告和信息
+            if kind == 'warning':
+                # 警告信息，记录但不抛出异常
+                self.log("DEBUG", f"警告: {error_output}")
+            elif kind == 'error':
+                # 处理所有致命错误和错误（除了 warning）
+                raise Exception(f"Git 命令失败: {error_output}")
+
+        return result
+
+    def ensure_git_repository(self, runner):
+        """路径还不是 Git 仓库时执行 git init
+
+        用一次 rev-parse 同时检查仓库和查询当前分支: 第一行是 .git 目录 (不是仓库时没有输出),
+        第二行是当前分支名; 仓库还没有任何提交时 HEAD 无法解析, 命令失败但仍输出第一行。
+
+        Returns:
+            str: 当前分支名; 新建的仓库或还没有提交时返回 None
+        """
+        self.log("INFO", "执行: 检查 Git 仓库")
+        self.update_status("正在检查 Git 仓库...", "#0066cc")
+        result = runner.run('rev-parse', '--git-dir', '--abbrev-ref', 'HEAD')
+        output_lines = result.stdout.splitlines()
+        if not output_lines:
+            self.run_git_step(runner, '初始化 Git 仓库', 'init')
+            return None
+        if result.returncode != 0 or len(output_lines) < 2:
+            return None
+        return output_lines[1].strip() or None
+
+    def ensure_git_remote(self, runner, repo_url):
+        """设置 origin 远程地址, 不存在时添加"""
+        self.log("INFO", "执行: 添加远程仓库")
+        self.update_status("正在添加远程仓库...", "#0066cc")
+        # 大多数情况下 origin 已存在, 先尝试 set-url 只需一个进程
+        if runner.run('remote', 'set-url', 'origin', repo_url).returncode != 0:
+            self.run_git_step(runner, '添加远程仓库 origin', 'remote', 'add', 'origin', repo_url)
+
+    def configure_git_acceleration(self, runner):
+        """按 git_acceleration 选项开启或撤销仓库的 untracked cache / fsmonitor
+
+        只设置用户没有自己配置过的项, 并把设置过的项记录在 gitgui.managedConfig 中,
+        关闭选项时只撤销这些项。同一仓库在选项不变时只检查一次。
+        """
+        enabled = bool(self.options.get('git_acceleration', False))
+        if self.git_acceleration_state.get(runner.code_path) == enabled:
+            return
+        if not enabled and has_git_acceleration_marker(runner.code_path) is False:
+            # 选项关闭且仓库中没有本工具设置过的项: 不需要启动 git config
+            self.git_acceleration_state[runner.code_path] = enabled
+            return
+        managed = runner.run('config', '--local', '--get-all', GIT_ACCELERATION_MARKER, quiet=True).stdout.split()
+        if enabled:
+            for key, value in GIT_ACCELERATION_CONFIG:
+                if key in managed or runner.run('config', '--local', '--get', key, quiet=True).returncode == 0:
+                    continue
+                runner.run('config', '--local', key, value)
+                runner.run('config', '--local', '--add', GIT_ACCELERATION_MARKER, key, quiet=True)
+                self.log("INFO", f"已为仓库开启 {key}")
+        elif managed:
+            for key in managed:
+                runner.run('config', '--local', '--unset', key)
+            runner.run('config', '--local', '--unset-all', GIT_ACCELERATION_MARKER, quiet=True)
+            self.log("INFO", f"已撤销本工具设置的仓库配置: {', '.join(managed)}")
+        self.git_acceleration_state[runner.code_path] = enabled
+
+    def stage_changes(self, runner, worktree=None):
+        """暂存工作区的改动
+
+        把 git status 报告有未暂存改动的路径 (包括未跟踪和已删除的文件) 通过
+        --pathspec-from-file 交给 git add, 不必让 git add 重新检查整个目录树。
+        清理阶段读取的 WorktreeStatus 仍然有效时直接使用, 否则重新执行 git status。
+        targeted_add 关闭时使用 git add .
+
+        Args:
+            runner: GitRunner
+            worktree: 之前读取的 WorktreeStatus
+
+        Returns:
+            bool: 没有需要提交的更改时返回 False
+        """
+        self.configure_git_acceleration(runner)
+        if not self.options.get('targeted_add', True):
+            return self.run_git_step(runner, '添加文件', 'add', '.') is not None
+
+        reused = worktree is not None and worktree.is_current()
+        if not reused:
+            worktree = WorktreeStatus.read(runner.code_path, runner)
+            if worktree is None:
+                return self.run_git_step(runner, '添加文件', 'add', '.') is not None
+
+        paths = worktree.unstaged_paths(existing_only=reused)
+        if not paths:
+            if not worktree.has_staged():
+                self.log("INFO", "工作区和暂存区都没有改动")
+                return False
+            self.log("INFO", "工作区没有未暂存的改动")
+            return True
+
+        self.log("INFO", f"暂存 {len(paths)} 个有改动的路径")
+        # :(literal) 防止文件名中的 * ? [ 被当作通配符
+        pathspecs = b'\0'.join(b':(literal)' + path for path in paths)
+        try:
+            result = self.run_git_step(runner, '添加文件', 'add', '--pathspec-from-file=-', '--pathspec-file-nul',
+                                       input=pathspecs)
+            if reused and result is not None and result.returncode != 0:
+                # 例如子目录的 .gitignore 在读取之后忽略了其中的文件 (git add 退出码 1, 没有 error: 字样)
+                raise Exception(result.stderr.strip())
+        except Exception as e:
+            if not reused:
+                raise
+            self.log("DEBUG", f"使用清理阶段的状态暂存失败, 重新执行 git status: {e}")
+            return self.stage_changes(runner)
+        return result is not None
+
+    def write_trace(self, stages, code_path):
+        """把本次提交的各步骤耗时写入 logs 目录 (Chrome trace-event 格式)"""
+        if not self.options.get('write_trace', True):
+            return
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+        suffix = '-' + re.sub(r'[^\w.-]', '_', self.name) if self.name else ''
+        trace_path = Path(self.log_dir) / f"trace-{timestamp}{suffix}.json"
+        try:
+            stages.export(trace_path, {'code_path': code_path, 'error': self.last_error})
+            self.log("INFO", f"性能跟踪已写入: {trace_path}")
+            prune_log_files(self.log_dir, 'trace-*.json', self.options.get('log_keep_files', 0))
+        except Exception as e:
+            self.log("WARN", f"写入性能跟踪失败: {e}")
+
+    def check_remote_branch(self, runner, repo_url, branch):
+        """检查远程仓库中是否存在指定分支
+
+        用 ls-remote 只查询这一个分支 (一次往返, 不下载任何对象),
+        结果按 remote_ref_ttl 缓存。
+
+        Returns:
+            bool: 分支是否存在
+        """
+        ttl = self.options.get('remote_ref_ttl', 0)
+        exists = self.remote_refs.get(repo_url, branch, ttl) if ttl else None
+        if exists is not None:
+            self.log("DEBUG", f"远程分支查询命中缓存: {branch} {'存在' if exists else '不存在'}")
+            return exists
+
+        ref = f'refs/heads/{branch}'
+        result = runner.run('ls-remote', '--heads', 'origin', ref)
+        if result.returncode != 0:
+            raise Exception(f"Git 命令失败: {result.stderr.strip()}")
+
+        # 输出为 "<提交>\t<引用>", 引用按后缀匹配, 需要再确认是完整的分支名
+        exists = any(line.partition('\t')[2].strip() == ref for line in result.stdout.splitlines())
+        self.remote_refs.put(repo_url, branch, exists)
+        return exists
+
+    def apply_baseline(self, code_path, security_issues):
+        """去掉基线文件 (.gitgui-baseline.json) 中已接受的问题"""
+        if not security_issues:
+            return security_issues
+        baseline = FindingBaseline.for_path(code_path)
+        try:
+            if not baseline.load():
+                return security_issues
+        except (OSError, ValueError, KeyError) as e:
+            self.log("WARN", f"无法读取基线文件 {baseline.path}: {e}")
+            return security_issues
+
+        remaining = baseline.filter(security_issues)
+        accepted = len(security_issues) - len(remaining)
+        if accepted:
+            self.log("INFO", f"基线中已接受 {accepted} 个问题, 已忽略")
+        return remaining
+
+    def report_security_issues(self, security_issues):
+        """显示安全检查发现的问题"""
+        self.set_loading(False)
+
+        issue_text = "检测到敏感信息，为了安全起见，请先移除或替换以下内容后再提交：\n\n"
+        if any('commit' in issue for issue in security_issues):
+            issue_text = ("尚未推送的历史提交中包含敏感信息, 已在本地提交但没有推送。\n"
+                          "即使文件中已经删除, 这些内容仍会随历史推送到远程仓库,\n"
+                          "请先修改历史 (例如 git rebase -i 或 git commit --amend) 再推送：\n\n")
+        for issue in security_issues[:10]:  # 只显示前10个
+            location = issue['file']
+            if 'line' in issue:
+                location += f":{issue['line']}"
+            if 'commit' in issue:
+                location += f" (提交 {issue['commit']})"
+            issue_text += f"• 类型: {issue['category']}\n"
+            issue_text += f"  文件: {location}\n"
+            issue_text += f"  内容: {issue['match'][:80]}...\n\n"
+
+        if len(security_issues) > 10:
+            issue_text += f"\n... 还有 {len(security_issues) - 10} 个问题未显示"
+
+        history_option = " --history" if any('commit' in issue for issue in security_issues) else ""
+        issue_text += (f"\n\n如果确认这些内容可以提交, 可以运行 "
+                       f"python git_gui_app.py baseline <代码路径>{history_option} 把它们记入 {BASELINE_FILE_NAME}")
+
+        self.show_dialog("showwarning", "安全警告", issue_text)
+        self.update_status("安全检查失败", "#cc0000")
+        self.log("WARN", f"发现 {len(security_issues)} 个安全问题")
+
+    def execute_git_operations(self, repo_url, commit_msg, code_path, enable_security_check=True, target_branch="main",
+                               scan_staged_only=False):
+        """执行 Git 操作
+
+        Returns:
+            str: 结果, 'success'、'no_changes'、'blocked' (发现敏感信息)、
+                 'cancelled' 或 'failed' (错误信息见 last_error);
+                 各阶段耗时见 stage_timer
+        """
+        stages = self.stage_timer = StageTimer()
+        run_start = time.perf_counter()
+        self.last_error = None
+        # 提交期间暂停后台预扫描, 避免两边同时写扫描缓存
+        background_scanner = self.background_scanner
+        if background_scanner is not None:
+            background_scanner.pause()
+        try:
+            self.set_loading(True)
+            self.log("INFO", "开始执行 Git 提交操作")
+
+            # 步骤0: 清理临时文件
+            stages.mark("清理")
+            self.update_status("正在清理临时文件...", "#0066cc")
+            self.log("INFO", "执行: 清理临时文件")
+            # 整个提交流程最多遍历一次目录树: 只清理未跟踪文件时清理不需要文件清单,
+            # 否则与安全检查共用一份
+            inventory = None
+            worktree = None
+            if self.options.get('cleanup_untracked_only', True):
+                # 这次 git status 的结果在暂存阶段继续使用
+                worktree = WorktreeStatus.read(code_path)
+            if worktree is None:
+                # 没有开启只清理未跟踪文件, 或路径还不是 Git 仓库: 清理检查全部文件
+                inventory = self.build_file_inventory(code_path)
+            deleted_files = self.cleanup_temp_files(code_path, inventory, worktree=worktree)
+            if deleted_files:
+                self.log("INFO", f"已清理 {len(deleted_files)} 个临时文件")
+            else:
+                self.log("INFO", "没有需要清理的临时文件")
+
+            # 步骤0.5: 确保 .gitignore 文件存在
+            stages.mark(".gitignore")
+            self.update_status("正在检查 .gitignore...", "#0066cc")
+            self.log("INFO", "执行: 检查/创建 .gitignore")
+            self.ensure_gitignore_exists(code_path)
+
+            # 步骤1: 安全检查（如果启用）
+            # 仅扫描改动模式下, 安全检查推迟到 git add 之后针对暂存区执行
+            if enable_security_check and not scan_staged_only:
+                stages.mark("安全检查")
+                self.update_status("正在执行安全检查...", "#0066cc")
+                self.log("INFO", "执行安全检查...")
+                if background_scanner is not None and background_scanner.root == code_path:
+                    self.log("INFO", f"后台预扫描: 已扫描 {background_scanner.scanned_total} 个文件, "
+                                     f"还有 {background_scanner.pending()} 个改动待检查")
+                tracker = self.create_progress_tracker("安全检查")
+                if inventory is None:
+                    inventory = self.build_file_inventory(code_path)
+                security_issues = self.scan_for_sensitive_data(code_path, inventory=inventory,
+                                                               progress=tracker)
+                self.log("INFO", tracker.summary())
+                security_issues = self.apply_baseline(code_path, security_issues)
+
+                if security_issues:
+                    self.report_security_issues(security_issues)
+                    return 'blocked'
+
+                self.log("INFO", "安全检查通过")
+            elif not enable_security_check:
+                self.log("INFO", "安全检查已跳过")
+
+            self.update_status("正在执行 Git 操作...", "#0066cc")
+
+            # 步骤2: 执行 Git 命令
+            stages.mark("暂存")
+            runner = GitRunner(code_path, self.log, stages)
+            current_branch = self.ensure_git_repository(runner)
+            if not self.stage_changes(runner, worktree):
+                return 'no_changes'
+
+            # 步骤2.5: 仅扫描本次暂存的改动
+            if enable_security_check and scan_staged_only:
+                stages.mark("安全检查")
+                self.update_status("正在执行安全检查 (仅本次改动)...", "#0066cc")
+                self.log("INFO", "执行安全检查 (git diff --cached 新增行)...")
+                security_issues = self.scan_staged_changes(code_path)
+                security_issues = self.apply_baseline(code_path, security_issues)
+
+                if security_issues:
+                    self.report_security_issues(security_issues)
+                    return 'blocked'
+
+                self.log("INFO", "安全检查通过")
+
+            stages.mark("提交")
+            commit_result = self.run_git_step(runner, '提交更改', 'commit', '-m', commit_msg)
+            if commit_result is None:
+                return 'no_changes'
+            self.ensure_git_remote(runner, repo_url)
+
+            # 步骤3: 检查远程分支是否存在
+            stages.mark("检查远程分支")
+            self.update_status("正在检查远程分支...", "#0066cc")
+            self.log("INFO", f"检查远程分支 '{target_branch}' 是否存在")
+
+            if self.options.get('fetch_before_push', False):
+                # 完整更新远程仓库信息, 再用一次 rev-parse 同时得到当前分支名和远程分支是否存在:
+                # 第一行是当前分支, 远程分支不存在时命令失败
+                transfer = self.create_progress_tracker("拉取", TransferProgress, log=self.log)
+                runner.stream('fetch', '--progress', 'origin', on_line=transfer.feed)
+                transfer.finish()
+                self.log("INFO", transfer.summary())
+                stages.annotate(transfer.totals())
+                check_result = runner.run('rev-parse', '--abbrev-ref', 'HEAD',
+                                          f'refs/remotes/origin/{target_branch}')
+                remote_exists = check_result.returncode == 0
+                output_lines = check_result.stdout.splitlines()
+                current_branch = output_lines[0].strip() if output_lines else current_branch
+            else:
+                remote_exists = self.check_remote_branch(runner, repo_url, target_branch)
+                if current_branch is None:
+                    # 本次新建的仓库 (或第一次提交): 提交之后才能得到分支名
+                    output_lines = runner.run('rev-parse', '--abbrev-ref', 'HEAD').stdout.splitlines()
+                    current_branch = output_lines[0].strip() if output_lines else None
+            current_branch = current_branch or "master"
+
+            if not remote_exists:
+                # 远程分支不存在,询问用户是否创建
+                self.set_loading(False)  # 暂时停止加载状态以便显示对话框
+                self.log("WARN", f"远程分支 '{target_branch}' 不存在")
+
+                question_msg = f"远程仓库中不存在分支 '{target_branch}'。\n\n是否要创建并推送该分支?"
+                result = self.show_dialog("askyesno", "创建分支", question_msg, icon='question')
+
+                if not result:
+                    # 用户选择不创建
+                    self.log("INFO", "用户取消创建分支")
+                    self.update_status("操作已取消", "#cc0000")
+                    return 'cancelled'
+
+                # 用户确认创建分支
+                self.log("INFO", f"用户确认创建远程分支 '{target_branch}'")
+                self.set_loading(True)  # 恢复加载状态
+
+            self.log("INFO", f"远程分支 '{target_branch}' 准备就绪")
+
+            # 步骤3.5: 扫描即将推送的历史提交 (之前在工具外提交、后来又删掉的敏感信息仍在历史中)
+            if enable_security_check and self.options.get('scan_unpushed_history', True):
+                stages.mark("历史检查")
+                self.update_status("正在检查尚未推送的提交...", "#0066cc")
+                # 本次创建的提交在上面已经检查过
+                history_issues = self.scan_unpushed_history(runner, skip_head=commit_result.returncode == 0)
+                history_issues = self.apply_baseline(code_path, history_issues)
+                if history_issues:
+                    self.report_security_issues(history_issues)
+                    return 'blocked'
 
-class GitGuiApp:
+            self.log("INFO", f"当前本地分支: {current_branch}")
+
+            # 步骤4: 推送到远程仓库的指定分支(如果不存在会自动创建)
+            stages.mark("推送")
+            branch_action = "创建并推送" if not remote_exists else "推送到"
+            self.log("INFO", f"执行: {branch_action}远程分支 '{target_branch}'")
+            self.update_status(f"正在{branch_action} {target_branch} 分支...", "#0066cc")
+
+            # --progress: 输出不是终端时 git 默认不显示进度; 边推送边读取, 大文件推送时可以看到速度
+            transfer = self.create_progress_tracker("推送", TransferProgress, log=self.log)
+            result = runner.stream('push', '--progress', '-u', 'origin', f'{current_branch}:{target_branch}',
+                                   on_line=transfer.feed)
+            transfer.finish()
+            self.log("INFO", transfer.summary())
+            stages.annotate(transfer.totals())
+
+            if result.stdout:
+                self.log("DEBUG", result.stdout.strip())
+
+            if result.stderr:
+                error_output = result.stderr.strip()
+                # 忽略警告，只处理真正的错误
+                kind = runner.classify(error_output, allow_short_read=True)
+                if kind == 'warning':
+                    self.log("DEBUG", f"警告: {error_output}")
+                elif kind == 'error':
+                    raise Exception(f"Git 命令失败: {error_output}")
+
+            # 推送后远程分支一定存在, 缓存期内再次提交不必重新查询
+            self.remote_refs.put(repo_url, target_branch, True)
+            self.log("INFO", runner.summary())
+
+            # 成功
+            self.log("INFO", "Git 操作成功完成")
+            self.update_status("提交成功！", "#009900")
+            self.show_dialog("showinfo", "成功", "代码已成功提交到 GitHub！")
+            return 'success'
+
+        except Exception as e:
+            error_msg = self.last_error = str(e)
+            self.log("ERROR", error_msg)
+            self.update_status("操作失败", "#cc0000")
+            self.show_dialog("showerror", "错误", f"操作失败：\n{error_msg}")
+            return 'failed'
+
+        finally:
+            if background_scanner is not None:
+                background_scanner.resume()
+            stages.finish()
+            stages.add_span('提交流程', 'run', run_start, code_path=code_path, target_branch=target_branch)
+            self.log("INFO", stages.summary())
+            self.write_trace(stages, code_path)
+            self.set_loading(False)
+
+    def scan_for_sensitive_data(self, dir_path, use_cache=None, workers=None, inventory=None,
+                                respect_gitignore=None, progress=None):
+        """扫描敏感数据
+
+        Args:
+            dir_path: 要扫描的目录
+            inventory: 文件清单, 为空时重新建立
+            respect_gitignore: 是否跳过被 .gitignore 忽略的文件, 默认取高级选项
+            progress: ProgressTracker, 用于上报扫描进度
+            use_cache: 是否使用磁盘扫描缓存, 默认取高级选项 scan_cache
+            workers: 并行扫描的进程数, 默认取高级选项 scan_workers
+
+        Returns:
+            list: 问题列表, 每项包含 category, file, match (按文件遍历顺序)
+        """
+        trace = self.stage_timer
+        start = time.perf_counter()
+        scanner = get_sensitive_data_scanner(entropy_threshold_option(self.options))
+
+        if use_cache is None:
+            use_cache = self.options.get('scan_cache', True)
+        cache = None
+        if use_cache:
+            try:
+                cache = ScanCache.for_path(dir_path, self.log_dir, scanner.version)
+                cache.begin()
+            except Exception as e:
+                self.log("WARN", f"扫描缓存不可用: {e}")
+        trace.add_span('加载扫描规则和缓存', 'cache', start)
+
+        # 第一步: 遍历文件清单, 通过 stat 信息命中缓存的文件直接得到结果
+        start = time.perf_counter()
+        max_size = self.options.get('max_scan_file_size', 0)
+        skipped_large = []  # [(相对路径, 大小)] 超过大小上限未扫描的文件
+        candidates = []  # [(相对路径, 绝对路径, stat 信息)]
+        results = []     # 与 candidates 一一对应的发现列表, None 表示待扫描
+        try:
+            if inventory is None:
+                inventory = self.build_file_inventory(dir_path, respect_gitignore)
+
+            for rel_path, file_path, file, size, mtime_ns, inode in inventory.iter_files(SCAN_IGNORE_DIRS):
+                # 只扫描文本文件
+                if not is_scannable_file(file):
+                    continue
+
+                if size is None:
+                    self.log("DEBUG", f"无法读取文件 {file_path}: 无法获取文件信息")
+                    continue
+
+                if max_size and size > max_size:
+                    skipped_large.append((rel_path, size))
+                    continue
+
+                stat_key = (size, mtime_ns, inode)
+                findings = cache.lookup_stat(rel_path, stat_key) if cache is not None else None
+                candidates.append((rel_path, file_path, stat_key))
+                results.append(findings)
+
+        except Exception as e:
+            self.log("ERROR", f"扫描目录失败: {e}")
+
+        for rel_path, size in skipped_large:
+            self.log("WARN", f"跳过过大文件 (skipped: too large): {rel_path} "
+                             f"({size / 1024 / 1024:.1f} MB > 上限 {max_size / 1024 / 1024:.1f} MB)")
+        if skipped_large:
+            self.log("WARN", f"共有 {len(skipped_large)} 个文件因超过大小上限未做安全检查")
+
+        # 第二步: 扫描未命中的文件 (文件较多时使用进程池)
+        pending = [i for i, findings in enumerate(results) if findings is None]
+        trace.add_span('比对文件状态', 'cache', start, files=len(candidates), pending=len(pending))
+        start = time.perf_counter()
+        if progress is None:
+            progress = ProgressTracker("安全检查")
+        progress.start(len(candidates), sum(candidates[i][2][0] for i in pending))
+        progress.advance(len(candidates) - len(pending))
+        if workers is None:
+            workers = self.options.get('scan_workers', 0)
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(pending))
+
+        scanned = None
+        if workers > 1 and len(pending) >= PARALLEL_SCAN_MIN_FILES:
+            files_done, bytes_done = progress.files_done, progress.bytes_done
+            try:
+                scanned = self._scan_files_parallel(candidates, pending, cache, workers, progress)
+            except Exception as e:
+                self.log("WARN", f"并行扫描失败, 改为单进程扫描: {e}")
+                progress.files_done, progress.bytes_done = files_done, bytes_done
+
+        if scanned is None:
+            workers = 1
+            scanned = self._scan_files_serial(candidates, pending, cache, scanner, progress)
+        progress.finish()
+        trace.add_span('扫描文件内容', 'scan', start, files=len(pending),
+                       bytes=progress.bytes_total, workers=workers)
+
+        for index, findings in scanned.items():
+            results[index] = findings
+
+        # 第三步: 按遍历顺序合并结果, 保证输出稳定
+        issues = []
+        for (rel_path, _, _), findings in zip(candidates, results):
+            for category, matched_text in findings or ():
+                issues.append({
+                    'category': category,
+                    'file': rel_path,
+                    'match': matched_text
+                })
+
+        if cache is not None:
+            self.log("INFO", f"扫描缓存: {cache.summary()}")
+            start = time.perf_counter()
+            try:
+                cache.save()
+            except Exception as e:
+                self.log("WARN", f"保存扫描缓存失败: {e}")
+            trace.add_span('保存扫描缓存', 'cache', start)
+
+        return issues
+
+    def _scan_files_serial(self, candidates, pending, cache, scanner, progress):
+        """在当前线程中逐个扫描文件
+
+        Returns:
+            dict: 文件下标 -> 发现列表
+        """
+        scanned = {}
+        for index in pending:
+            rel_path, file_path, stat_key = candidates[index]
+            progress.advance(1, stat_key[0])
+            try:
+                digest, findings = scan_file(scanner, file_path, stat_key[0],
+                                             cache.contents if cache is not None else ())
+            except Exception as e:
+                self.log("DEBUG", f"无法读取文件 {file_path}: {e}")
+                continue
+
+            if findings is None:
+                findings = cache.lookup_content(digest)
+            elif cache is not None:
+                cache.misses += 1
+            if cache is not None:
+                cache.store(rel_path, stat_key, digest, findings)
+            scanned[index] = findings
+        return scanned
+
+    def _scan_files_parallel(self, candidates, pending, cache, workers, progress):
+        """使用进程池并行扫描文件, 按文件大小均衡分批
+
+        Returns:
+            dict: 文件下标 -> 发现列表
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        known_digests = frozenset(cache.contents) if cache is not None else frozenset()
+        sizes = [candidates[index][2][0] for index in pending]
+        # 批次数多于进程数, 让先完成的进程继续领取任务
+        chunks = [[pending[i] for i in chunk]
+                  for chunk in split_balanced_chunks(sizes, workers * 4)]
+        self.log("INFO", f"并行扫描 {len(pending)} 个文件 ({workers} 个进程, {len(chunks)} 批)")
+
+        scanned = {}
+        # 显式使用 spawn: 界面进程有 Tk 和多个后台线程, Linux 默认的 fork 会复制持有中的锁导致子进程死锁;
+        # spawn 在各平台上都可用, 行为与 Windows/macOS 的默认方式一致
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_scan_worker,
+                                 initargs=(known_digests, entropy_threshold_option(self.options))) as executor:
+            futures = {executor.submit(_scan_files_worker,
+                                       [(candidates[index][1], candidates[index][2][0]) for index in chunk]): chunk
+                       for chunk in chunks}
+            # 按完成顺序收集 (结果按文件下标存放, 最终输出顺序不受影响)
+            for future in as_completed(futures):
+                chunk = futures[future]
+                progress.advance(len(chunk), sum(candidates[index][2][0] for index in chunk))
+                for index, (digest, findings, error) in zip(chunk, future.result()):
+                    rel_path, file_path, stat_key = candidates[index]
+                    if error is not None:
+                        self.log("DEBUG", f"无法读取文件 {file_path}: {error}")
+                        continue
+                    if findings is None:
+                        findings = cache.lookup_content(digest)
+                    elif cache is not None:
+                        cache.misses += 1
+                    if cache is not None:
+                        cache.store(rel_path, stat_key, digest, findings)
+                    scanned[index] = findings
+        return scanned
+
+    def scan_staged_changes(self, code_path):
+        """只扫描暂存区中新增的行 (git diff --cached)
+
+        扫描耗时与本次改动的大小成正比, 与仓库大小无关。
+
+        Args:
+            code_path: 代码路径
+
+        Returns:
+            list: 问题列表, 每项包含 category, file, line, match
+        """
+        runner = GitRunner(code_path, self.log)
+        scanner = get_sensitive_data_scanner(entropy_threshold_option(self.options))
+        start = time.perf_counter()
+        try:
+            process = runner.popen('-c', 'core.quotepath=off', 'diff', '--cached',
+                                   '--no-color', '--no-ext-diff', '-U0')
+            with process:
+                issues = scan_added_lines(iter_added_lines(process.stdout), scanner)
+                error_output = process.stderr.read().strip()
+        except Exception as e:
+            raise Exception(f"读取暂存区改动失败: {e}")
+        self.stage_timer.add_span('git diff --cached', 'scan', start, findings=len(issues))
+
+        if process.returncode != 0:
+            raise Exception(f"Git 命令失败: {error_output}")
+
+        return issues
+
+    def scan_unpushed_history(self, runner, skip_head=False):
+        """扫描即将推送的提交中新增的行
+
+        范围是 HEAD 能到达、任何 origin/* 远程跟踪分支都不能到达的提交, 即 origin/<分支>..HEAD,
+        远程分支不存在时为全部尚未推送的提交。git log -p 的输出边读边扫描,
+        耗时只与这些提交的大小有关, 与历史深度无关。
+
+        Args:
+            runner: GitRunner
+            skip_head: HEAD 是本次刚创建的提交 (内容已经检查过), 只扫描它之前的提交
+
+        Returns:
+            list: 问题列表, 每项包含 category, file, line, match, commit
+        """
+        start = time.perf_counter()
+        scanner = get_sensitive_data_scanner(entropy_threshold_option(self.options))
+        tip = 'HEAD^@' if skip_head else 'HEAD'
+        issues = []
+        commits = set()
+        try:
+            process = runner.popen('-c', 'core.quotepath=off', 'log', '-p', '--no-color', '--no-ext-diff',
+                                   '--no-textconv', '-U0', '--format=%x00%h', tip, '--not', '--remotes=origin')
+            with process:
+                added = iter_commit_added_lines(process.stdout)
+                for commit, commit_lines in itertools.groupby(added, key=lambda item: item[0]):
+                    commits.add(commit)
+                    for issue in scan_added_lines((item[1:] for item in commit_lines), scanner):
+                        issue['commit'] = commit
+                        issues.append(issue)
+                error_output = process.stderr.read().strip()
+        except Exception as e:
+            raise Exception(f"读取尚未推送的提交失败: {e}")
+        elapsed = time.perf_counter() - start
+        self.stage_timer.add_span('git log -p (未推送的提交)', 'scan', start, commits=len(commits),
+                                  findings=len(issues))
+
+        if process.returncode != 0:
+            raise Exception(f"Git 命令失败: {error_output}")
+
+        self.log("INFO", f"历史检查: {len(commits)} 个有新增内容的未推送提交, "
+                         f"发现 {len(issues)} 个问题, 用时 {elapsed:.2f} 秒")
+        return issues
+
+
+# 配置文件名 (位于应用目录)
+CONFIG_FILE_NAME = 'user_config.json'
+
+# 每个仓库配置 (界面上的字段) 的默认值
+PROFILE_DEFAULTS = {
+    'repo_name': '',
+    'commit_msg': 'Version',
+    'code_path': '',
+    'branch_selection': 'main',
+    'custom_branch': '',
+    'security_check': True,
+    'scan_staged_only': False,
+}
+# 仓库名称为空时使用的配置名
+UNNAMED_PROFILE = '未命名'
+
+# 配置修改后延迟写盘的时间 (秒): 这段时间内的多次修改合并为一次写入
+CONFIG_SAVE_DELAY = 1.0
+
+
+class ConfigStore:
+    """按仓库保存界面参数的配置文件 (user_config.json)
+
+    启动时读取一次, 之后只在内存中的 dict 上查找和修改; 修改后由定时器线程
+    延迟写盘 (先写临时文件再替换), 提交和切换仓库时不做任何文件读写。
+    高级选项是全局的, 仍保存在文件顶层。
+    """
+
+    VERSION = 2
+
+    def __init__(self, path, log, save_delay=CONFIG_SAVE_DELAY):
+        self.path = Path(path)
+        self.log = log
+        self.save_delay = save_delay
+        self.profiles = {}  # 配置名 -> 界面字段
+        self.active = None
+        self.options = {}   # 高级选项
+        self.extra = {}     # 文件中其他未知的顶层字段, 原样写回
+        self._lock = threading.Lock()        # 保护内存中的数据和定时器
+        self._write_lock = threading.Lock()  # 同一时间只有一个线程写文件
+        self._timer = None
+        self._dirty = False
+        self._last_change = 0.0
+        atexit.register(self.flush)
+
+    @staticmethod
+    def profile_name(fields):
+        """配置名: 仓库名称 (每个仓库一份配置)"""
+        return fields.get('repo_name') or UNNAMED_PROFILE
+
+    def load(self):
+        """读取配置文件; 旧版只有一份配置的文件会迁移为新格式 (原文件另存为 .v1.json)
+
+        Returns:
+            bool: 是否存在配置文件
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+
+        self.options = {key: data.pop(key) for key in ADVANCED_OPTION_DEFAULTS if key in data}
+        if isinstance(data.get('profiles'), dict):
+            self.profiles = data.pop('profiles')
+            self.active = data.pop('active_profile', None)
+            data.pop('version', None)
+            data.pop('last_saved', None)
+            self.extra = data
+        else:
+            fields = {key: data[key] for key in PROFILE_DEFAULTS if key in data}
+            self.active = self.profile_name(fields)
+            self.profiles = {self.active: fields}
+            try:
+                shutil.copyfile(self.path, self.path.with_name(self.path.stem + '.v1.json'))
+            except OSError as e:
+                self.log("WARN", f"[配置] 无法备份旧版配置文件: {e}")
+            self.log("INFO", f"[配置] 旧版配置已迁移为仓库配置 '{self.active}'")
+            self.schedule_save()
+        if self.active not in self.profiles:
+            self.active = next(iter(self.names()), None)
+        return True
+
+    def names(self):
+        """所有配置名, 最近使用的在前"""
+        return sorted(self.profiles, key=lambda name: self.profiles[name].get('last_used', ''), reverse=True)
+
+    def get(self, name):
+        """配置的界面字段 (缺少的字段用默认值补齐)"""
+        fields = dict(PROFILE_DEFAULTS)
+        fields.update(self.profiles.get(name, {}))
+        return fields
+
+    def put(self, fields):
+        """保存界面字段到对应仓库的配置并设为当前配置, 稍后写盘
+
+        Returns:
+            str: 配置名
+        """
+        name = self.profile_name(fields)
+        with self._lock:
+            profile = {key: fields[key] for key in PROFILE_DEFAULTS if key in fields}
+            current = self.profiles.get(name)
+            if name == self.active and current is not None \
+                    and all(current.get(key) == value for key, value in profile.items()):
+                # 没有变化, 不写盘
+                return name
+            profile['last_used'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+            self.profiles[name] = profile
+            self.active = name
+        self.schedule_save()
+        return name
+
+    def remove(self, name):
+        with self._lock:
+            if self.profiles.pop(name, None) is None:
+                return
+            if self.active == name:
+                self.active = next(iter(self.names()), None)
+        self.schedule_save()
+
+    def schedule_save(self):
+        """在最后一次修改 save_delay 秒后写盘, 期间的修改合并为一次写入"""
+        with self._lock:
+            self._dirty = True
+            self._last_change = time.monotonic()
+            if self._timer is None:
+                self._start_timer(self.save_delay)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            remaining = self._last_change + self.save_delay - time.monotonic()
+            if remaining > 0:
+                # 等待期间又有修改, 顺延 (不为每次修改都新建定时器线程)
+                self._start_timer(remaining)
+                return
+        self.flush()
+
+    def flush(self):
+        """立即写入尚未保存的修改 (关闭窗口时调用)"""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                data = dict(self.extra)
+                data.update({
+                    'version': self.VERSION,
+                    'active_profile': self.active,
+                    'profiles': {name: dict(fields) for name, fields in self.profiles.items()},
+                    'last_saved': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                })
+                data.update(self.options)
+            try:
+                tmp_path = self.path.with_name(self.path.name + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.write('\n')
+                os.replace(tmp_path, self.path)
+                self.log("DEBUG", f"[配置] 已保存 {len(data['profiles'])} 个仓库配置到 {self.path}")
+            except Exception as e:
+                # 与 schedule_save 一样在锁内修改, 下次 flush 重新写入
+                with self._lock:
+                    self._dirty = True
+                self.log("ERROR", f"[配置] 配置保存失败: {e}")
+
+
+def load_saved_options(config_file=None):
+    """读取配置文件中的高级选项, 命令行子命令与界面使用同一份设置
+
+    Args:
+        config_file: 配置文件路径, 默认为应用目录下的 user_config.json (不存在时使用默认值)
+
+    Returns:
+        dict: 高级选项, 配置文件中没有的项取默认值
+
+    Raises:
+        OSError, ValueError: 配置文件无法读取或格式错误
+    """
+    options = dict(ADVANCED_OPTION_DEFAULTS)
+    path = config_file or os.path.join(get_app_base_dir(), CONFIG_FILE_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        if config_file:
+            raise
+        return options
+    options.update((key, data[key]) for key in ADVANCED_OPTION_DEFAULTS if key in data)
+    return options
+
+
+class GitGuiApp(GitPipeline):
     def __init__(self, root):
         self.root = root
         self.root.title("Git GUI 提交工具")
-        self.root.geometry("550x600")
+        self.root.geometry("550x630")
         self.root.resizable(True, True)
 
         # 注册窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-        # 配置文件路径 - 正确处理PyInstaller打包后的路径
-        if getattr(sys, 'frozen', False):
-            # PyInstaller打包后的情况,使用EXE所在目录
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            # 正常Python脚本运行
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.config_file = os.path.join(base_dir, 'user_config.json')
+        # 配置文件路径
+        base_dir = get_app_base_dir()
+        self.config_file = os.path.join(base_dir, CONFIG_FILE_NAME)
+
+        # 日志 (必须在 load_config 之前初始化)
+        # 文件由后台线程批量写入, 界面上的日志由主线程定时批量插入
+        log_dir = Path(base_dir) / "logs"
+        super().__init__(dict(ADVANCED_OPTION_DEFAULTS), log_dir, LogSink(log_dir))
+        self.ui_log_queue = collections.deque()
+        self.log_view_lines = 0  # 加载配置后由 apply_log_options 设置
+        self.config_store = ConfigStore(self.config_file, self.log)
 
-        # 日志文件 (必须在 load_config 之前初始化)
-        self.log_dir = Path(base_dir) / "logs"
-        self.log_dir.mkdir(exist_ok=True)
-        self.log_file = self.log_dir / f"app-{datetime.date.today().isoformat()}.log"
+        # 工作线程不直接操作 Tk 组件, 而是把界面事件放入队列由主线程处理
+        self.ui_events = queue.SimpleQueue()
 
         # 设置样式
         self.setup_styles()
@@ -46,11 +3482,23 @@ class GitGuiApp:
         # 创建界面
         self.create_widgets()
 
-        # 加载保存的配置 (现在 log_file 已经初始化了)
+        # 加载保存的配置 (现在日志已经初始化了)
         self.load_config()
+        self.apply_log_options()
+
+        self.root.after(LOG_DRAIN_INTERVAL_MS, self._drain_log_queue)
+        self.root.after(UI_PUMP_INTERVAL_MS, self._pump_ui_events)
+        # 首个窗口绘制完成后再做的初始化: 启动后台预扫描、在后台线程预编译扫描规则
+        self.root.after_idle(self._after_first_paint)
 
         self.log("INFO", f"应用程序启动 (配置文件: {self.config_file})")
 
+    def _after_first_paint(self):
+        """窗口显示后执行的延迟初始化, 不占用启动时间"""
+        self.log("DEBUG", f"窗口就绪, 启动耗时 {time.perf_counter() - STARTUP_T0:.3f}s")
+        self.update_background_scanner(self.code_path.get().strip())
+        threading.Thread(target=get_sensitive_data_scanner, name='scanner-warmup', daemon=True).start()
+
     def setup_styles(self):
         """设置界面样式"""
         style = ttk.Style()
@@ -140,6 +3588,18 @@ class GitGuiApp:
         title.pack()
         row += 1
 
+        # 仓库配置选择 (每个仓库一份界面参数, 最近使用的在前)
+        ttk.Label(main_frame, text="仓库配置:",
+                 style='Label.TLabel').grid(row=row, column=0, sticky=tk.W, pady=3)
+        self.profile_picker = ttk.Combobox(main_frame, state='readonly', width=30)
+        self.profile_picker.grid(row=row, column=1, sticky=(tk.W, tk.E), padx=(0, 5), pady=3)
+        self.profile_picker.bind('<<ComboboxSelected>>', self.on_profile_selected)
+        delete_profile_btn = ttk.Button(main_frame, text="🗑 删除",
+                                        command=self.delete_profile,
+                                        width=8)
+        delete_profile_btn.grid(row=row, column=2, pady=3)
+        row += 1
+
         # === GitHub 仓库配置区域 ===
         # 仓库名称和推送分支放在一个区域内
 
@@ -230,11 +3690,26 @@ class GitGuiApp:
         self.submit_btn.grid(row=row, column=2, pady=(10, 5))
         row += 1
 
+        # 仅扫描本次改动 (git diff --cached 中新增的行)
+        self.scan_staged_only_var = tk.BooleanVar(value=False)
+        scan_staged_only = ttk.Checkbutton(main_frame, text="仅扫描本次提交的改动（git diff --cached）",
+                                           variable=self.scan_staged_only_var)
+        scan_staged_only.grid(row=row, column=0, columnspan=3, sticky=tk.W, padx=(20, 0), pady=(0, 5))
+        row += 1
+
         # 进度条
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress.grid(row=row, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 2))
         row += 1
 
+        # 进度详情 (当前阶段、文件数、读取量、速度)
+        self.progress_label = tk.Label(main_frame, text="",
+                                      font=('Microsoft YaHei UI', 8),
+                                      fg='#8795a1',
+                                      bg='#f5f6fa')
+        self.progress_label.grid(row=row, column=0, columnspan=3, sticky=tk.W)
+        row += 1
+
         # 状态标签
         self.status_label = tk.Label(main_frame, text="",
                                     font=('Microsoft YaHei UI', 9),
@@ -277,153 +3752,279 @@ class GitGuiApp:
         if folder:
             self.code_path.delete(0, tk.END)
             self.code_path.insert(0, folder)
+            self.update_background_scanner(folder)
+
+    def update_background_scanner(self, code_path):
+        """按 watch_files 选项启动/切换/停止对代码路径的后台预扫描"""
+        current = self.background_scanner
+        if not self.options.get('watch_files', False) or not code_path or not os.path.isdir(code_path):
+            code_path = None
+        if current is not None and current.root == code_path:
+            return
+
+        if current is not None:
+            self.background_scanner = None
+            current.stop()
+        if code_path:
+            try:
+                scanner = BackgroundScanner(code_path, self.options, self.log_dir, self.log)
+                scanner.start()
+                self.background_scanner = scanner
+            except Exception as e:
+                self.log("WARN", f"无法启动后台预扫描: {e}")
+
+    def collect_profile(self):
+        """当前界面上的仓库配置字段"""
+        return {
+            'repo_name': self.repo_name.get().strip(),
+            'commit_msg': self.commit_msg.get().strip(),
+            'code_path': self.code_path.get().strip(),
+            'branch_selection': self.branch_var.get(),
+            'custom_branch': self.custom_branch.get().strip(),
+            'security_check': self.security_check_var.get(),
+            'scan_staged_only': self.scan_staged_only_var.get(),
+        }
+
+    def apply_profile(self, fields):
+        """把仓库配置字段填入界面"""
+        for entry, key in ((self.repo_name, 'repo_name'), (self.commit_msg, 'commit_msg'),
+                           (self.code_path, 'code_path'), (self.custom_branch, 'custom_branch')):
+            entry.delete(0, tk.END)
+            entry.insert(0, fields[key])
+        self.branch_var.set(fields['branch_selection'])
+        self.security_check_var.set(fields['security_check'])
+        self.scan_staged_only_var.set(fields['scan_staged_only'])
+
+    def refresh_profile_picker(self):
+        self.profile_picker['values'] = self.config_store.names()
+        self.profile_picker.set(self.config_store.active or '')
 
     def save_config(self):
-        """保存当前界面参数到配置文件"""
+        """把当前界面参数存入对应仓库的配置 (只修改内存, 由 ConfigStore 稍后写盘)"""
+        fields = self.collect_profile()
+        if not fields['repo_name']:
+            # 配置按仓库名称保存, 没有仓库名称时不保存
+            return
         try:
-            config = {
-                'repo_name': self.repo_name.get().strip(),
-                'commit_msg': self.commit_msg.get().strip(),
-                'code_path': self.code_path.get().strip(),
-                'branch_selection': self.branch_var.get(),
-                'custom_branch': self.custom_branch.get().strip(),
-                'security_check': self.security_check_var.get(),
-                'last_saved': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            # 记录详细的参数信息
-            self.log("INFO", f"[配置保存] 准备保存配置到: {self.config_file}")
-            self.log("INFO", f"[配置保存] 仓库名称: {config['repo_name']}")
-            self.log("INFO", f"[配置保存] 提交信息: {config['commit_msg']}")
-            self.log("INFO", f"[配置保存] 代码路径: {config['code_path']}")
-            self.log("INFO", f"[配置保存] 分支选择: {config['branch_selection']}")
-            self.log("INFO", f"[配置保存] 自定义分支: {config['custom_branch']}")
-            self.log("INFO", f"[配置保存] 安全检查: {config['security_check']}")
-
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-
-            self.log("INFO", f"[配置保存] 配置保存成功")
+            name = self.config_store.put(fields)
+            self.refresh_profile_picker()
+            self.log("DEBUG", f"[配置保存] 仓库配置 '{name}' 已更新")
         except Exception as e:
             self.log("ERROR", f"[配置保存] 配置保存失败: {str(e)}")
-            import traceback
-            self.log("ERROR", f"[配置保存] 错误详情: {traceback.format_exc()}")
 
     def load_config(self):
-        """从配置文件加载参数"""
+        """从配置文件加载所有仓库配置, 并把当前仓库的参数填入界面"""
         try:
             self.log("INFO", f"[配置加载] 配置文件路径: {self.config_file}")
-            self.log("INFO", f"[配置加载] 文件是否存在: {os.path.exists(self.config_file)}")
-
-            if not os.path.exists(self.config_file):
+            if not self.config_store.load():
                 self.log("INFO", "[配置加载] 配置文件不存在，使用默认值")
                 return
 
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-
-            self.log("INFO", f"[配置加载] 成功读取配置文件")
-            self.log("INFO", f"[配置加载] 上次保存时间: {config.get('last_saved', '未知')}")
-
-            # 加载仓库名称
-            if 'repo_name' in config and config['repo_name']:
-                self.repo_name.delete(0, tk.END)
-                self.repo_name.insert(0, config['repo_name'])
-                self.log("INFO", f"[配置加载] ✓ 仓库名称: {config['repo_name']}")
-            else:
-                self.log("DEBUG", "[配置加载] 仓库名称为空，跳过")
-
-            # 加载提交信息
-            if 'commit_msg' in config and config['commit_msg']:
-                self.commit_msg.delete(0, tk.END)
-                self.commit_msg.insert(0, config['commit_msg'])
-                self.log("INFO", f"[配置加载] ✓ 提交信息: {config['commit_msg']}")
-            else:
-                self.log("DEBUG", "[配置加载] 提交信息为空，跳过")
-
-            # 加载代码路径
-            if 'code_path' in config and config['code_path']:
-                self.code_path.delete(0, tk.END)
-                self.code_path.insert(0, config['code_path'])
-                self.log("INFO", f"[配置加载] ✓ 代码路径: {config['code_path']}")
-            else:
-                self.log("DEBUG", "[配置加载] 代码路径为空，跳过")
-
-            # 加载分支选择
-            if 'branch_selection' in config:
-                self.branch_var.set(config['branch_selection'])
-                self.log("INFO", f"[配置加载] ✓ 分支选择: {config['branch_selection']}")
-            else:
-                self.log("DEBUG", "[配置加载] 分支选择不存在，跳过")
-
-            # 加载自定义分支名
-            if 'custom_branch' in config and config['custom_branch']:
-                self.custom_branch.delete(0, tk.END)
-                self.custom_branch.insert(0, config['custom_branch'])
-                self.log("INFO", f"[配置加载] ✓ 自定义分支: {config['custom_branch']}")
-            else:
-                self.log("DEBUG", "[配置加载] 自定义分支为空，跳过")
-
-            # 加载安全检查选项
-            if 'security_check' in config:
-                self.security_check_var.set(config['security_check'])
-                self.log("INFO", f"[配置加载] ✓ 安全检查: {config['security_check']}")
-            else:
-                self.log("DEBUG", "[配置加载] 安全检查选项不存在，跳过")
-
-            self.log("INFO", "[配置加载] ✓ 配置加载完成")
+            # 高级选项是全局的; 之后写盘时使用同一个 dict
+            self.options.update(self.config_store.options)
+            self.config_store.options = self.options
+            changed = {key: value for key, value in self.options.items()
+                       if value != ADVANCED_OPTION_DEFAULTS.get(key)}
+            self.log("DEBUG", f"[配置加载] 与默认值不同的高级选项: {changed or '无'}")
+
+            if self.config_store.active is not None:
+                self.apply_profile(self.config_store.get(self.config_store.active))
+            self.refresh_profile_picker()
+            self.log("INFO", f"[配置加载] ✓ 配置加载完成: {len(self.config_store.profiles)} 个仓库配置, "
+                             f"当前 '{self.config_store.active}'")
         except Exception as e:
             self.log("ERROR", f"[配置加载] 加载配置失败: {str(e)}")
             import traceback
             self.log("ERROR", f"[配置加载] 错误详情: {traceback.format_exc()}")
 
+    def on_profile_selected(self, event=None):
+        """切换仓库配置: 先保存当前界面参数, 再填入所选配置"""
+        name = self.profile_picker.get()
+        if not name or name == self.config_store.active:
+            return
+        current = self.collect_profile()
+        if current['repo_name']:
+            self.config_store.put(current)
+        fields = self.config_store.get(name)
+        self.apply_profile(fields)
+        self.config_store.put(fields)
+        self.refresh_profile_picker()
+        self.update_background_scanner(fields['code_path'])
+        self.log("INFO", f"切换到仓库配置 '{name}'")
+
+    def delete_profile(self):
+        """删除当前选中的仓库配置"""
+        name = self.profile_picker.get()
+        if not name:
+            return
+        if not messagebox.askyesno("删除配置", f"确定删除仓库配置 '{name}' 吗?"):
+            return
+        self.config_store.remove(name)
+        if self.config_store.active is not None:
+            fields = self.config_store.get(self.config_store.active)
+            self.apply_profile(fields)
+            self.update_background_scanner(fields['code_path'])
+        self.refresh_profile_picker()
+        self.log("INFO", f"已删除仓库配置 '{name}'")
+
     def log(self, level, message, data=None):
-        """记录日志"""
+        """记录日志 (可在任意线程调用)"""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_message = f"[{timestamp}] [{level}] {message}"
 
         if data:
             log_message += f" | {data}"
 
-        # 写入文件
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_message + '\n')
-        except Exception as e:
-            print(f"无法写入日志文件: {e}")
+        # 写入文件 (后台线程批量写入)
+        self.log_sink.write(log_message)
 
-        # 显示在界面
-        self.log_message(log_message)
+        # 显示在界面 (由主线程定时取出)
+        self.ui_log_queue.append(log_message)
+
+    def apply_log_options(self):
+        """按高级选项设置日志区域行数上限和日志文件轮转"""
+        self.log_view_lines = max(0, int(self.options.get('log_view_lines', 0) or 0))
+        # 界面来不及刷新时队列中也只保留最后 log_view_lines 条, 更早的反正会被删除
+        self.ui_log_queue = collections.deque(self.ui_log_queue, maxlen=self.log_view_lines or None)
+        self.log_sink.configure(**log_sink_options(self.options))
+
+    def _drain_log_queue(self):
+        """把积累的日志一次性插入日志区域 (在 Tk 主线程中定时执行)"""
+        lines = []
+        while self.ui_log_queue:
+            lines.append(self.ui_log_queue.popleft())
+        if lines:
+            self.log_message('\n'.join(lines))
+
+        try:
+            self.root.after(LOG_DRAIN_INTERVAL_MS, self._drain_log_queue)
+        except tk.TclError:
+            # 窗口已经关闭
+            pass
 
     def log_message(self, message):
-        """在日志区域显示消息"""
+        """在日志区域显示消息 (只能在 Tk 主线程调用)"""
         try:
             self.log_output.config(state=tk.NORMAL)
             self.log_output.insert(tk.END, message + '\n')
+            self._trim_log_view()
             self.log_output.config(state=tk.DISABLED)
             self.log_output.see(tk.END)
-            self.log_output.update_idletasks()
         except Exception as e:
             # 如果界面还未准备好，打印到控制台
             print(message)
 
+    def _trim_log_view(self):
+        """日志区域超过 log_view_lines 行时成批删除最早的行"""
+        limit = self.log_view_lines
+        if not limit:
+            return
+        # 文本末尾总有一个换行, end-1c 所在行号减一即为日志行数
+        lines = int(self.log_output.index('end-1c').split('.')[0]) - 1
+        if lines > limit:
+            excess = lines - int(limit * LOG_VIEW_TRIM_RATIO)
+            self.log_output.delete('1.0', f'{excess + 1}.0')
+
     def update_status(self, message, color='#555'):
-        """更新状态标签"""
-        self.status_label.config(text=message, foreground=color)
-        self.root.update_idletasks()
+        """更新状态标签 (可在任意线程调用)"""
+        self.ui_events.put(('status', message, color))
 
     def set_loading(self, loading):
-        """设置加载状态"""
-        if loading:
-            self.submit_btn.config(state='disabled')
-            self.progress.start(10)
-        else:
-            self.submit_btn.config(state='normal')
-            self.progress.stop()
+        """设置加载状态 (可在任意线程调用)"""
+        self.ui_events.put(('loading', loading))
+
+    def report_progress(self, snapshot):
+        """上报进度快照 (可在任意线程调用), 参见 ProgressTracker.snapshot"""
+        self.ui_events.put(('progress', snapshot))
+
+    def create_progress_tracker(self, stage, tracker_class=ProgressTracker, **options):
+        """创建一个把进度上报到界面的 ProgressTracker (或其子类)"""
+        return tracker_class(stage, report=self.report_progress, **options)
+
+    def show_dialog(self, kind, title, message, **options):
+        """在主线程中显示对话框, 工作线程会等待对话框关闭
+
+        Args:
+            kind: messagebox 中的函数名, 如 'showinfo'、'askyesno'
+
+        Returns:
+            对话框的返回值
+        """
+        if threading.current_thread() is threading.main_thread():
+            return getattr(messagebox, kind)(title, message, **options)
+
+        reply = {'done': threading.Event()}
+        self.ui_events.put(('dialog', kind, title, message, options, reply))
+        reply['done'].wait()
+        return reply.get('result')
+
+    def _pump_ui_events(self):
+        """在 Tk 主线程中批量处理工作线程发来的界面事件
+
+        状态、加载和进度事件在一批中只应用最后一个; 对话框按顺序显示,
+        显示之前先应用它前面的状态变化。
+        """
+        pending = {}
+        while True:
+            try:
+                event = self.ui_events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'dialog':
+                self._apply_ui_state(pending)
+                pending = {}
+                kind, title, message, options, reply = event[1:]
+                try:
+                    reply['result'] = getattr(messagebox, kind)(title, message, **options)
+                finally:
+                    reply['done'].set()
+            else:
+                pending[event[0]] = event[1:]
+        self._apply_ui_state(pending)
+
+        try:
+            self.root.after(UI_PUMP_INTERVAL_MS, self._pump_ui_events)
+        except tk.TclError:
+            # 窗口已经关闭
+            pass
+
+    def _apply_ui_state(self, pending):
+        """应用合并后的状态/加载/进度事件"""
+        if 'loading' in pending:
+            loading, = pending['loading']
+            if loading:
+                self.submit_btn.config(state='disabled')
+                self.progress.config(mode='indeterminate', value=0)
+                self.progress.start(10)
+            else:
+                self.submit_btn.config(state='normal')
+                self.progress.stop()
+                self.progress.config(mode='indeterminate', value=0)
+                self.progress_label.config(text="")
+
+        if 'status' in pending:
+            message, color = pending['status']
+            self.status_label.config(text=message, foreground=color)
+
+        if 'progress' in pending:
+            snapshot, = pending['progress']
+            total = snapshot.get('files_total', 0)
+            if total:
+                # 工作量已知: 切换为确定进度
+                if str(self.progress.cget('mode')) != 'determinate':
+                    self.progress.stop()
+                    self.progress.config(mode='determinate')
+                self.progress.config(maximum=total, value=snapshot['files_done'])
+                text = snapshot.get('text') or (f"{snapshot['stage']}: {snapshot['files_done']}/{total} 个文件 | "
+                                                f"{snapshot['bytes_done'] / 1024 / 1024:.1f} MB | "
+                                                f"{snapshot['files_per_sec']:.0f} 文件/秒")
+            else:
+                text = snapshot.get('text') or f"当前阶段: {snapshot['stage']}"
+            self.progress_label.config(text=text)
 
     def on_submit(self):
         """提交按钮点击事件"""
-        # 保存当前参数
+        # 保存当前参数 (只修改内存中的配置, 写盘在后台延迟进行)
         self.save_config()
 
         # 获取输入
@@ -463,469 +4064,319 @@ class GitGuiApp:
 
         # 获取安全检查选项
         enable_security_check = self.security_check_var.get()
+        scan_staged_only = self.scan_staged_only_var.get()
+
+        self.update_background_scanner(code_path)
 
         # 在新线程中执行
         thread = threading.Thread(target=self.execute_git_operations,
-                                 args=(repo_url, commit_msg, code_path, enable_security_check, target_branch))
+                                 args=(repo_url, commit_msg, code_path, enable_security_check, target_branch,
+                                       scan_staged_only))
         thread.daemon = True
         thread.start()
 
-    def cleanup_temp_files(self, code_path):
-        """清理可能导致 Git 操作失败的临时文件
-
-        Args:
-            code_path: 代码路径
-
-        Returns:
-            list: 被删除的文件列表
-        """
-        import os
-        deleted_files = []
-
-        # Windows 保留设备名列表(会导致 Git 失败)
-        windows_reserved_names = ['nul', 'con', 'prn', 'aux', 'com1', 'com2', 'com3', 'com4',
-                                  'com5', 'com6', 'com7', 'com8', 'com9', 'lpt1', 'lpt2',
-                                  'lpt3', 'lpt4', 'lpt5', 'lpt6', 'lpt7', 'lpt8', 'lpt9']
-
-        try:
-            # 遍历代码目录
-            for root, dirs, files in os.walk(code_path):
-                # 跳过 .git 目录
-                if '.git' in dirs:
-                    dirs.remove('.git')
-
-                # 跳过常见的虚拟环境和依赖目录
-                skip_dirs = {'node_modules', 'venv', '.venv', 'env', '__pycache__', 'dist', 'build'}
-                dirs[:] = [d for d in dirs if d not in skip_dirs]
-
-                # 检查并删除临时文件
-                for file in files:
-                    file_lower = file.lower()
-
-                    # 1. Windows 保留设备名
-                    if file_lower in windows_reserved_names:
-                        file_path = os.path.join(root, file)
-                        try:
-                            os.remove(file_path)
-                            deleted_files.append(file_path)
-                            self.log("INFO", f"已删除 Windows 保留设备名文件: {file_path}")
-                        except Exception as e:
-                            # 如果无法删除,添加到 .gitignore
-                            self.log("WARN", f"无法删除 {file_path}: {str(e)}")
-                            self._add_to_gitignore(code_path, file)
-                            self.log("INFO", f"已将 {file} 添加到 .gitignore")
-
-                    # 2. 常见的临时文件模式
-                    temp_patterns = ['~$', '.tmp', '.temp', '.bak', '.swp', '.DS_Store',
-                                   'Thumbs.db', '.log', '.cache']
-
-                    if any(file_lower.endswith(pattern) for pattern in temp_patterns):
-                        file_path = os.path.join(root, file)
-                        try:
-                            os.remove(file_path)
-                            deleted_files.append(file_path)
-                            self.log("DEBUG", f"已删除临时文件: {file_path}")
-                        except Exception as e:
-                            self.log("DEBUG", f"无法删除临时文件 {file_path}: {str(e)}")
-
-        except Exception as e:
-            self.log("WARN", f"清理临时文件时出错: {str(e)}")
-
-        return deleted_files
-
-    def _add_to_gitignore(self, code_path, filename):
-        """将文件添加到 .gitignore
-
-        Args:
-            code_path: 代码路径
-            filename: 要忽略的文件名
-        """
-        import os
-        gitignore_path = os.path.join(code_path, '.gitignore')
-
-        try:
-            # 读取现有的 .gitignore 内容
-            existing_entries = set()
-            if os.path.exists(gitignore_path):
-                with open(gitignore_path, 'r', encoding='utf-8') as f:
-                    existing_entries = set(line.strip() for line in f if line.strip())
-
-            # 如果文件名不在 .gitignore 中,添加它
-            if filename not in existing_entries:
-                with open(gitignore_path, 'a', encoding='utf-8') as f:
-                    # 如果文件不为空且最后一行没有换行符,先添加换行
-                    if os.path.getsize(gitignore_path) > 0:
-                        f.write('\n')
-                    f.write(f'{filename}\n')
-        except Exception as e:
-            self.log("DEBUG", f"更新 .gitignore 失败: {str(e)}")
-
-    def ensure_gitignore_exists(self, code_path):
-        """确保项目中存在 .gitignore 文件
-        注意: 如果项目已有 .gitignore,则保持不变,不做任何修改
-
-        Args:
-            code_path: 项目根目录路径
-        """
-        import os
-        gitignore_path = os.path.join(code_path, '.gitignore')
-
-        try:
-            # 检查 .gitignore 是否存在
-            if os.path.exists(gitignore_path):
-                self.log("INFO", f"✓ .gitignore 已存在,保持不变: {gitignore_path}")
-            else:
-                # 创建 .gitignore 文件
-                self.log("INFO", f"创建 .gitignore 文件: {gitignore_path}")
-
-                default_gitignore_content = """# 忽略可执行文件
-*.exe
-*.app
-*.out
-
-# Python
-__pycache__/
-*.py[cod]
-*$py.class
-*.so
-.Python
-venv/
-env/
-.venv
-
-# Node.js
-node_modules/
-npm-debug.log*
-
-# 日志文件
-*.log
-logs/
-
-# 临时文件
-*.tmp
-*.bak
-*.swp
-*~
-.DS_Store
-Thumbs.db
-
-# IDE
-.vscode/
-.idea/
-*.suo
-*.user
-
-# 构建产物
-dist/
-build/
-*.spec
-"""
-
-                with open(gitignore_path, 'w', encoding='utf-8') as f:
-                    f.write(default_gitignore_content)
-
-                self.log("INFO", "✓ .gitignore 文件创建成功 (包含 *.exe 等常见规则)")
-
-        except Exception as e:
-            self.log("WARN", f"创建/检查 .gitignore 失败: {str(e)}")
-
-    def execute_git_operations(self, repo_url, commit_msg, code_path, enable_security_check=True, target_branch="main"):
-        """执行 Git 操作"""
-        try:
-            self.set_loading(True)
-            self.log("INFO", "开始执行 Git 提交操作")
-
-            # 步骤0: 清理临时文件
-            self.update_status("正在清理临时文件...", "#0066cc")
-            self.log("INFO", "执行: 清理临时文件")
-            deleted_files = self.cleanup_temp_files(code_path)
-            if deleted_files:
-                self.log("INFO", f"已清理 {len(deleted_files)} 个临时文件")
-            else:
-                self.log("INFO", "没有需要清理的临时文件")
-
-            # 步骤0.5: 确保 .gitignore 文件存在
-            self.update_status("正在检查 .gitignore...", "#0066cc")
-            self.log("INFO", "执行: 检查/创建 .gitignore")
-            self.ensure_gitignore_exists(code_path)
-
-            # 步骤1: 安全检查（如果启用）
-            if enable_security_check:
-                self.update_status("正在执行安全检查...", "#0066cc")
-                self.log("INFO", "执行安全检查...")
-                security_issues = self.scan_for_sensitive_data(code_path)
-
-                if security_issues:
-                    self.set_loading(False)
-
-                    # 显示安全问题
-                    issue_text = "检测到敏感信息，为了安全起见，请先移除或替换以下内容后再提交：\n\n"
-                    for issue in security_issues[:10]:  # 只显示前10个
-                        issue_text += f"• 类型: {issue['category']}\n"
-                        issue_text += f"  文件: {issue['file']}\n"
-                        issue_text += f"  内容: {issue['match'][:80]}...\n\n"
-
-                    if len(security_issues) > 10:
-                        issue_text += f"\n... 还有 {len(security_issues) - 10} 个问题未显示"
-
-                    messagebox.showwarning("安全警告", issue_text)
-                    self.update_status("安全检查失败", "#cc0000")
-                    self.log("WARN", f"发现 {len(security_issues)} 个安全问题")
-                    return
-
-                self.log("INFO", "安全检查通过")
-            else:
-                self.log("INFO", "安全检查已跳过")
-
-            self.update_status("正在执行 Git 操作...", "#0066cc")
-
-            # 步骤2: 执行 Git 命令
-            commands = [
-                ('检查 Git 仓库', f'cd "{code_path}" && (git rev-parse --git-dir >nul 2>&1 || git init)'),
-                ('添加文件', f'cd "{code_path}" && git add .'),
-                ('提交更改', f'cd "{code_path}" && git commit -m "{commit_msg}"'),
-                ('添加远程仓库', f'cd "{code_path}" && (git remote add origin {repo_url} >nul 2>&1 || git remote set-url origin {repo_url} >nul 2>&1)'),
-            ]
-
-            # 执行前面的命令
-            for desc, cmd in commands:
-                self.log("INFO", f"执行: {desc}")
-                self.log("COMMAND", f"$ {cmd}")  # 显示完整命令
-                self.update_status(f"正在{desc}...", "#0066cc")
-
-                result = subprocess.run(cmd,
-                                      shell=True,
-                                      capture_output=True,
-                                      text=True,
-                                      encoding='utf-8',
-                                      errors='replace')
-
-                if result.stdout:
-                    self.log("DEBUG", result.stdout.strip())
-
-                if result.stderr:
-                    error_output = result.stderr.strip()
-                    # 忽略某些警告和信息
-                    if "nothing to commit" in error_output.lower():
-                        self.log("INFO", "没有新的更改需要提交")
-                        messagebox.showinfo("提示", "没有新的更改需要提交")
-                        self.set_loading(False)
-                        self.update_status("完成", "#009900")
-                        return
-                    elif "warning:" in error_output.lower():
-                        # 警告信息，记录但不抛出异常
-                        self.log("DEBUG", f"警告: {error_output}")
-                    elif "fatal:" in error_output or "error:" in error_output.lower():
-                        # 处理所有致命错误和错误（除了 warning）
-                        raise Exception(f"Git 命令失败: {error_output}")
-
-            # 步骤3: 检查远程分支是否存在
-            self.update_status("正在检查远程分支...", "#0066cc")
-            self.log("INFO", f"检查远程分支 '{target_branch}' 是否存在")
-
-            # 先确保远程仓库信息是最新的
-            fetch_cmd = f'cd "{code_path}" && git fetch origin'
-            self.log("COMMAND", f"$ {fetch_cmd}")
-            fetch_result = subprocess.run(fetch_cmd,
-                                         shell=True,
-                                         capture_output=True,
-                                         text=True,
-                                         encoding='utf-8',
-                                         errors='replace')
-
-            # 检查远程分支是否存在
-            check_branch_cmd = f'cd "{code_path}" && git rev-parse --verify origin/{target_branch}'
-            self.log("COMMAND", f"$ {check_branch_cmd}")
-            check_result = subprocess.run(check_branch_cmd,
-                                        shell=True,
-                                        capture_output=True,
-                                        text=True,
-                                        encoding='utf-8',
-                                        errors='replace')
-
-            if check_result.returncode != 0:
-                # 远程分支不存在,询问用户是否创建
-                self.set_loading(False)  # 暂时停止加载状态以便显示对话框
-                self.log("WARN", f"远程分支 '{target_branch}' 不存在")
-
-                question_msg = f"远程仓库中不存在分支 '{target_branch}'。\n\n是否要创建并推送该分支?"
-                result = messagebox.askyesno("创建分支", question_msg, icon='question')
-
-                if not result:
-                    # 用户选择不创建
-                    self.log("INFO", "用户取消创建分支")
-                    self.update_status("操作已取消", "#cc0000")
-                    return
-
-                # 用户确认创建分支
-                self.log("INFO", f"用户确认创建远程分支 '{target_branch}'")
-                self.set_loading(True)  # 恢复加载状态
-
-            self.log("INFO", f"远程分支 '{target_branch}' 准备就绪")
-
-            # 获取当前分支名
-            get_branch_cmd = f'cd "{code_path}" && git rev-parse --abbrev-ref HEAD'
-            self.log("COMMAND", f"$ {get_branch_cmd}")
-            branch_result = subprocess.run(get_branch_cmd,
-                                         shell=True,
-                                         capture_output=True,
-                                         text=True,
-                                         encoding='utf-8',
-                                         errors='replace')
-            current_branch = branch_result.stdout.strip() or "master"
-            self.log("INFO", f"当前本地分支: {current_branch}")
-
-            # 步骤4: 推送到远程仓库的指定分支(如果不存在会自动创建)
-            push_cmd = f'cd "{code_path}" && git push -u origin {current_branch}:{target_branch}'
-            branch_action = "创建并推送" if check_result.returncode != 0 else "推送到"
-            self.log("INFO", f"执行: {branch_action}远程分支 '{target_branch}'")
-            self.log("COMMAND", f"$ {push_cmd}")
-            self.update_status(f"正在{branch_action} {target_branch} 分支...", "#0066cc")
-
-            result = subprocess.run(push_cmd,
-                                  shell=True,
-                                  capture_output=True,
-                                  text=True,
-                                  encoding='utf-8',
-                                  errors='replace')
-
-            if result.stdout:
-                self.log("DEBUG", result.stdout.strip())
-
-            if result.stderr:
-                error_output = result.stderr.strip()
-                # 忽略警告，只处理真正的错误
-                if "warning:" in error_output.lower():
-                    self.log("DEBUG", f"警告: {error_output}")
-                elif "fatal:" in error_output or ("error:" in error_output.lower() and "short read" not in error_output.lower()):
-                    raise Exception(f"Git 命令失败: {error_output}")
-
-            # 成功
-            self.log("INFO", "Git 操作成功完成")
-            self.update_status("提交成功！", "#009900")
-            messagebox.showinfo("成功", "代码已成功提交到 GitHub！")
-
-        except Exception as e:
-            error_msg = str(e)
-            self.log("ERROR", error_msg)
-            self.update_status("操作失败", "#cc0000")
-            messagebox.showerror("错误", f"操作失败：\n{error_msg}")
-
-        finally:
-            self.set_loading(False)
-
-    def scan_for_sensitive_data(self, dir_path):
-        """扫描敏感数据"""
-        issues = []
-
-        # 敏感信息模式
-        patterns = {
-            'API Key': [
-                r'api[_-]?key\s*[=:]\s*["\']?[a-zA-Z0-9_-]{20,}["\']?',
-                r'["\']sk_[a-zA-Z0-9_-]{20,}["\']',  # OpenAI
-                r'["\']AKIA[0-9A-Z]{16}["\']',  # AWS
-            ],
-            '密码': [
-                r'password\s*[=:]\s*["\'][^"\']{4,}["\']',
-                r'passwd\s*[=:]\s*["\'][^"\']{4,}["\']',
-            ],
-            'Token': [
-                r'token\s*[=:]\s*["\'][a-zA-Z0-9_-]{20,}["\']',
-                r'bearer\s+[a-zA-Z0-9_-]{20,}',
-            ],
-            '私钥': [
-                r'-----BEGIN\s+RSA\s+PRIVATE\s+KEY-----',
-                r'-----BEGIN\s+OPENSSH\s+PRIVATE\s+KEY-----',
-            ],
-            '数据库连接': [
-                r'mongodb://[^@]+@',
-                r'mysql://[^:]+:[^@]+@',
-            ],
-        }
-
-        # 忽略的目录
-        ignore_dirs = {'node_modules', '.git', 'venv', '__pycache__',
-                      'dist', 'build', '.venv', 'target', 'bin', 'obj'}
-
-        # 支持的文件扩展
-        text_extensions = {'.js', '.ts', '.py', '.java', '.go', '.rs',
-                          '.c', '.cpp', '.h', '.php', '.rb', '.swift',
-                          '.json', '.xml', '.yaml', '.yml', '.toml',
-                          '.env', '.txt', '.md', '.sh', '.bash'}
-
-        try:
-            for root, dirs, files in os.walk(dir_path):
-                # 过滤忽略的目录
-                dirs[:] = [d for d in dirs if d not in ignore_dirs]
-
-                for file in files:
-                    file_path = Path(root) / file
-                    ext = file_path.suffix.lower()
-
-                    # 只扫描文本文件
-                    if ext not in text_extensions and file != '.env' and file != 'Dockerfile':
-                        continue
-
-                    try:
-                        content = file_path.read_text(encoding='utf-8', errors='ignore')
-
-                        for category, regex_list in patterns.items():
-                            for pattern in regex_list:
-                                matches = re.finditer(pattern, content, re.IGNORECASE)
-                                for match in matches:
-                                    matched_text = match.group()
-
-                                    # 排除假阳性
-                                    # 1. 示例和占位符
-                                    if any(keyword in matched_text.lower()
-                                          for keyword in ['your_', 'replace_', 'example',
-                                                         'xxxxx', '*****', 'your_api_key',
-                                                         '<username>', '<password>']):
-                                        continue
-
-                                    # 2. Python 代码中的正则表达式定义
-                                    # 检查是否匹配了代码中的正则表达式模式字符串
-                                    # 特征: 包含 [^ 说明是正则字符类
-                                    if '[^' in matched_text:
-                                        # 检查源代码中匹配位置前后的字符
-                                        start_pos = match.start()
-                                        end_pos = match.end()
-
-                                        # 获取上下文（前后各5个字符）
-                                        context_start = max(0, start_pos - 5)
-                                        context_end = min(len(content), end_pos + 5)
-                                        context = content[context_start:context_end]
-
-                                        # 如果上下文中包含引号或r前缀，说明是正则定义
-                                        if "'" in context or '"' in context or "r'" in context or 'r"' in context:
-                                            continue
-
-                                    issues.append({
-                                        'category': category,
-                                        'file': str(file_path.relative_to(dir_path)),
-                                        'match': matched_text[:100]
-                                    })
-
-                    except Exception as e:
-                        self.log("DEBUG", f"无法读取文件 {file_path}: {e}")
-
-        except Exception as e:
-            self.log("ERROR", f"扫描目录失败: {e}")
-
-        return issues
-
     def on_closing(self):
         """窗口关闭事件处理"""
-        # 保存当前参数
+        # 保存当前参数, 并立即写入尚未写盘的修改
         self.save_config()
+        self.config_store.flush()
+        if self.background_scanner is not None:
+            self.background_scanner.stop()
+        # 写完缓冲的日志
+        self.log_sink.close()
         # 关闭窗口
         self.root.destroy()
 
+# 批量模式下每个仓库可以设置的字段及默认值
+BATCH_REPO_DEFAULTS = {
+    'name': None,
+    'code_path': None,
+    'repo_url': None,
+    'repo_name': None,
+    'commit_msg': None,
+    'target_branch': 'main',
+    'security_check': True,
+    'scan_staged_only': False,
+    'create_branch': True,
+}
+
+
+def load_batch_manifest(manifest_path):
+    """读取批量提交清单
+
+    清单格式:
+        {
+          "concurrency": 4,
+          "defaults": {"commit_msg": "nightly sync", "target_branch": "main"},
+          "options": {"scan_cache": true},
+          "repos": [{"code_path": "D:/work/a", "repo_name": "a"}, ...]
+        }
+    也可以直接是仓库列表。仓库地址取 repo_url, 或者像界面一样由 repo_name 拼出。
+
+    Returns:
+        tuple: (仓库列表, 并发数或 None, 高级选项)
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'repos': manifest}
+
+    defaults = dict(BATCH_REPO_DEFAULTS)
+    defaults.update(manifest.get('defaults', {}))
+
+    repos = []
+    for index, entry in enumerate(manifest.get('repos', [])):
+        repo = dict(defaults)
+        repo.update(entry)
+        if not repo['code_path']:
+            raise ValueError(f"第 {index + 1} 个仓库缺少 code_path")
+        if not repo['repo_url']:
+            if not repo['repo_name']:
+                raise ValueError(f"仓库 {repo['code_path']} 缺少 repo_url 或 repo_name")
+            repo['repo_url'] = f"git@github.com:bethzyy/{repo['repo_name']}.git"
+        if not repo['commit_msg']:
+            raise ValueError(f"仓库 {repo['code_path']} 缺少 commit_msg")
+        repo['name'] = repo['name'] or repo['repo_name'] or os.path.basename(os.path.normpath(repo['code_path']))
+        repos.append(repo)
+
+    return repos, manifest.get('concurrency'), manifest.get('options', {})
+
+
+def run_batch_repo(repo, options, log_dir, log_sink, echo_levels):
+    """在当前线程中对一个仓库执行完整的提交流程
+
+    Returns:
+        dict: 仓库名、结果、错误信息和各阶段耗时
+    """
+    pipeline = GitPipeline(options, log_dir, log_sink, name=repo['name'],
+                           echo_levels=echo_levels, assume_yes=repo['create_branch'])
+    start = time.perf_counter()
+    if os.path.isdir(repo['code_path']):
+        outcome = pipeline.execute_git_operations(repo['repo_url'], repo['commit_msg'], repo['code_path'],
+                                                  repo['security_check'], repo['target_branch'],
+                                                  repo['scan_staged_only'])
+    else:
+        outcome = 'failed'
+        pipeline.last_error = f"代码路径不存在: {repo['code_path']}"
+        pipeline.log("ERROR", pipeline.last_error)
+    return {
+        'name': repo['name'],
+        'code_path': repo['code_path'],
+        'outcome': outcome,
+        'error': pipeline.last_error,
+        'elapsed': round(time.perf_counter() - start, 3),
+        'stages': [[stage, round(elapsed, 3)] for stage, elapsed in pipeline.stage_timer.timings],
+    }
+
+
+def batch_main(argv):
+    """批量模式: python git_gui_app.py batch manifest.json [-j N]
+
+    多个仓库在线程池中并发执行, 每个仓库的 git 子进程互不等待;
+    结束后打印每个仓库的结果和阶段耗时, 并把汇总写入 logs 目录。
+
+    Returns:
+        int: 退出码, 所有仓库都成功 (或没有改动) 时为 0
+    """
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    parser = argparse.ArgumentParser(prog='git_gui_app.py batch', description='批量提交并推送多个仓库')
+    parser.add_argument('manifest', help='批量提交清单 (JSON)')
+    parser.add_argument('-j', '--jobs', type=int, help='同时处理的仓库数, 默认取清单中的 concurrency')
+    parser.add_argument('-v', '--verbose', action='store_true', help='在控制台显示每个步骤的日志')
+    args = parser.parse_args(argv)
+
+    try:
+        repos, concurrency, manifest_options = load_batch_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"无法读取批量提交清单: {e}", file=sys.stderr)
+        return 2
+
+    jobs = max(1, args.jobs or concurrency or min(4, os.cpu_count() or 1))
+    options = dict(ADVANCED_OPTION_DEFAULTS)
+    # 多个仓库同时扫描时平分 CPU, 避免每个仓库都按核数开进程池
+    options['scan_workers'] = max(1, (os.cpu_count() or 1) // jobs)
+    options.update(manifest_options)
+
+    log_dir = Path(get_app_base_dir()) / "logs"
+    log_sink = LogSink(log_dir, **log_sink_options(options))
+    echo_levels = ('INFO', 'WARN', 'ERROR') if args.verbose else ('WARN', 'ERROR')
+
+    print(f"批量提交 {len(repos)} 个仓库, 并发 {jobs}")
+    start = time.perf_counter()
+    results = [None] * len(repos)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(run_batch_repo, repo, options, log_dir, log_sink, echo_levels): index
+                   for index, repo in enumerate(repos)}
+        for future in as_completed(futures):
+            result = results[futures[future]] = future.result()
+            print(f"[{result['outcome']}] {result['name']} ({result['elapsed']:.2f}s)", flush=True)
+    elapsed = time.perf_counter() - start
+
+    # 汇总: 每个仓库一行, 按清单顺序
+    print("")
+    print("仓库汇总:")
+    for result in results:
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in result['stages'])
+        line = f"  {result['name']:<24} {result['outcome']:<10} {result['elapsed']:>7.2f}s  {stages}"
+        if result['error']:
+            line += f"  错误: {result['error']}"
+        print(line)
+
+    counts = collections.Counter(result['outcome'] for result in results)
+    print(f"共用时 {elapsed:.2f} 秒: " + ', '.join(f"{outcome} {count}" for outcome, count in sorted(counts.items())))
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    summary_file = log_dir / f"batch-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    try:
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump({'manifest': os.path.abspath(args.manifest), 'jobs': jobs,
+                       'elapsed': round(elapsed, 3), 'repos': results}, f, ensure_ascii=False, indent=2)
+        print(f"汇总已写入: {summary_file}")
+    except OSError as e:
+        print(f"无法写入汇总文件: {e}", file=sys.stderr)
+
+    log_sink.close()
+    return 0 if all(result['outcome'] in ('success', 'no_changes') for result in results) else 1
+
+
+def baseline_main(argv):
+    """重新生成基线: python git_gui_app.py baseline <代码路径> [--history] [--config 配置文件]
+
+    扫描代码目录 (--history 时还有尚未推送的提交), 把当前所有问题作为已接受的问题写入 .gitgui-baseline.json。
+    不带 --history 时保留原基线中来自历史提交的条目, 否则之后的历史扫描会重新报告它们。
+    扫描使用配置文件中的高级选项 (如 respect_gitignore、entropy_scan), 与界面提交时一致。
+
+    Returns:
+        int: 退出码
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='git_gui_app.py baseline',
+                                     description=f'把当前扫描到的问题记为已接受 (写入 {BASELINE_FILE_NAME})')
+    parser.add_argument('code_path', help='代码路径')
+    parser.add_argument('--history', action='store_true', help='同时接受尚未推送的历史提交中的问题')
+    parser.add_argument('--config', help=f'读取高级选项的配置文件, 默认为应用目录下的 {CONFIG_FILE_NAME}')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.code_path):
+        print(f"代码路径不存在: {args.code_path}", file=sys.stderr)
+        return 2
+
+    try:
+        options = load_saved_options(args.config)
+    except (OSError, ValueError) as e:
+        print(f"无法读取配置文件: {e}", file=sys.stderr)
+        return 2
+
+    log_dir = Path(get_app_base_dir()) / "logs"
+    log_sink = LogSink(log_dir, **log_sink_options(options))
+    pipeline = GitPipeline(options, log_dir, log_sink, echo_levels=('WARN', 'ERROR'))
+    issues = pipeline.scan_for_sensitive_data(args.code_path)
+    history_issues = []
+    if args.history:
+        try:
+            history_issues = pipeline.scan_unpushed_history(GitRunner(args.code_path))
+        except Exception as e:
+            print(f"无法扫描历史提交: {e}", file=sys.stderr)
+            log_sink.close()
+            return 1
+    log_sink.close()
+
+    baseline = FindingBaseline.for_path(args.code_path)
+    kept = []
+    if not args.history:
+        previous = FindingBaseline(baseline.path)
+        try:
+            previous.load()
+        except (OSError, ValueError) as e:
+            print(f"无法读取原基线文件, 不保留其中的历史条目: {e}", file=sys.stderr)
+        kept = previous.history_entries()
+    for issue in issues:
+        baseline.add(issue)
+    # 同时出现在当前代码中的问题已在上面加入, 其余的才标记为历史条目
+    for issue in history_issues:
+        baseline.add(issue, history=True)
+    kept = [entry for entry in kept if entry['fingerprint'] not in baseline.fingerprints]
+    baseline.entries += kept
+    baseline.fingerprints.update(entry['fingerprint'] for entry in kept)
+    baseline.save()
+    issues += history_issues
+
+    for category, count in sorted(collections.Counter(issue['category'] for issue in issues).items()):
+        print(f"  {category}: {count}")
+    if kept:
+        print(f"  保留原基线中来自历史提交的条目: {len(kept)}")
+    print(f"已把 {len(baseline.entries)} 个问题写入基线: {baseline.path}")
+    return 0
+
+
+def cleanup_main(argv):
+    """清理临时文件: python git_gui_app.py cleanup <代码路径> [--dry-run] [--all-files] [--config 配置文件]
+
+    Returns:
+        int: 退出码
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='git_gui_app.py cleanup', description='清理临时文件和 Windows 保留设备名文件')
+    parser.add_argument('code_path', help='代码路径')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='只列出将被删除的文件, 不实际删除')
+    parser.add_argument('--all-files', action='store_true', help='检查全部文件 (包括已跟踪的文件), 而不只是未跟踪文件')
+    parser.add_argument('--config', help=f'读取高级选项的配置文件, 默认为应用目录下的 {CONFIG_FILE_NAME}')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.code_path):
+        print(f"代码路径不存在: {args.code_path}", file=sys.stderr)
+        return 2
+
+    try:
+        options = load_saved_options(args.config)
+    except (OSError, ValueError) as e:
+        print(f"无法读取配置文件: {e}", file=sys.stderr)
+        return 2
+
+    log_dir = Path(get_app_base_dir()) / "logs"
+    log_sink = LogSink(log_dir, **log_sink_options(options))
+    pipeline = GitPipeline(options, log_dir, log_sink, echo_levels=('WARN', 'ERROR'))
+    files = pipeline.cleanup_temp_files(args.code_path, untracked_only=not args.all_files, dry_run=args.dry_run)
+    log_sink.close()
+
+    for file_path in files:
+        reason = "Windows 保留设备名" if classify_cleanup_name(os.path.basename(file_path)) == 'reserved' else "临时文件"
+        print(f"  {reason}: {os.path.relpath(file_path, args.code_path)}")
+    action = "将删除" if args.dry_run else "已删除"
+    print(f"{action} {len(files)} 个文件")
+    return 0
+
+
+# 命令行子命令, 不带子命令时启动图形界面
+COMMANDS = {
+    'batch': batch_main,
+    'baseline': baseline_main,
+    'cleanup': cleanup_main,
+}
+
+
 def main():
     """主函数"""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     root = tk.Tk()
     app = GitGuiApp(root)
+    if os.environ.get('GITGUI_STARTUP_PROBE'):
+        # 启动测量 (scripts/benchmark.py startup): 窗口首次空闲时输出耗时并退出
+        def report_ready():
+            print(f"STARTUP_READY {time.perf_counter() - STARTUP_T0:.6f}", flush=True)
+            root.destroy()
+        root.after_idle(report_ready)
     root.mainloop()
 
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # 打包成 EXE 后进程池的子进程需要 (未打包时 freeze_support 不起作用)
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
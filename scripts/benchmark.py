@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+
+生成可配置的合成代码树 (文件数、大小分布、扩展名比例、目录深度、敏感信息密度),
+分别计时 cleanup_temp_files、scan_for_sensitive_data 以及对本地裸仓库的完整提交/推送流程,
+结果写入 JSON 文件, 可以与之前的结果对比并按阈值判断是否变慢。
+
+startup 项在子进程中测量模块导入时间 (-X importtime) 和首个窗口出现的时间,
+超过 --startup-budget 时同样返回非零退出码。没有图形界面时跳过窗口测量。
+
+用法:
+    python scripts/benchmark.py --files 5000 --output bench.json
+    python scripts/benchmark.py --files 5000 --output new.json --baseline bench.json --threshold 0.2
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import shutil
+import string
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import datetime
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import git_gui_app
+from git_gui_app import GitPipeline, LogSink, ADVANCED_OPTION_DEFAULTS
+
+
+# 主程序路径 (启动测量在子进程中运行)
+APP_SCRIPT = Path(__file__).parent.parent / 'git_gui_app.py'
+
+# 默认的扩展名比例 (权重), .png 不会被扫描, .tmp/.log/.bak 会被清理
+DEFAULT_EXT_MIX = 'py=30,js=20,ts=10,json=8,md=8,yaml=4,txt=5,go=5,png=5,tmp=2,log=2,bak=1'
+
+# 生成普通代码行用的词汇
+WORDS = ['value', 'result', 'count', 'items', 'config', 'handler', 'request', 'response',
+         'data', 'index', 'buffer', 'status', 'message', 'user', 'path', 'options']
+
+
+def parse_ext_mix(text):
+    """'py=30,js=20' -> [('.py', 30), ('.js', 20)]"""
+    mix = []
+    for part in text.split(','):
+        ext, _, weight = part.strip().partition('=')
+        mix.append(('.' + ext.lstrip('.'), float(weight or 1)))
+    return mix
+
+
+def random_token(rng, length, alphabet=string.ascii_letters + string.digits):
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def make_secret(rng):
+    """生成一条会被扫描规则命中的敏感信息"""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f'api_key = "{random_token(rng, 32)}"'
+    if kind == 1:
+        return f'aws_key = "AKIA{random_token(rng, 16, string.ascii_uppercase + string.digits)}"'
+    if kind == 2:
+        return f'password = "{random_token(rng, 12)}"'
+    return f'token = "{random_token(rng, 40)}"'
+
+
+def make_text(rng, size):
+    """生成大约 size 字节的普通代码文本"""
+    lines = []
+    total = 0
+    while total < size:
+        line = f"{rng.choice(WORDS)}_{rng.randrange(1000)} = {rng.choice(WORDS)}({rng.randrange(100)})  # {rng.choice(WORDS)}"
+        lines.append(line)
+        total += len(line) + 1
+    return lines
+
+
+def generate_tree(root, files=2000, mean_size=4096, size_sigma=1.0, max_size=1024 * 1024,
+                  depth=4, fanout=6, ext_mix=DEFAULT_EXT_MIX, secret_density=0.01, seed=42):
+    """生成合成代码树
+
+    Args:
+        root: 目标目录 (会被清空)
+        files: 文件数
+        mean_size: 文件大小的中位数 (字节), 按对数正态分布生成
+        size_sigma: 对数正态分布的 sigma, 越大大小差异越大
+        max_size: 单个文件大小上限
+        depth: 目录最大深度
+        fanout: 每层子目录数
+        ext_mix: 扩展名比例, 如 'py=30,js=20'
+        secret_density: 含有敏感信息的文本文件比例
+        seed: 随机种子, 相同参数生成相同的树
+
+    Returns:
+        dict: 生成结果统计 (文件数、总字节数、植入的敏感信息数、临时文件数)
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+
+    # 目录: 随机深度的路径, 同一父目录下最多 fanout 个子目录
+    dirs = [Path('.')]
+    for _ in range(max(1, files // 20)):
+        parent = Path('.')
+        for _ in range(rng.randint(0, depth)):
+            parent = parent / f"{rng.choice(WORDS)}{rng.randrange(fanout)}"
+        dirs.append(parent)
+
+    mix = parse_ext_mix(ext_mix)
+    extensions = [ext for ext, _ in mix]
+    weights = [weight for _, weight in mix]
+    scannable = git_gui_app.SCAN_TEXT_EXTENSIONS
+    temp_suffixes = ('.tmp', '.temp', '.bak', '.swp', '.log', '.cache')
+
+    stats = {'files': 0, 'bytes': 0, 'secrets': 0, 'temp_files': 0}
+    for index in range(files):
+        ext = rng.choices(extensions, weights)[0]
+        size = min(max_size, max(16, int(rng.lognormvariate(0, size_sigma) * mean_size)))
+        directory = root / rng.choice(dirs)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{rng.choice(WORDS)}_{index}{ext}"
+
+        if ext in scannable or ext in temp_suffixes:
+            lines = make_text(rng, size)
+            if ext in scannable and rng.random() < secret_density:
+                lines.insert(rng.randrange(len(lines) + 1), make_secret(rng))
+                stats['secrets'] += 1
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+        else:
+            data = rng.randbytes(size)
+
+        path.write_bytes(data)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+        if ext in temp_suffixes:
+            stats['temp_files'] += 1
+
+    return stats
+
+
+def plant_temp_files(root, count, seed=7):
+    """在代码树中放入 count 个临时文件 (清理基准每轮都会删除它们)"""
+    rng = random.Random(seed)
+    directories = [Path(dirpath) for dirpath, _, _ in os.walk(root) if '.git' not in Path(dirpath).parts]
+    for index in range(count):
+        suffix = rng.choice(('.tmp', '.bak', '.swp', '.log', '.cache'))
+        (rng.choice(directories) / f"scratch_{index}{suffix}").write_text('temp\n', encoding='utf-8')
+
+
+def timed(func, repeat, setup=None):
+    """执行 repeat 次, 返回每次的耗时 (秒) 和最后一次的返回值"""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return runs, result
+
+
+def summarize(runs, **extra):
+    entry = {
+        'median': round(statistics.median(runs), 6),
+        'min': round(min(runs), 6),
+        'runs': [round(run, 6) for run in runs],
+    }
+    entry.update(extra)
+    return entry
+
+
+def make_pipeline(options, log_dir, log_sink):
+    merged = dict(ADVANCED_OPTION_DEFAULTS)
+    merged.update(options)
+    return GitPipeline(merged, log_dir, log_sink, name='benchmark')
+
+
+def bench_cleanup(ctx):
+    pipeline = make_pipeline({}, ctx['log_dir'], ctx['log_sink'])
+    temp_count = ctx['args'].temp_files
+    runs, deleted = timed(lambda: pipeline.cleanup_temp_files(str(ctx['tree'])), ctx['args'].repeat,
+                          setup=lambda: plant_temp_files(ctx['tree'], temp_count))
+    return summarize(runs, deleted=len(deleted))
+
+
+def bench_scan_cold(ctx):
+    pipeline = make_pipeline({'scan_cache': False}, ctx['log_dir'], ctx['log_sink'])
+    runs, issues = timed(lambda: pipeline.scan_for_sensitive_data(str(ctx['tree'])), ctx['args'].repeat)
+    if len(issues) != ctx['stats']['secrets']:
+        print(f"  [警告] 扫描结果 {len(issues)} 个, 植入的敏感信息 {ctx['stats']['secrets']} 个")
+    return summarize(runs, findings=len(issues), files_per_sec=round(ctx['stats']['files'] / statistics.median(runs), 1))
+
+
+def bench_scan_entropy(ctx):
+    """开启高熵字符串检测的冷扫描, 与 scan_cold 对比即为检测的额外耗时"""
+    pipeline = make_pipeline({'scan_cache': False, 'entropy_scan': True}, ctx['log_dir'], ctx['log_sink'])
+    runs, issues = timed(lambda: pipeline.scan_for_sensitive_data(str(ctx['tree'])), ctx['args'].repeat)
+    entropy_findings = sum(1 for issue in issues if issue['category'] == git_gui_app.ENTROPY_CATEGORY)
+    return summarize(runs, findings=len(issues), entropy_findings=entropy_findings,
+                     numpy=git_gui_app.load_numpy() is not None)
+
+
+def bench_scan_cached(ctx):
+    pipeline = make_pipeline({'scan_cache': True}, ctx['log_dir'], ctx['log_sink'])
+    pipeline.scan_for_sensitive_data(str(ctx['tree']))  # 建立缓存
+    runs, issues = timed(lambda: pipeline.scan_for_sensitive_data(str(ctx['tree'])), ctx['args'].repeat)
+    return summarize(runs, findings=len(issues))
+
+
+def bench_pipeline(ctx):
+    """首次提交 (git init + 全量推送) 和修改少量文件后的增量提交"""
+    args = ctx['args']
+    initial_runs = []
+    incremental_runs = []
+    outcomes = set()
+    for attempt in range(args.repeat):
+        work = ctx['workdir'] / f"pipeline_{attempt}"
+        remote = ctx['workdir'] / f"remote_{attempt}.git"
+        shutil.rmtree(remote, ignore_errors=True)
+        subprocess.run(['git', 'init', '-q', '--bare', str(remote)], check=True)
+        shutil.rmtree(work, ignore_errors=True)
+        shutil.copytree(ctx['clean_tree'], work)
+
+        pipeline = make_pipeline({'scan_workers': args.workers}, ctx['log_dir'], ctx['log_sink'])
+        start = time.perf_counter()
+        outcomes.add(pipeline.execute_git_operations(str(remote), 'benchmark', str(work), True, 'main'))
+        initial_runs.append(time.perf_counter() - start)
+
+        # 修改几个文件后再提交一次
+        for path in sorted(work.rglob('*.py'))[:5]:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(f"touched_{attempt} = {attempt}\n")
+        start = time.perf_counter()
+        outcomes.add(pipeline.execute_git_operations(str(remote), 'benchmark 2', str(work), True, 'main'))
+        incremental_runs.append(time.perf_counter() - start)
+
+        shutil.rmtree(work, ignore_errors=True)
+        shutil.rmtree(remote, ignore_errors=True)
+
+    if outcomes != {'success'}:
+        print(f"  [警告] 提交流程结果: {sorted(outcomes)}")
+    return {
+        'pipeline_initial': summarize(initial_runs),
+        'pipeline_incremental': summarize(incremental_runs),
+    }
+
+
+def parse_importtime(stderr, top=5):
+    """解析 -X importtime 输出
+
+    Returns:
+        tuple: (git_gui_app 的累计导入耗时 (秒), 自身耗时最多的模块 [(模块, 秒)])
+    """
+    total = None
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name.strip()
+        if name == 'git_gui_app':
+            total = int(cumulative_us) / 1e6
+        else:
+            modules.append((name, int(self_us) / 1e6))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total, [(name, round(seconds, 6)) for name, seconds in modules[:top]]
+
+
+def has_display():
+    """是否可以打开 Tk 窗口"""
+    if sys.platform.startswith(('win', 'darwin')):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def probe_first_window(timeout=30):
+    """启动主程序直到首个窗口空闲 (GITGUI_STARTUP_PROBE)
+
+    Returns:
+        tuple: (从启动子进程到窗口就绪的秒数, 程序自身报告的秒数), 失败时返回 None
+    """
+    env = dict(os.environ, GITGUI_STARTUP_PROBE='1')
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, str(APP_SCRIPT)], capture_output=True, text=True,
+                              env=env, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    elapsed = time.perf_counter() - start
+    for line in proc.stdout.splitlines():
+        if line.startswith('STARTUP_READY '):
+            return elapsed, float(line.split()[1])
+    return None
+
+
+def bench_startup(ctx):
+    args = ctx['args']
+    import_runs = []
+    module_runs = []
+    heaviest = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import git_gui_app'],
+                              cwd=str(APP_SCRIPT.parent), capture_output=True, text=True)
+        import_runs.append(time.perf_counter() - start)
+        module_time, heaviest = parse_importtime(proc.stderr)
+        if module_time is not None:
+            module_runs.append(module_time)
+
+    results = {
+        # 包含解释器自身启动, module_import 为 git_gui_app 及其依赖的导入耗时
+        'startup_import': summarize(import_runs,
+                                    module_import=round(statistics.median(module_runs), 6) if module_runs else None,
+                                    heaviest=heaviest),
+    }
+
+    if not has_display():
+        print("  没有图形界面, 跳过首个窗口的测量")
+    else:
+        window_runs = []
+        reported = []
+        for _ in range(args.repeat):
+            probe = probe_first_window()
+            if probe is None:
+                print("  [警告] 主程序没有报告窗口就绪, 跳过首个窗口的测量")
+                break
+            window_runs.append(probe[0])
+            reported.append(probe[1])
+        if window_runs:
+            results['startup_window'] = summarize(window_runs, in_process=round(statistics.median(reported), 6))
+
+    # 有窗口测量时按首个窗口计算预算, 否则按导入耗时
+    budget_entry = results.get('startup_window', results['startup_import'])
+    if budget_entry['median'] > args.startup_budget:
+        ctx['budget_failures'].append(('startup', budget_entry['median'], args.startup_budget))
+    return results
+
+
+# 基准名称 -> 函数; 返回一个结果或 {名称: 结果}
+BENCHMARKS = {
+    'cleanup': bench_cleanup,
+    'scan_cold': bench_scan_cold,
+    'scan_entropy': bench_scan_entropy,
+    'scan_cached': bench_scan_cached,
+    'pipeline': bench_pipeline,
+    'startup': bench_startup,
+}
+
+
+def compare(results, baseline, threshold):
+    """与基准结果对比中位数
+
+    Returns:
+        list: 变慢超过阈值的项目 [(名称, 基准, 当前, 比例)]
+    """
+    regressions = []
+    print("\n与基准对比 (中位数):")
+    for name, entry in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('median'):
+            print(f"  {name:<22} 基准中没有该项")
+            continue
+        ratio = entry['median'] / base['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- 变慢'
+            regressions.append((name, base['median'], entry['median'], ratio))
+        print(f"  {name:<22} {base['median']:.4f}s -> {entry['median']:.4f}s  ({ratio:.2f}x){flag}")
+    return regressions
+
+
+def remove_workdir(workdir, owned):
+    """清理工作目录
+
+    Args:
+        owned: 是否为本脚本用 mkdtemp 创建的目录; 否则只删除本脚本生成的子目录
+    """
+    if owned:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return
+    generated = [workdir / 'tree', workdir / 'clean_tree', workdir / 'logs']
+    generated += workdir.glob('pipeline_*')
+    generated += workdir.glob('remote_*')
+    for path in generated:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Git GUI 提交工具性能基准测试')
+    parser.add_argument('--files', type=int, default=2000, help='合成代码树的文件数')
+    parser.add_argument('--mean-size', type=int, default=4096, help='文件大小中位数 (字节)')
+    parser.add_argument('--size-sigma', type=float, default=1.0, help='文件大小对数正态分布的 sigma')
+    parser.add_argument('--max-size', type=int, default=1024 * 1024, help='单个文件大小上限 (字节)')
+    parser.add_argument('--depth', type=int, default=4, help='目录最大深度')
+    parser.add_argument('--fanout', type=int, default=6, help='每层子目录数')
+    parser.add_argument('--ext-mix', default=DEFAULT_EXT_MIX, help='扩展名比例, 如 py=30,js=20,png=5')
+    parser.add_argument('--secret-density', type=float, default=0.01, help='含敏感信息的文本文件比例')
+    parser.add_argument('--temp-files', type=int, default=200, help='每轮清理前放入的临时文件数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数 (取中位数)')
+    parser.add_argument('--workers', type=int, default=0, help='提交流程中的 scan_workers')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='只运行指定的项目')
+    parser.add_argument('--workdir', help='合成代码树所在目录, 默认使用临时目录')
+    parser.add_argument('--keep', action='store_true', help='结束后保留合成代码树')
+    parser.add_argument('--output', help='结果 JSON 文件')
+    parser.add_argument('--baseline', help='用于对比的基准结果 JSON 文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='变慢超过该比例视为回归 (0.2 = 20%%)')
+    parser.add_argument('--startup-budget', type=float, default=1.0, help='启动耗时上限 (秒), 超过视为失败')
+    args = parser.parse_args()
+
+    # 只有自己创建的临时目录才整个删除; 用户指定的目录只删除本脚本生成的内容
+    own_workdir = not args.workdir
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='gitgui-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    log_dir = workdir / 'logs'
+    log_sink = LogSink(log_dir)
+
+    tree_options = dict(files=args.files, mean_size=args.mean_size, size_sigma=args.size_sigma,
+                        max_size=args.max_size, depth=args.depth, fanout=args.fanout,
+                        ext_mix=args.ext_mix, seed=args.seed)
+
+    print(f"生成合成代码树: {workdir}")
+    start = time.perf_counter()
+    stats = generate_tree(workdir / 'tree', secret_density=args.secret_density, **tree_options)
+    print(f"  {stats['files']} 个文件, {stats['bytes'] / 1024 / 1024:.1f} MB, "
+          f"植入敏感信息 {stats['secrets']} 个 ({time.perf_counter() - start:.1f} 秒)")
+
+    ctx = {'args': args, 'workdir': workdir, 'tree': workdir / 'tree', 'stats': stats,
+           'log_dir': log_dir, 'log_sink': log_sink, 'budget_failures': []}
+
+    selected = args.only or list(BENCHMARKS)
+    if 'pipeline' in selected:
+        # 提交流程使用不含敏感信息的同构代码树, 否则会被安全检查拦下
+        generate_tree(workdir / 'clean_tree', secret_density=0, **tree_options)
+        ctx['clean_tree'] = workdir / 'clean_tree'
+
+    results = {}
+    for name in selected:
+        print(f"运行: {name}")
+        entry = BENCHMARKS[name](ctx)
+        if 'median' not in entry:
+            results.update(entry)
+        else:
+            results[name] = entry
+
+    print("\n结果 (中位数):")
+    for name, entry in results.items():
+        extra = ', '.join(f"{key}={value}" for key, value in entry.items() if key not in ('median', 'min', 'runs'))
+        print(f"  {name:<22} {entry['median']:.4f}s  (最小 {entry['min']:.4f}s){'  ' + extra if extra else ''}")
+
+    git_version = subprocess.run(['git', '--version'], capture_output=True, text=True).stdout.strip()
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git': git_version,
+            'tree': dict(tree_options, secret_density=args.secret_density),
+            'tree_stats': stats,
+            'repeat': args.repeat,
+            'startup_budget': args.startup_budget,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.output}")
+
+    log_sink.close()
+    if not args.keep:
+        remove_workdir(workdir, own_workdir)
+
+    status = 0
+    for name, elapsed, budget in ctx['budget_failures']:
+        print(f"\n[超出预算] {name}: {elapsed:.4f}s > {budget:.4f}s")
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('tree') != report['meta']['tree']:
+            print("\n[警告] 基准结果使用的代码树参数不同, 对比结果仅供参考")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项变慢超过 {args.threshold:.0%}")
+            return 1
+        print(f"\n没有超过 {args.threshold:.0%} 的回归")
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试问题指纹在全量扫描、暂存区扫描和历史扫描之间一致, 以及重新生成基线时保留历史条目
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import (ADVANCED_OPTION_DEFAULTS, BASELINE_FILE_NAME, FindingBaseline, GitPipeline, GitRunner,
+                         LogSink, baseline_main, finding_fingerprint)
+
+SECRET_LINES = ('api_key = "ABCDEFGHIJKLMNOPQRSTUVWX12"\n'
+                'password = "Xk9-correct-horse"\n')
+
+
+def git(*args):
+    subprocess.run(['git', *args], check=True, capture_output=True)
+
+
+def commit(work, message):
+    git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+        'commit', '-q', '-m', message)
+
+
+def fingerprints(issues):
+    return {finding_fingerprint(issue['category'], issue['file'], issue['match']) for issue in issues}
+
+
+def test_fingerprint_round_trip():
+    """同一处问题 (类别、路径、匹配文本相同) 在三种扫描中得到相同的指纹"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        work = base / 'work'
+        git('init', '-q', str(work))
+        # 子目录和非 ASCII 路径: 验证路径分隔符和 diff 中的路径转义
+        for rel_path in ('config/settings.py', '配置/密钥.py'):
+            path = work / rel_path
+            path.parent.mkdir(parents=True)
+            path.write_text('# settings\n' + SECRET_LINES, encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+
+        log_sink = LogSink(base / 'logs')
+        options = dict(ADVANCED_OPTION_DEFAULTS, scan_cache=False)
+        pipeline = GitPipeline(options, base / 'logs', log_sink)
+        try:
+            full = pipeline.scan_for_sensitive_data(str(work))
+            staged = pipeline.scan_staged_changes(str(work))
+            commit(work, 'add settings')
+            history = pipeline.scan_unpushed_history(GitRunner(str(work)))
+        finally:
+            log_sink.close()
+
+        assert len(full) == 4, full
+        assert fingerprints(full) == fingerprints(staged) == fingerprints(history)
+
+
+def test_baseline_keeps_history_entries():
+    """不带 --history 重新生成基线时, 保留原基线中只出现在历史提交里的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        work = base / 'work'
+        git('init', '-q', str(work))
+        (work / 'old.py').write_text(SECRET_LINES, encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+        commit(work, 'add secret')
+        (work / 'old.py').write_text('# removed\n', encoding='utf-8')
+        (work / 'new.py').write_text('token = "sk_abcdefghijklmnopqrstuv"\n', encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+        commit(work, 'remove secret')
+
+        config_file = base / 'config.json'
+        config_file.write_text(json.dumps({'scan_cache': False}), encoding='utf-8')
+        baseline_path = work / BASELINE_FILE_NAME
+
+        assert baseline_main([str(work), '--history', '--config', str(config_file)]) == 0
+        entries = json.loads(baseline_path.read_text(encoding='utf-8'))['findings']
+        history_files = {entry['file'] for entry in entries if entry.get('history')}
+        assert history_files == {'old.py'}, entries
+        # 同时出现在当前代码中的问题不标记为历史条目
+        assert all(not entry.get('history') for entry in entries if entry['file'] == 'new.py')
+
+        assert baseline_main([str(work), '--config', str(config_file)]) == 0
+        regenerated = json.loads(baseline_path.read_text(encoding='utf-8'))['findings']
+        assert sorted(entry['fingerprint'] for entry in regenerated) == \
+            sorted(entry['fingerprint'] for entry in entries)
+
+        # 之后的历史扫描不再报告这些问题
+        log_dir = base / 'logs'
+        log_sink = LogSink(log_dir)
+        pipeline = GitPipeline(dict(ADVANCED_OPTION_DEFAULTS), log_dir, log_sink)
+        try:
+            history = pipeline.scan_unpushed_history(GitRunner(str(work)))
+        finally:
+            log_sink.close()
+        baseline = FindingBaseline.for_path(work)
+        assert baseline.load()
+        assert history and baseline.filter(history) == []
+
+
+if __name__ == '__main__':
+    test_fingerprint_round_trip()
+    test_baseline_keeps_history_entries()
+    print("[OK] 问题指纹一致, 重新生成基线时保留历史条目")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试配置文件: 旧版只有一份配置的 user_config.json 迁移为按仓库保存的新格式
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import ConfigStore, UNNAMED_PROFILE, load_saved_options
+
+OLD_CONFIG = {
+    'repo_name': 'demo-repo',
+    'commit_msg': 'Fix typo',
+    'code_path': '/home/user/demo',
+    'branch_selection': 'custom',
+    'custom_branch': 'develop',
+    'security_check': False,
+    'scan_cache': False,
+    'entropy_scan': True,
+}
+
+
+def test_migrate_flat_config():
+    """旧版配置成为一份仓库配置, 高级选项留在顶层, 原文件另存为 .v1.json"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'user_config.json'
+        path.write_text(json.dumps(OLD_CONFIG), encoding='utf-8')
+        messages = []
+
+        store = ConfigStore(path, lambda level, message: messages.append((level, message)), save_delay=60)
+        assert store.load()
+        assert store.active == 'demo-repo'
+        assert store.names() == ['demo-repo']
+        fields = store.get('demo-repo')
+        assert fields['custom_branch'] == 'develop' and fields['security_check'] is False
+        # 旧文件中没有的字段取默认值
+        assert fields['scan_staged_only'] is False
+        assert store.options == {'scan_cache': False, 'entropy_scan': True}
+        assert json.loads((Path(tmp) / 'user_config.v1.json').read_text(encoding='utf-8')) == OLD_CONFIG
+
+        # 迁移后写回新格式 (不必等到延迟写盘的定时器)
+        store.flush()
+        data = json.loads(path.read_text(encoding='utf-8'))
+        assert data['version'] == ConfigStore.VERSION
+        assert data['active_profile'] == 'demo-repo'
+        assert data['profiles']['demo-repo']['code_path'] == '/home/user/demo'
+        assert 'repo_name' not in data
+        assert data['scan_cache'] is False and data['entropy_scan'] is True
+
+        # 新格式再次读取时不重复迁移, 命令行子命令读取到相同的高级选项
+        reloaded = ConfigStore(path, lambda level, message: messages.append((level, message)), save_delay=60)
+        assert reloaded.load()
+        assert reloaded.profiles == store.profiles and reloaded.active == 'demo-repo'
+        assert reloaded.options == store.options
+        assert sum('旧版配置已迁移' in message for _, message in messages) == 1
+        options = load_saved_options(str(path))
+        assert options['scan_cache'] is False and options['entropy_scan'] is True
+
+
+def test_migrate_unnamed_config():
+    """没有仓库名称的旧版配置迁移为 "未命名" 配置"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'user_config.json'
+        path.write_text(json.dumps({'code_path': '/tmp/x', 'commit_msg': 'v1'}), encoding='utf-8')
+        store = ConfigStore(path, lambda level, message: None, save_delay=60)
+        assert store.load()
+        assert store.active == UNNAMED_PROFILE
+        assert store.get(UNNAMED_PROFILE)['code_path'] == '/tmp/x'
+        store.flush()
+
+        missing = ConfigStore(Path(tmp) / 'missing.json', lambda level, message: None, save_delay=60)
+        assert not missing.load()
+        assert missing.active is None and missing.profiles == {}
+
+
+if __name__ == '__main__':
+    test_migrate_flat_config()
+    test_migrate_unnamed_config()
+    print("[OK] 旧版配置迁移正常")
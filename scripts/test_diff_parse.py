@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 diff 解析: 带引号和转义的路径、重命名、删除, 以及新增行的行号
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import _parse_diff_path, iter_added_lines
+
+
+def git(*args, **kwargs):
+    return subprocess.run(['git', *args], check=True, capture_output=True, **kwargs)
+
+
+def test_parse_diff_path():
+    """/dev/null、b/ 前缀、C 风格转义 (\\t \\" \\\\ 八进制字节) 和 diff 追加的制表符"""
+    assert _parse_diff_path('/dev/null') is None
+    assert _parse_diff_path('b/src/app.py') == 'src/app.py'
+    assert _parse_diff_path('b/with space.py\t') == 'with space.py'
+    assert _parse_diff_path('"b/tab\\there.py"') == 'tab\there.py'
+    assert _parse_diff_path('"b/say \\"hi\\".py"') == 'say "hi".py'
+    assert _parse_diff_path('"b/back\\\\slash.py"') == 'back\\slash.py'
+    assert _parse_diff_path('"b/\\344\\270\\255\\346\\226\\207.py"') == '中文.py'
+    # core.quotepath=off 时非 ASCII 字符不转义, 但含引号的路径仍然加引号
+    assert _parse_diff_path('"b/中文 \\"x\\".py"') == '中文 "x".py'
+
+
+def test_iter_added_lines_from_git_diff():
+    """对真实的 git diff --cached 输出解析出每个新增行的路径和行号"""
+    names = ['plain.py', 'with space.py', '中文.py']
+    if os.name != 'nt':
+        # Windows 不允许文件名中出现引号、反斜杠和制表符
+        names += ['say "hi".py', 'back\\slash.py', 'tab\there.py']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp) / 'work'
+        git('init', '-q', str(work))
+        (work / 'old_name.py').write_text('a = 1\nb = 2\nc = 3\n', encoding='utf-8')
+        (work / 'removed.py').write_text('gone = 1\n', encoding='utf-8')
+        (work / 'edited.py').write_text('one\ntwo\nthree\n', encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+        git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+            'commit', '-q', '-m', 'init')
+
+        for name in names:
+            (work / name).write_text(f'first {name}\nsecond\n', encoding='utf-8')
+        git('-C', str(work), 'mv', 'old_name.py', 'new_name.py')
+        (work / 'new_name.py').write_text('a = 1\nb = 2\nc = 3\nd = 4\n', encoding='utf-8')
+        (work / 'removed.py').unlink()
+        (work / 'edited.py').write_text('one\nTWO\nthree\nfour\n', encoding='utf-8')
+        git('-C', str(work), 'add', '-A')
+
+        expected = {(name, 1, f'first {name}') for name in names}
+        expected |= {(name, 2, 'second') for name in names}
+        expected |= {('new_name.py', 4, 'd = 4'), ('edited.py', 2, 'TWO'), ('edited.py', 4, 'four')}
+
+        for quotepath in ('on', 'off'):
+            output = git('-C', str(work), '-c', f'core.quotepath={quotepath}', 'diff', '--cached', '-M',
+                         '--no-color', '--no-ext-diff', '-U0').stdout.decode('utf-8')
+            actual = set(iter_added_lines(output.splitlines(keepends=True)))
+            assert actual == expected, (quotepath, actual ^ expected)
+
+
+if __name__ == '__main__':
+    test_parse_diff_path()
+    test_iter_added_lines_from_git_diff()
+    print("[OK] diff 路径和新增行解析正常")
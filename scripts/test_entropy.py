@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试高熵字符串检测: 短随机密钥能被发现, 提交号/摘要、UUID 和标识符不被报告
+"""
+
+import random
+import string
+import sys
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import ADVANCED_OPTION_DEFAULTS, ENTROPY_CATEGORY, SensitiveDataScanner
+
+
+def entropy_findings(scanner, text):
+    return [matched_text for category, _, matched_text in scanner.scan_text(text)
+            if category == ENTROPY_CATEGORY]
+
+
+def test_short_random_keys():
+    """20-24 个字符的随机密钥 (字母数字、base64) 在默认阈值下能被发现"""
+    scanner = SensitiveDataScanner(entropy_threshold=ADVANCED_OPTION_DEFAULTS['entropy_threshold'])
+    rnd = random.Random(1)
+    alphabets = [string.ascii_letters + string.digits, string.ascii_letters + string.digits + '+/']
+    for alphabet in alphabets:
+        for length in (20, 24):
+            keys = [''.join(rnd.choice(alphabet) for _ in range(length)) for _ in range(200)]
+            found = sum(entropy_findings(scanner, f'secret = "{key}"') == [key] for key in keys)
+            assert found >= 0.9 * len(keys), (alphabet, length, found)
+
+    for key in ('aK3x9Qp2Lm7Rt4Wz8Yb1', 'Zq8fP2mL9vR4tK7wB1nC5xJ3'):
+        assert entropy_findings(scanner, f"value: '{key}'") == [key]
+
+
+def test_hex_digests():
+    """十六进制字符串本身会报告, 但紧跟在 commit / sha256 / --hash= 之后的摘要不报告"""
+    scanner = SensitiveDataScanner(entropy_threshold=ADVANCED_OPTION_DEFAULTS['entropy_threshold'])
+    sha1 = '9fceb02d0ae598e95dc970b74767f19372d61af8'
+    sha256 = 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'
+    assert entropy_findings(scanner, f'blob = "{sha1}"') == [sha1]
+
+    for text in (f'commit = "{sha1}"',
+                 f'"commit_id": "{sha1}"',
+                 f'rev: {sha1}',
+                 f'requests==2.31.0 --hash=sha256:{sha256}',
+                 f'sha256 = "{sha256}"',
+                 f'checksum: {sha256}'):
+        assert entropy_findings(scanner, text) == [], text
+
+
+def test_uuids_and_identifiers():
+    """UUID 和由单词拼成的标识符、常量名不报告"""
+    scanner = SensitiveDataScanner(entropy_threshold=ADVANCED_OPTION_DEFAULTS['entropy_threshold'])
+    for token in ('123e4567-e89b-12d3-a456-426614174000',
+                  'F47AC10B-58CC-4372-A567-0E02B2C3D479',
+                  'getUserAccountNameFromDatabase2',
+                  'SOME_CONSTANT_VALUE_NAME_V2',
+                  'handle_request_timeout_seconds',
+                  'com/example/project/MainActivity',
+                  'HttpClientConnectionManager42'):
+        assert entropy_findings(scanner, f'value = "{token}"') == [], token
+
+
+if __name__ == '__main__':
+    test_short_random_keys()
+    test_hex_digests()
+    test_uuids_and_identifiers()
+    print("[OK] 高熵字符串检测正常")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试未推送提交的扫描范围: 已推送的提交不扫描、新分支、根提交上的 HEAD^@
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import ADVANCED_OPTION_DEFAULTS, GitPipeline, GitRunner, LogSink
+
+
+def git(*args):
+    return subprocess.run(['git', *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit_secret(work, file_name):
+    """提交一个含密钥的新文件
+
+    Returns:
+        str: 提交的短哈希
+    """
+    (work / file_name).write_text(f'api_key = "ABCDEFGHIJKLMNOPQRSTUV{file_name[0].upper()}X12"\n',
+                                  encoding='utf-8')
+    git('-C', str(work), 'add', file_name)
+    git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+        'commit', '-q', '-m', f'add {file_name}')
+    return git('-C', str(work), 'rev-parse', '--short', 'HEAD')
+
+
+def scanned(pipeline, work, skip_head=False):
+    """扫描结果中的 {(文件, 提交)}"""
+    issues = pipeline.scan_unpushed_history(GitRunner(str(work)), skip_head=skip_head)
+    return {(issue['file'], issue['commit']) for issue in issues}
+
+
+def test_unpushed_history_range():
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        remote = base / 'remote.git'
+        work = base / 'work'
+        git('init', '-q', '--bare', str(remote))
+        git('init', '-q', str(work))
+        git('-C', str(work), 'remote', 'add', 'origin', str(remote))
+
+        log_sink = LogSink(base / 'logs')
+        pipeline = GitPipeline(dict(ADVANCED_OPTION_DEFAULTS), base / 'logs', log_sink)
+        try:
+            # 根提交: 还没有远程跟踪分支时全部提交都未推送; skip_head 时 HEAD^@ 为空, 不扫描任何提交
+            root = commit_secret(work, 'a.py')
+            assert scanned(pipeline, work) == {('a.py', root)}
+            assert scanned(pipeline, work, skip_head=True) == set()
+
+            # 已推送的提交 (origin/main 能到达) 不再扫描
+            git('-C', str(work), 'push', '-q', 'origin', 'HEAD:refs/heads/main')
+            git('-C', str(work), 'fetch', '-q', 'origin')
+            assert scanned(pipeline, work) == set()
+            second = commit_secret(work, 'b.py')
+            assert scanned(pipeline, work) == {('b.py', second)}
+
+            # 远程还不存在的新分支: 扫描所有 origin/* 都不能到达的提交
+            git('-C', str(work), 'checkout', '-q', '-b', 'feature')
+            third = commit_secret(work, 'c.py')
+            assert scanned(pipeline, work) == {('b.py', second), ('c.py', third)}
+            # HEAD 是刚创建的提交时只扫描它之前的提交
+            assert scanned(pipeline, work, skip_head=True) == {('b.py', second)}
+        finally:
+            log_sink.close()
+
+
+if __name__ == '__main__':
+    test_unpushed_history_range()
+    print("[OK] 未推送提交的扫描范围正确")
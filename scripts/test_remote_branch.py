@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试远程分支查询 (对本地裸仓库执行 git ls-remote) 和查询结果缓存
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import ADVANCED_OPTION_DEFAULTS, GitPipeline, GitRunner, LogSink
+
+
+def git(*args):
+    subprocess.run(['git', *args], check=True, capture_output=True)
+
+
+def make_repos(base):
+    """建立裸仓库 remote.git (只有 main 分支) 和以它为 origin 的本地仓库 work
+
+    Returns:
+        tuple: (裸仓库路径, 本地仓库路径)
+    """
+    remote = base / 'remote.git'
+    work = base / 'work'
+    git('init', '-q', '--bare', str(remote))
+    git('init', '-q', str(work))
+    (work / 'a.txt').write_text('a\n', encoding='utf-8')
+    git('-C', str(work), 'add', 'a.txt')
+    git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+        'commit', '-q', '-m', 'init')
+    git('-C', str(work), 'remote', 'add', 'origin', str(remote))
+    git('-C', str(work), 'push', '-q', 'origin', 'HEAD:refs/heads/main')
+    return remote, work
+
+
+class CountingRunner(GitRunner):
+    """记录 ls-remote 调用次数的 GitRunner"""
+
+    def __init__(self, code_path):
+        super().__init__(code_path)
+        self.ls_remote_calls = 0
+
+    def run(self, *args, **kwargs):
+        if args and args[0] == 'ls-remote':
+            self.ls_remote_calls += 1
+        return super().run(*args, **kwargs)
+
+
+def test_check_remote_branch():
+    """分支存在、不存在, 以及 TTL 内的第二次查询命中缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        remote, work = make_repos(base)
+        log_sink = LogSink(base / 'logs')
+        options = dict(ADVANCED_OPTION_DEFAULTS, remote_ref_ttl=60)
+        pipeline = GitPipeline(options, base / 'logs', log_sink)
+        runner = CountingRunner(str(work))
+        repo_url = str(remote)
+        try:
+            # 分支存在
+            assert pipeline.check_remote_branch(runner, repo_url, 'main') is True
+            assert runner.ls_remote_calls == 1
+
+            # 分支不存在 (ls-remote 按后缀匹配, 不能把 main 当成 ain)
+            assert pipeline.check_remote_branch(runner, repo_url, 'ain') is False
+            assert pipeline.check_remote_branch(runner, repo_url, 'develop') is False
+            assert runner.ls_remote_calls == 3
+
+            # TTL 内的第二次查询直接使用缓存: 远程删除分支后结果不变, 也不再执行 ls-remote
+            git('-C', str(remote), 'branch', '-D', 'main')
+            assert pipeline.check_remote_branch(runner, repo_url, 'main') is True
+            assert runner.ls_remote_calls == 3
+
+            # 不使用缓存时重新查询, 得到最新结果
+            pipeline.options['remote_ref_ttl'] = 0
+            assert pipeline.check_remote_branch(runner, repo_url, 'main') is False
+            assert runner.ls_remote_calls == 4
+        finally:
+            log_sink.close()
+
+
+if __name__ == '__main__':
+    test_check_remote_branch()
+    print("[OK] 远程分支查询和缓存正常")
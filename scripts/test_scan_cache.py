@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试扫描缓存: 按 (大小, mtime_ns, inode) 判断失效、按内容摘要命中, 以及按批次淘汰条目
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import ScanCache
+
+FINDINGS = [['API Key', 'api_key = "ABCDEFGHIJKLMNOPQRSTUVWX12"']]
+
+
+def old_stat(size=100, inode=7):
+    """一分钟前修改的文件的 stat 信息 (不在 RACY_WINDOW_NS 内)"""
+    return (size, time.time_ns() - 60 * 10**9, inode)
+
+
+def test_stat_key_invalidation():
+    """大小、mtime_ns、inode 任何一项变化都不按 stat 命中, 内容相同时仍按摘要命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ScanCache(Path(tmp) / 'cache.json', 'v1')
+        cache.begin()
+        stat_key = old_stat()
+        cache.store('a.py', stat_key, 'digest-a', FINDINGS)
+
+        assert cache.lookup_stat('a.py', stat_key) == FINDINGS
+        size, mtime_ns, inode = stat_key
+        for changed in ((size + 1, mtime_ns, inode), (size, mtime_ns + 1, inode), (size, mtime_ns, inode + 1)):
+            assert cache.lookup_stat('a.py', changed) is None, changed
+        assert cache.lookup_stat('other.py', stat_key) is None
+        assert cache.lookup_content('digest-a') == FINDINGS
+        assert cache.lookup_content('digest-b') is None
+        assert (cache.stat_hits, cache.content_hits) == (1, 1)
+
+        # 刚修改过的文件只记录内容摘要, 不按 stat 命中
+        fresh = (size, time.time_ns(), inode)
+        cache.store('b.py', fresh, 'digest-a', FINDINGS)
+        assert cache.lookup_stat('b.py', fresh) is None
+        assert cache.files['b.py'][3] == 'digest-a'
+
+
+def test_save_load_and_rules_version():
+    """保存后重新加载得到相同的条目; 规则集版本不同时从空缓存开始"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / 'cache.json'
+        cache = ScanCache(cache_path, 'v1')
+        cache.begin()
+        stat_key = old_stat()
+        cache.store('a.py', stat_key, 'digest-a', FINDINGS)
+        cache.save()
+
+        loaded = ScanCache(cache_path, 'v1')
+        loaded.load()
+        assert loaded.generation == 1
+        assert loaded.lookup_stat('a.py', stat_key) == FINDINGS
+
+        changed_rules = ScanCache(cache_path, 'v2')
+        changed_rules.load()
+        assert changed_rules.files == {} and changed_rules.contents == {}
+
+
+def test_generation_eviction():
+    """超过上限时淘汰较早批次的条目, 最近 RECENT_GENERATIONS 次完整扫描用到的条目全部保留"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ScanCache(Path(tmp) / 'cache.json', 'v1')
+        cache.MAX_FILE_ENTRIES = cache.MAX_CONTENT_ENTRIES = 2
+
+        # 一次完整扫描的条目多于上限时全部保留
+        cache.begin()
+        for name in ('a', 'b', 'c', 'd'):
+            cache.store(f'{name}.py', old_stat(), f'digest-{name}', [])
+        cache.save()
+        assert sorted(cache.files) == ['a.py', 'b.py', 'c.py', 'd.py']
+        assert len(cache.contents) == 4
+
+        # 之后每次扫描只用到 a.py: 其余条目在超出最近的批次后被淘汰, 只保留到上限为止
+        stat_key = tuple(cache.files['a.py'][0:3])
+        for _ in range(cache.RECENT_GENERATIONS):
+            cache.begin()
+            assert cache.lookup_stat('a.py', stat_key) == []
+            cache.save()
+        assert 'a.py' in cache.files and len(cache.files) == cache.MAX_FILE_ENTRIES
+        assert 'digest-a' in cache.contents and len(cache.contents) == cache.MAX_CONTENT_ENTRIES
+        assert {entry[3] for entry in cache.files.values()} == set(cache.contents)
+
+        # 只检查部分文件的扫描 (full=False) 不开始新的批次
+        generation = cache.generation
+        cache.begin(full=False)
+        assert cache.generation == generation
+
+
+if __name__ == '__main__':
+    test_stat_key_invalidation()
+    test_save_load_and_rules_version()
+    test_generation_eviction()
+    print("[OK] 扫描缓存的失效判断和淘汰正常")
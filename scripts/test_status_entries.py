@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 git status --porcelain -z 的解析: 重命名/复制条目、NUL 分隔的特殊文件名, 以及未跟踪文件列表
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import WorktreeStatus, parse_status_entries
+
+
+def git(*args):
+    subprocess.run(['git', *args], check=True, capture_output=True)
+
+
+def test_parse_status_entries():
+    """重命名/复制后的原路径被跳过, 路径中的空格、换行和非 ASCII 字节原样保留"""
+    output = (b'R  new name.py\0old name.py\0'
+              b' M line\nbreak.py\0'
+              b'C  copy.py\0source.py\0'
+              b'RM moved.py\0orig.py\0'
+              b'?? \xe4\xb8\xad\xe6\x96\x87.py\0'
+              b'?? nested/\0'
+              b'D  deleted.py\0')
+    assert parse_status_entries(output) == [
+        (b'R ', b'new name.py'),
+        (b' M', b'line\nbreak.py'),
+        (b'C ', b'copy.py'),
+        (b'RM', b'moved.py'),
+        (b'??', '中文.py'.encode('utf-8')),
+        (b'??', b'nested/'),
+        (b'D ', b'deleted.py'),
+    ]
+    assert parse_status_entries(b'') == []
+
+
+def test_worktree_status_from_git():
+    """对真实仓库读取状态: 重命名只报告新路径, 嵌套仓库不算未跟踪文件"""
+    names = ['with space.tmp', '中文.log']
+    if os.name != 'nt':
+        names.append('line\nbreak.tmp')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp) / 'work'
+        git('init', '-q', str(work))
+        (work / 'old.py').write_text('a = 1\nb = 2\nc = 3\n', encoding='utf-8')
+        (work / 'tracked.py').write_text('x = 1\n', encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+        git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+            'commit', '-q', '-m', 'init')
+
+        git('-C', str(work), 'mv', 'old.py', 'renamed.py')
+        (work / 'tracked.py').write_text('x = 2\n', encoding='utf-8')
+        for name in names:
+            (work / name).write_text('temp\n', encoding='utf-8')
+        git('init', '-q', str(work / 'nested'))
+
+        status = WorktreeStatus.read(str(work))
+        assert status is not None
+        entries = dict((path, code) for code, path in status.entries)
+        assert entries[b'renamed.py'] == b'R ' and b'old.py' not in entries
+        assert entries[b'tracked.py'] == b' M'
+        assert entries[b'nested/'] == b'??'
+
+        untracked = sorted(rel_path for rel_path, _, _ in status.untracked_files())
+        assert untracked == sorted(names)
+        assert sorted(status.unstaged_paths()) == sorted([b'tracked.py', b'nested/']
+                                                          + [os.fsencode(name) for name in names])
+        assert status.has_staged()
+
+
+if __name__ == '__main__':
+    test_parse_status_entries()
+    test_worktree_status_from_git()
+    print("[OK] git status 解析正常")
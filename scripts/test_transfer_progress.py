@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试推送进度解析: git push --progress 的真实输出 (推送到本地裸仓库) 和典型的进度行
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_gui_app import GIT_PROGRESS_RE, GitRunner, TransferProgress, parse_git_size
+
+
+def git(*args):
+    subprocess.run(['git', *args], check=True, capture_output=True)
+
+
+def test_progress_lines():
+    """各阶段的进度行 (含 remote: 前缀、字节数和速度、done. 结尾)"""
+    match = GIT_PROGRESS_RE.match('Writing objects: 100% (1024/1024), 25.12 MiB | 3.50 MiB/s, done.')
+    assert match['phase'] == 'Writing objects'
+    assert (match['percent'], match['done'], match['total']) == ('100', '1024', '1024')
+    assert parse_git_size(match['size']) == int(25.12 * 1024 ** 2)
+    assert parse_git_size(match['rate']) == int(3.5 * 1024 ** 2)
+    assert match['finished']
+
+    match = GIT_PROGRESS_RE.match('Receiving objects:  42% (420/1000), 512.00 KiB | 1.00 MiB/s')
+    assert match['phase'] == 'Receiving objects' and match['percent'] == '42' and not match['finished']
+
+    match = GIT_PROGRESS_RE.match('remote: Counting objects: 100% (12/12), done.')
+    assert match['phase'] == 'remote: Counting objects' and match['size'] is None
+
+    match = GIT_PROGRESS_RE.match('Writing objects: 100% (3/3), 230 bytes | 230.00 KiB/s, done.')
+    assert parse_git_size(match['size']) == 230
+
+    for line in ('Enumerating objects: 5, done.', 'To /tmp/remote.git', ' * [new branch]      HEAD -> main'):
+        assert GIT_PROGRESS_RE.match(line) is None, line
+
+
+def test_push_progress_from_git():
+    """推送到本地裸仓库: 每一行进度都能被解析, 传输阶段记录对象数和字节数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        remote = base / 'remote.git'
+        work = base / 'work'
+        git('init', '-q', '--bare', str(remote))
+        git('init', '-q', str(work))
+        # 不可压缩的内容, 传输的字节数接近文件大小
+        (work / 'data.bin').write_bytes(os.urandom(300 * 1024))
+        (work / 'a.txt').write_text('a\n', encoding='utf-8')
+        git('-C', str(work), 'add', '.')
+        git('-C', str(work), '-c', 'user.name=test', '-c', 'user.email=test@example.com',
+            'commit', '-q', '-m', 'init')
+        git('-C', str(work), 'remote', 'add', 'origin', str(remote))
+
+        lines = []
+        messages = []
+        transfer = TransferProgress("推送", log=lambda level, message: messages.append((level, message)))
+
+        def on_line(line, final):
+            lines.append(line)
+            transfer.feed(line, final)
+
+        result = GitRunner(str(work)).stream('push', '--progress', 'origin', 'HEAD:refs/heads/main',
+                                             on_line=on_line)
+        assert result.returncode == 0, result.stderr
+
+        progress_lines = [line for line in lines if '%' in line]
+        assert progress_lines, lines
+        for line in progress_lines:
+            assert GIT_PROGRESS_RE.match(line), line
+
+        # 提交、目录树和两个文件共 4 个对象
+        phase, objects, nbytes, elapsed = transfer.transfer
+        assert phase == 'Writing objects'
+        assert objects == 4
+        assert 300 * 1024 <= nbytes < 400 * 1024
+        assert elapsed >= 0
+        assert any(level == 'INFO' and 'Writing objects: 100%' in message for level, message in messages)
+        assert '4 个对象' in transfer.totals()
+
+
+if __name__ == '__main__':
+    test_progress_lines()
+    test_push_progress_from_git()
+    print("[OK] 推送进度解析正常")